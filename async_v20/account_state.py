@@ -0,0 +1,329 @@
+"""Account state kept in id keyed indexes
+
+:class:`AccountState` holds the orders, trades and positions of an account in
+dicts keyed by order id, trade id and instrument. Account changes and transactions
+are applied as targeted patches, only replacing the objects that changed. The immutable
+:class:`~async_v20.Account` is created when it is requested and cached until the
+state changes again.
+"""
+import logging
+from inspect import signature
+from math import copysign
+
+from .definitions.types import Account, ArrayOrder, ArrayTradeSummary, ArrayPosition
+from .definitions.types import LimitOrder, StopOrder, MarketIfTouchedOrder
+from .definitions.types import TakeProfitOrder, StopLossOrder, TrailingStopLossOrder
+from .definitions.types import Position, PositionSide, TradeSummary
+
+__all__ = ['AccountState']
+
+logger = logging.getLogger(__name__)
+
+collections = ('orders', 'trades', 'positions')
+
+
+# The pending order created by each order transaction type
+pending_orders = {
+    'LIMIT_ORDER': LimitOrder,
+    'STOP_ORDER': StopOrder,
+    'MARKET_IF_TOUCHED_ORDER': MarketIfTouchedOrder,
+    'TAKE_PROFIT_ORDER': TakeProfitOrder,
+    'STOP_LOSS_ORDER': StopLossOrder,
+    'TRAILING_STOP_LOSS_ORDER': TrailingStopLossOrder,
+}
+
+# Order transaction attributes that are also attributes of the order
+order_attributes = {typ: frozenset(signature(order).parameters) for typ, order in pending_orders.items()}
+
+# The TradeSummary attribute of the id of each dependent order type
+dependent_orders = {
+    'TAKE_PROFIT': 'take_profit_order_id',
+    'STOP_LOSS': 'stop_loss_order_id',
+    'TRAILING_STOP_LOSS': 'trailing_stop_loss_order_id',
+}
+
+
+def _add(value, change):
+    """Add numbers that may be missing"""
+    if change is None:
+        return value
+    return (value or 0) + change
+
+
+class AccountState(object):
+    """The state of an account
+
+    Args:
+        account: The :class:`~async_v20.Account` returned by
+            :meth:`~async_v20.OandaClient.get_account_details`
+
+    Attributes:
+        orders: dict of the pending orders keyed by str(order id)
+        trades: dict of the open trades keyed by str(trade id)
+        positions: dict of the positions keyed by instrument
+        version: Incremented each time the state changes
+    """
+
+    def __init__(self, account):
+        self.version = 0
+        self.reset(account)
+
+    def reset(self, account):
+        """Replace the whole state with `account`"""
+        self._fields = {field: getattr(account, field) for field in account._fields if field not in collections}
+        self.orders = {str(order.id): order for order in account.orders or ()}
+        self.trades = {str(trade.id): trade for trade in account.trades or ()}
+        self.positions = {position.instrument: position for position in account.positions or ()}
+        # Instruments of the positions that may have a non zero unrealized P/L
+        self._positions_with_pl = set(self.positions)
+        self._changed(account)
+
+    def _changed(self, account=None):
+        self.version += 1
+        self._account = account
+
+    def account(self):
+        """Return the :class:`~async_v20.Account`. Only created after the state changes"""
+        account = self._account
+        if account is None:
+            # Arrays are passed so the Account doesn't format every object when created
+            account = self._account = Account(**self._fields,
+                                              orders=ArrayOrder(*self.orders.values()),
+                                              trades=ArrayTradeSummary(*self.trades.values()),
+                                              positions=ArrayPosition(*self.positions.values()))
+        return account
+
+    def get(self, field, default=None):
+        """Return a field of the account, that isn't orders, trades or positions"""
+        return self._fields.get(field, default)
+
+    def update(self, **fields):
+        """Update fields of the account, that aren't orders, trades or positions"""
+        self._fields.update(fields)
+        self._changed()
+
+    def put_order(self, order):
+        """Add or replace an order"""
+        self.orders[str(order.id)] = order
+        self._changed()
+
+    def remove_order(self, order_id):
+        """Remove an order. Returns the order or None"""
+        order = self.orders.pop(str(order_id), None)
+        if order is not None:
+            self._changed()
+        return order
+
+    def put_trade(self, trade):
+        """Add or replace a trade"""
+        self.trades[str(trade.id)] = trade
+        self._changed()
+
+    def remove_trade(self, trade_id):
+        """Remove a trade. Returns the trade or None"""
+        trade = self.trades.pop(str(trade_id), None)
+        if trade is not None:
+            self._changed()
+        return trade
+
+    def put_position(self, position):
+        """Add or replace the position of an instrument"""
+        self.positions[position.instrument] = position
+        self._positions_with_pl.add(position.instrument)
+        self._changed()
+
+    def apply_changes(self, changes, state):
+        """Apply the response of :meth:`~async_v20.OandaClient.account_changes`
+
+        Args:
+            changes: :class:`~async_v20.AccountChanges`
+            state: :class:`~async_v20.AccountChangesState`
+        """
+        orders, trades, positions = self.orders, self.trades, self.positions
+
+        # Add / Replace / Remove items from the AccountChanges object
+        for order in changes.orders_created:
+            orders[str(order.id)] = order
+        for order_id in (*changes.orders_cancelled.ids(), *changes.orders_filled.ids()):
+            orders.pop(order_id, None)
+
+        for trade in changes.trades_opened:
+            trades[str(trade.id)] = trade
+        for trade_id in changes.trades_reduced.ids():
+            if trade_id in trades:
+                trades[trade_id] = changes.trades_reduced.get_id(trade_id)
+        for trade_id in changes.trades_closed.ids():
+            trades.pop(trade_id, None)
+
+        changed_positions = set()
+        for position in changes.positions:
+            positions[position.instrument] = position
+            changed_positions.add(position.instrument)
+
+        # Update the dynamic state
+        for order_id in state.orders.ids():
+            order = orders.get(order_id)
+            if order is not None:
+                orders[order_id] = order.replace(**state.orders.get_id(order_id).dict())
+
+        for trade_id in state.trades.ids():
+            trade = trades.get(trade_id)
+            if trade is not None:
+                trades[trade_id] = trade.replace(**state.trades.get_id(trade_id).dict())
+
+        # Positions without dynamic state have no unrealized P/L
+        position_states = {position_state.instrument: position_state for position_state in state.positions}
+        for instrument in changed_positions | self._positions_with_pl | set(position_states):
+            position = positions.get(instrument)
+            if position is None:
+                continue
+            position_state = position_states.get(instrument)
+            if position_state is None:
+                positions[instrument] = position.replace(
+                    unrealized_pl=0,
+                    long=position.long.replace(unrealized_pl=0),
+                    short=position.short.replace(unrealized_pl=0))
+            else:
+                positions[instrument] = position.replace(
+                    unrealized_pl=position_state.net_unrealized_pl,
+                    long=position.long.replace(unrealized_pl=position_state.long_unrealized_pl),
+                    short=position.short.replace(unrealized_pl=position_state.short_unrealized_pl))
+        self._positions_with_pl = set(position_states)
+
+        self._fields.update(
+            (field, getattr(state, field)) for field in state._fields if field not in collections)
+        self._changed()
+
+    def apply_transaction(self, transaction):
+        """Apply a transaction received from :meth:`~async_v20.OandaClient.stream_transactions`
+
+        Pending orders are created, filled and cancelled. Trades are opened, reduced and closed
+        and the units, trade ids and realized P/L of positions updated. Unrealized P/L, margin and
+        average prices aren't calculated. They are updated by :meth:`apply_changes`
+
+        Returns: True if the transaction changed the state
+        """
+        handler = self._transaction_handlers.get(transaction.type)
+        changed = handler is not None and handler(self, transaction) is not False
+        balance = transaction.get('account_balance')
+        if balance is not None:
+            self._fields['balance'] = balance
+            changed = True
+        if changed:
+            self._fields.update(last_transaction_id=transaction.id,
+                                pending_order_count=len(self.orders),
+                                open_trade_count=len(self.trades))
+            self._changed()
+        return changed
+
+    def _create_order(self, transaction):
+        attributes = order_attributes[transaction.type]
+        order = pending_orders[transaction.type](
+            **{field: getattr(transaction, field) for field in transaction._fields
+               if field in attributes and field != 'type'},
+            create_time=transaction.time, state='PENDING')
+        self.orders[str(order.id)] = order
+        attribute = dependent_orders.get(order.type)
+        if attribute is not None:
+            trade = self.trades.get(str(order.trade_id))
+            if trade is not None:
+                self.trades[str(trade.id)] = trade.replace(**{attribute: order.id})
+
+    def _remove_order(self, transaction):
+        order = self.orders.pop(str(transaction.order_id), None)
+        if order is None:
+            return False
+        attribute = dependent_orders.get(order.type)
+        if attribute is not None:
+            trade = self.trades.get(str(order.get('trade_id')))
+            if trade is not None and trade.get(attribute) == order.id:
+                self.trades[str(trade.id)] = trade.replace(**{attribute: None})
+
+    def _modify_order_client_extensions(self, transaction):
+        order = self.orders.get(str(transaction.order_id))
+        if order is None:
+            return False
+        modified = {}
+        if transaction.get('client_extensions_modify') is not None:
+            modified['client_extensions'] = transaction.client_extensions_modify
+        if transaction.get('trade_client_extensions_modify') is not None:
+            modified['trade_client_extensions'] = transaction.trade_client_extensions_modify
+        self.orders[str(order.id)] = order.replace(**modified)
+
+    def _modify_trade_client_extensions(self, transaction):
+        trade = self.trades.get(str(transaction.trade_id))
+        if trade is None:
+            return False
+        self.trades[str(trade.id)] = trade.replace(client_extensions=transaction.trade_client_extensions_modify)
+
+    def _fill_order(self, transaction):
+        self._remove_order(transaction)
+        instrument = transaction.instrument
+        opened = transaction.get('trade_opened')
+        if opened is not None:
+            # TradeOpen.price is a DecimalNumber where TradeSummary expects a PriceValue
+            price = opened.get('price') or transaction.get('price')
+            trade = TradeSummary(id=opened.trade_id, instrument=instrument,
+                                 price=None if price is None else float(price),
+                                 open_time=transaction.time, state='OPEN', initial_units=opened.units,
+                                 initial_margin_required=opened.get('initial_margin_required'),
+                                 current_units=opened.units, realized_pl=0, unrealized_pl=0, financing=0,
+                                 client_extensions=opened.get('client_extensions'))
+            self.trades[str(trade.id)] = trade
+            self._update_position(instrument, opened.units, opened.units, add_trade_id=trade.id)
+        for reduced in transaction.get('trades_closed') or ():
+            trade = self.trades.pop(str(reduced.trade_id), None)
+            if trade is not None:
+                self._reduce_position(instrument, trade, reduced, remove_trade_id=trade.id)
+        reduced = transaction.get('trade_reduced')
+        if reduced is not None:
+            trade = self.trades.get(str(reduced.trade_id))
+            if trade is not None:
+                units = copysign(abs(trade.current_units) - abs(reduced.units), trade.current_units)
+                self.trades[str(trade.id)] = trade.replace(
+                    current_units=units,
+                    realized_pl=_add(trade.get('realized_pl'), reduced.get('realized_pl')),
+                    financing=_add(trade.get('financing'), reduced.get('financing')))
+                self._reduce_position(instrument, trade, reduced)
+        self._fields['pl'] = _add(self._fields.get('pl'), transaction.get('pl'))
+        self._fields['financing'] = _add(self._fields.get('financing'), transaction.get('financing'))
+        self._fields['commission'] = _add(self._fields.get('commission'), transaction.get('commission'))
+
+    def _reduce_position(self, instrument, trade, reduced, remove_trade_id=None):
+        units = -copysign(abs(reduced.units), trade.current_units)
+        self._update_position(instrument, trade.current_units, units, reduced.get('realized_pl'),
+                              reduced.get('financing'), remove_trade_id=remove_trade_id)
+
+    def _update_position(self, instrument, direction, units, pl=None, financing=None,
+                         add_trade_id=None, remove_trade_id=None):
+        """Update the long side of the position when direction is positive, else the short side"""
+        position = self.positions.get(instrument)
+        if position is None:
+            empty = dict(units=0, pl=0, unrealized_pl=0, resettable_pl=0, financing=0)
+            position = Position(instrument=instrument, pl=0, unrealized_pl=0, resettable_pl=0,
+                                commission=0, financing=0, long=PositionSide(**empty),
+                                short=PositionSide(**empty))
+        name = 'long' if direction > 0 else 'short'
+        side = position.get(name) or PositionSide(units=0)
+        trade_ids = tuple(side.get('trade_ids') or ())
+        if add_trade_id is not None:
+            trade_ids += (add_trade_id,)
+        if remove_trade_id is not None:
+            trade_ids = tuple(trade_id for trade_id in trade_ids if trade_id != remove_trade_id)
+        side = side.replace(units=_add(side.get('units'), units), trade_ids=trade_ids,
+                            pl=_add(side.get('pl'), pl), financing=_add(side.get('financing'), financing))
+        self.positions[instrument] = position.replace(
+            **{name: side}, pl=_add(position.get('pl'), pl), financing=_add(position.get('financing'), financing))
+        self._positions_with_pl.add(instrument)
+
+    _transaction_handlers = {
+        **dict.fromkeys(pending_orders, _create_order),
+        'ORDER_CANCEL': _remove_order,
+        'ORDER_FILL': _fill_order,
+        'ORDER_CLIENT_EXTENSIONS_MODIFY': _modify_order_client_extensions,
+        'TRADE_CLIENT_EXTENSIONS_MODIFY': _modify_trade_client_extensions,
+    }
+
+    def __repr__(self):
+        return (f'<AccountState {self._fields.get("id")} orders={len(self.orders)} '
+                f'trades={len(self.trades)} positions={len(self.positions)}>')
@@ -0,0 +1,296 @@
+"""On disk store of complete candles
+
+Candles are stored per (instrument, granularity, price component) in a
+directory containing:
+
+    - Append only segment files. Each segment is a sorted array of
+      candles stored column wise in a numpy structured array.
+      Segments are memory mapped when read.
+    - index.json. The time range of each segment and the time ranges
+      that are known to be stored (covered). Including ranges that contain
+      no candles, such as weekends.
+
+The index is replaced atomically, so readers always see a consistent
+set of segments. Writers are serialized with a lock file.
+"""
+import json
+import logging
+import os
+from threading import Lock
+from time import time_ns
+
+import numpy as np
+import pandas as pd
+
+from .definitions.base import Array
+from .definitions.primitives import DateTime
+from .exceptions import InvalidValue
+from .files import atomic_write
+
+try:
+    import fcntl
+except ImportError:  # Windows. Only one writer process is supported
+    fcntl = None
+
+__all__ = ['CandleStore']
+
+logger = logging.getLogger(__name__)
+
+INDEX = 'index.json'
+LOCK = 'lock'
+
+# Seconds covered by one candle. M (month) is the longest month and is only used
+# to limit the number of candles requested at once
+granularity_seconds = {
+    'S5': 5, 'S10': 10, 'S15': 15, 'S30': 30,
+    'M1': 60, 'M2': 120, 'M4': 240, 'M5': 300, 'M10': 600, 'M15': 900, 'M30': 1800,
+    'H1': 3600, 'H2': 7200, 'H3': 10800, 'H4': 14400, 'H6': 21600, 'H8': 28800, 'H12': 43200,
+    'D': 86400, 'W': 604800, 'M': 2678400
+}
+
+components = (('M', 'mid'), ('B', 'bid'), ('A', 'ask'))
+
+OHLC = 'ohlc'
+
+MAX_CANDLES_PER_REQUEST = 5000
+
+
+def to_nanoseconds(value):
+    """Convert a value accepted by :class:`~async_v20.DateTime` to UNIX nanoseconds"""
+    if isinstance(value, (int, np.integer)) and len(str(value)) > 10:
+        return int(value)
+    return DateTime(value).value
+
+
+def normalise_price(price):
+    """Return the price component(s) in the order M, B, A"""
+    result = ''.join(component for component, _ in components if component in price)
+    if not result or len(result) != len(price):
+        msg = f'{price} is not a valid price component'
+        logger.error(msg)
+        raise InvalidValue(msg)
+    return result
+
+
+def candle_dtype(price):
+    """The numpy dtype used to store candles with the price component(s)"""
+    fields = [('time', '<i8'), ('volume', '<i8')]
+    for component, name in components:
+        if component in price:
+            fields.extend((f'{name}_{value}', '<f8') for value in OHLC)
+    return np.dtype(fields)
+
+
+def split_range(start, end, granularity):
+    """Split the time range in to ranges that contain at most
+    MAX_CANDLES_PER_REQUEST candles"""
+    step = granularity_seconds[granularity] * MAX_CANDLES_PER_REQUEST * 10 ** 9
+    while start < end:
+        yield start, min(start + step, end)
+        start += step
+
+
+def _merge(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _subtract(start, end, ranges):
+    """The parts of [start, end) not in the sorted, merged `ranges`"""
+    missing = []
+    for covered_start, covered_end in ranges:
+        if covered_end <= start:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > start:
+            missing.append((start, covered_start))
+        start = max(start, covered_end)
+    if start < end:
+        missing.append((start, end))
+    return missing
+
+
+def candle_json(candle):
+    try:
+        return candle.dict(json=True, datetime_format='UNIX')
+    except AttributeError:
+        return candle  # Already JSON
+
+
+def _raw_candles(candles):
+    # Use the JSON of the array when it is available to avoid creating Candlestick objects
+    if isinstance(candles, Array):
+        return candles.raw_items()
+    return candles
+
+
+def candles_to_array(candles, price):
+    """Convert candles to a structured array. Incomplete candles are dropped
+
+    Args:
+        candles: :class:`~async_v20.ArrayCandlestick` or iterable of candles
+            as JSON dicts or :class:`~async_v20.Candlestick`
+        price: The price component(s) of the candles
+    """
+    dtype = candle_dtype(price)
+    names = [name for component, name in components if component in price]
+    rows = []
+    for candle in map(candle_json, _raw_candles(candles)):
+        if not candle.get('complete', False):
+            continue
+        row = [to_nanoseconds(candle['time']), int(candle.get('volume', 0))]
+        for name in names:
+            data = candle[name]
+            row.extend(float(data[value]) for value in OHLC)
+        rows.append(tuple(row))
+    array = np.array(rows, dtype=dtype)
+    array.sort(order='time')
+    return array
+
+
+def array_to_candles(array, price):
+    """Convert a structured array to a list of candle JSON dicts"""
+    names = [name for component, name in components if component in price]
+    columns = {name: [array[f'{name}_{value}'].tolist() for value in OHLC] for name in names}
+    times = array['time'].tolist()
+    volumes = array['volume'].tolist()
+    candles = []
+    for index, time in enumerate(times):
+        candle = {'time': time, 'volume': volumes[index], 'complete': True}
+        for name, (o, h, l, c) in columns.items():
+            candle[name] = {'o': repr(o[index]), 'h': repr(h[index]),
+                            'l': repr(l[index]), 'c': repr(c[index])}
+        candles.append(candle)
+    return candles
+
+
+class CandleStore(object):
+    """Store complete candles on disk
+
+    Args:
+        path: Directory the candles are stored in. Created if it doesn't exist
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        # Serializes writes from threads. The lock file serializes processes
+        self._lock = Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def __repr__(self):
+        return f'<CandleStore {self.path}>'
+
+    def _directory(self, instrument, granularity, price):
+        if granularity not in granularity_seconds:
+            msg = f'{granularity} is not a valid granularity'
+            logger.error(msg)
+            raise InvalidValue(msg)
+        return os.path.join(self.path, str(instrument), granularity, normalise_price(price))
+
+    @staticmethod
+    def _load_index(directory):
+        try:
+            with open(os.path.join(directory, INDEX)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'segments': [], 'covered': []}
+
+    def missing(self, instrument, granularity, price, from_time, to_time):
+        """Return the (start, end) UNIX nanosecond ranges between from_time and to_time
+        that aren't stored"""
+        start, end = to_nanoseconds(from_time), to_nanoseconds(to_time)
+        index = self._load_index(self._directory(instrument, granularity, price))
+        return _subtract(start, end, index['covered'])
+
+    def read(self, instrument, granularity, price, from_time, to_time):
+        """Return the stored candles with from_time <= time < to_time
+
+        Returns:
+            numpy structured array sorted by time. When the candles are stored
+            in one segment the array is a view of the memory mapped segment
+        """
+        start, end = to_nanoseconds(from_time), to_nanoseconds(to_time)
+        price = normalise_price(price)
+        directory = self._directory(instrument, granularity, price)
+        dtype = candle_dtype(price)
+        parts = []
+        for segment in self._load_index(directory)['segments']:
+            if segment['end'] <= start or segment['start'] >= end:
+                continue
+            array = np.memmap(os.path.join(directory, segment['file']), dtype=dtype, mode='r',
+                              shape=(segment['rows'],))
+            times = array['time']
+            parts.append(array[times.searchsorted(start):times.searchsorted(end)])
+
+        if not parts:
+            return np.empty(0, dtype=dtype)
+        if len(parts) == 1:
+            return parts[0]
+        array = np.concatenate(parts)
+        _, unique = np.unique(array['time'], return_index=True)
+        return array[unique]
+
+    def dataframe(self, instrument, granularity, price, from_time, to_time):
+        """Return the stored candles as a :class:`pandas.DataFrame` indexed by time"""
+        data_frame = pd.DataFrame(self.read(instrument, granularity, price, from_time, to_time))
+        data_frame.index = pd.to_datetime(data_frame.pop('time'), utc=True)
+        return data_frame
+
+    def write(self, instrument, granularity, price, from_time, to_time, candles):
+        """Store the complete candles received for the range from_time - to_time
+
+        The range is recorded as stored up to the first incomplete candle
+        or the current time, whichever is earlier.
+
+        Args:
+            candles: :class:`~async_v20.ArrayCandlestick` or iterable of candles
+                as JSON dicts or :class:`~async_v20.Candlestick` objects. Containing every
+                candle between from_time and to_time
+        """
+        start, end = to_nanoseconds(from_time), to_nanoseconds(to_time)
+        price = normalise_price(price)
+        directory = self._directory(instrument, granularity, price)
+        candles = list(map(candle_json, _raw_candles(candles)))
+        incomplete = [to_nanoseconds(candle['time']) for candle in candles if not candle.get('complete', False)]
+        end = min([end, time_ns()] + incomplete)
+        if start >= end:
+            return
+        array = candles_to_array(candles, price)
+        array = array[(array['time'] >= start) & (array['time'] < end)]
+
+        os.makedirs(directory, exist_ok=True)
+        with self._lock, _WriteLock(directory):
+            index = self._load_index(directory)
+            if len(array):
+                number = max((int(segment['file'].split('.')[0]) for segment in index['segments']), default=0) + 1
+                file = f'{number:08d}.bin'
+                atomic_write(os.path.join(directory, file), array.tobytes())
+                index['segments'].append({'file': file, 'start': int(array['time'][0]),
+                                          'end': int(array['time'][-1]) + 1, 'rows': len(array)})
+                index['segments'].sort(key=lambda segment: segment['start'])
+            index['covered'] = _merge(index['covered'] + [[start, end]])
+            atomic_write(os.path.join(directory, INDEX), json.dumps(index).encode())
+
+
+class _WriteLock(object):
+    """Exclusive lock of a store directory shared between processes"""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, LOCK)
+
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
@@ -1,26 +1,39 @@
 import asyncio
 import logging
 import os
-import ujson as json
+from collections import Counter
+from contextvars import ContextVar
 from functools import partial
-from time import time
+from time import monotonic
 
 import aiohttp
 from yarl import URL
 
+from .candle_store import CandleStore
+from .account_state import AccountState
+from .instrument_registry import InstrumentRegistry
+from .codecs import get_codec
 from .definitions.types import AcceptDatetimeFormat
 from .definitions.types import AccountID
-from .definitions.types import ArrayTransaction
+from .transaction_history import TransactionHistory
+from .definitions.types import TransactionID
 from .endpoints.annotations import Authorization, SinceTransactionID, LastTransactionID
-from .exceptions import InitializationFailure, ResponseTimeout, CloseAllTradesFailure
+from .exceptions import InitializationFailure, ResponseTimeout, CloseAllTradesFailure, InvalidValue
+from .exceptions import UnexpectedStatus
 from .interface import *
-from .interface.helpers import too_many_passed_transactions
+from .interface.cache import ResponseCache
+from .interface.helpers import too_many_passed_transactions, run_in_executor, ALLOWED_SINCE_TRANSACTION_ID
+from .interface.limiter import TokenBucket
+from .interface.scheduler import RequestScheduler
+from .interface.retry import RetryPolicy
+from .interface.pool import ConnectionPools
+from .snapshot import AccountSnapshot, write_snapshot
 
 logger = logging.getLogger(__name__)
 
 
-async def sleep(s=0.0):
-    await asyncio.sleep(s)
+# True in the task initializing the client
+_initializing = ContextVar("initializing", default=False)
 
 
 __version__ = "8.0.2"
@@ -47,7 +60,10 @@ class OandaClient(
         format_order_requests: True=Format all OrderRequests
             in the context of the orders instrument. False=Do not format OrderRequests,
             raise :class:`~async_v20.exceptions.InvalidOrderRequest` for values outside of allowed range.
-        max_transaction_history: Maximum past transactions to store
+        max_transaction_history: Maximum past transactions to store in :attr:`transactions`
+        transaction_spill: Path of a file transactions evicted from :attr:`transactions` are
+            appended to. None to discard them. Account clients append to the path suffixed
+            with their AccountID
         rest_host: The hostname of the v20 REST server
         rest_port: The port of the v20 REST server
         stream_host: The hostname of the v20 REST server
@@ -62,30 +78,61 @@ class OandaClient(
             the v20 REST server
         stream_timeout: Period to wait for an new json object during streaming
         max_requests_per_second: Maximum HTTP requests sent per second
-        max_simultaneous_connections: Maximum concurrent HTTP requests
+        burst: Maximum number of requests sent at once after the client has been idle
+        stream_connections_per_second: Maximum streams opened per second
+        max_simultaneous_connections: Maximum concurrent HTTP requests. Also the size of the
+            REST connection pool when `connection_pools` is not passed. Changing it limits
+            requests immediately. An open REST connection pool keeps its size until it is closed
+        reserved_connections: Number of the simultaneous connections reserved for
+            trading requests (orders, trades and positions). See :mod:`~async_v20.interface.scheduler`
+        large_response_threshold: Size in bytes above which REST response bodies
+            are decoded in `executor` rather than on the event loop. None disables
+        executor: :class:`concurrent.futures.Executor` used to decode large responses.
+            None uses the event loop's default executor. When a
+            :class:`~concurrent.futures.ProcessPoolExecutor` is supplied only the
+            JSON decoding is performed in the worker process
+        json_codec: The :class:`~async_v20.codecs.Codec` used to encode and decode JSON.
+            Either a codec instance or one of 'json', 'ujson', 'orjson'. Defaults to ujson
+        lazy_responses: True=Only create the objects of a
+            :class:`~async_v20.interface.response.Response` when they are first accessed.
+        raw_body_limit: Maximum size in bytes of a REST response body kept by the
+            :class:`~async_v20.interface.response.Response`. Kept bodies are returned
+            unchanged by :meth:`~async_v20.interface.response.Response.json` and
+            :meth:`~async_v20.interface.response.Response.raw`. 0 (default) keeps no bodies
+        coalesce_requests: True=Concurrent identical GET requests share one HTTP request.
+            Every caller receives the same Response object. The number of requests saved
+            is counted per method in `coalesced_requests`
+        response_cache: True or a :class:`~async_v20.interface.cache.ResponseCache` to cache
+            responses of idempotent endpoints. True creates a cache with the default policies
+        candle_store: A directory or :class:`~async_v20.candle_store.CandleStore` used by
+            :meth:`get_candles_range` to store complete candles on disk
+        retry_policy: True or a :class:`~async_v20.interface.retry.RetryPolicy` to retry
+            requests that timed out or responded with HTTP 429 or 5xx. True creates a policy
+            with the default settings. Retries are counted per endpoint in `retry_policy.retries`
+        connection_pools: :class:`~async_v20.interface.pool.ConnectionPools` to share with
+            other clients. None creates pools used only by this client
+        warm_up_connections: Number of REST connections opened during initialization.
+            See :meth:`warm_up`
+        snapshot: Path of a file the account state is saved to by :meth:`save_snapshot`.
+            When the file exists, initialization loads it and requests only the account changes
+            since it was saved. The account is downloaded in full when the file is missing, is of
+            another account or more than ALLOWED_SINCE_TRANSACTION_ID transactions have passed.
+            The state is saved after a full download and when the client is closed
         debug: Set to True to log debug messages.
 
     """
 
     headers = {"Connection": "keep-alive", "OANDA-Agent": "async_v20_" + __version__}
 
-    default_parameters = {}
-
     initialized = False
 
     initializing = False
 
-    _initialization_step = None  # The first step to be called during initialization
-
-    initialization_sleep = (
-        0.5  # Time to poll initialized when waiting for initialization
-    )
-
-    _account = None
+    _initialization = None  # Task of the current or last initialization
 
-    instruments = None
+    account_state = None  # AccountState of the account. Created during initialization
 
-    transactions = ArrayTransaction()
+    _following = None  # Task running follow_account
 
     session = None  # http session will be created during initialization
 
@@ -99,7 +146,8 @@ class OandaClient(
     def max_requests_per_second(self, value):
         # Limit maximum concurrent connections
         self._max_requests_per_second = {True: value, False: 1}[value > 0]
-        self._min_time_between_requests = 1 / self.max_requests_per_second
+        self.rate_limiters["REST"].max_rate = self._max_requests_per_second
+        self.rate_limiters["HEALTH"].max_rate = self._max_requests_per_second
 
     @property
     def max_simultaneous_connections(self):
@@ -109,6 +157,31 @@ class OandaClient(
     def max_simultaneous_connections(self, value):
         # Limit concurrent connections
         self._max_simultaneous_connections = {True: value, False: 0}[value >= 0]
+        self.scheduler.max_connections = self._max_simultaneous_connections
+        if self._owns_connection_pools and self.connection_pools is not None:
+            self.connection_pools.set_limit("REST", self._max_simultaneous_connections)
+
+    @property
+    def instruments(self):
+        """The :class:`~async_v20.instrument_registry.InstrumentRegistry` of the
+        instruments tradeable by the account"""
+        return self._instruments
+
+    @instruments.setter
+    def instruments(self, value):
+        # Replaces all instruments. None removes them
+        self._instruments.update(value if value is not None else (), remove=True)
+
+    @property
+    def _account(self):
+        # The Account is only created when the state has changed since it was last requested
+        if self.account_state is None:
+            return None
+        return self.account_state.account()
+
+    @_account.setter
+    def _account(self, value):
+        self.account_state = None if value is None else AccountState(value)
 
     @property
     def datetime_format(self):
@@ -120,6 +193,7 @@ class OandaClient(
         account_id=None,
         format_order_requests=False,
         max_transaction_history=100,
+        transaction_spill=None,
         rest_host="api-fxpractice.oanda.com",
         rest_port=443,
         rest_scheme="https",
@@ -134,7 +208,22 @@ class OandaClient(
         rest_timeout=10,
         stream_timeout=60,
         max_requests_per_second=99,
+        burst=1,
+        stream_connections_per_second=2,
         max_simultaneous_connections=10,
+        reserved_connections=1,
+        large_response_threshold=None,
+        executor=None,
+        json_codec=None,
+        lazy_responses=False,
+        raw_body_limit=0,
+        coalesce_requests=False,
+        response_cache=None,
+        candle_store=None,
+        retry_policy=None,
+        connection_pools=None,
+        warm_up_connections=0,
+        snapshot=None,
         debug=False,
     ):
 
@@ -146,8 +235,16 @@ class OandaClient(
 
         self.format_order_requests = format_order_requests
 
+        # id(OrderRequest): (OrderRequest, JSON body) of the batched order requests
+        # that have been formatted and are waiting to be sent
+        self._formatted_orders = {}
+
         self.max_transaction_history = max_transaction_history
 
+        # Ring buffer of the last max_transaction_history transactions
+        self.transaction_spill = transaction_spill
+        self.transactions = TransactionHistory(max_transaction_history, transaction_spill, json_codec)
+
         # V20 REST API URL
         rest_host = partial(
             URL.build, host=rest_host, port=rest_port, scheme=rest_scheme
@@ -166,6 +263,16 @@ class OandaClient(
 
         self._hosts = {"REST": rest_host, "STREAM": stream_host, "HEALTH": health_host}
 
+        # http session of each host. session is the REST session
+        self.sessions = {}
+
+        # Connection pools are only closed by the client when it created them
+        self._owns_connection_pools = connection_pools is None
+        self.connection_pools = connection_pools
+
+        # RequestPlan's are created the first time an endpoint is requested
+        self._request_plans = {}
+
         # The timeout to use when making a polling request with the
         # v20 REST server
         self.rest_timeout = rest_timeout
@@ -173,20 +280,80 @@ class OandaClient(
         # The timeout to use when waiting for the next object when wait for a stream response
         self.stream_timeout = stream_timeout
 
+        # Token buckets limiting the rate requests are sent to each host.
+        # The REST and HEALTH rates are set by max_requests_per_second
+        self.rate_limiters = {
+            "REST": TokenBucket(1, burst),
+            "STREAM": TokenBucket(stream_connections_per_second, burst),
+            "HEALTH": TokenBucket(1, burst),
+        }
+
         self.max_requests_per_second = max_requests_per_second
 
+        # Starts waiting requests in priority order
+        self.scheduler = RequestScheduler(max_simultaneous_connections, reserved_connections)
+
         self.max_simultaneous_connections = max_simultaneous_connections
 
         self._datetime_format = datetime_format
 
+        # Response bodies larger than this many bytes are decoded in the executor
+        self.large_response_threshold = large_response_threshold
+
+        self.executor = executor
+
+        self.json_codec = get_codec(json_codec)
+
+        self.lazy_responses = lazy_responses
+
+        # Response bodies up to this many bytes are kept by the Response object
+        self.raw_body_limit = raw_body_limit
+
+        self.coalesce_requests = coalesce_requests
+
+        # Requests currently waiting for a response. Keyed by coalesce.request_key
+        self._in_flight_requests = {}
+
+        # Number of HTTP requests saved by coalescing. Keyed by method name
+        self.coalesced_requests = Counter()
+
+        if response_cache is True:
+            response_cache = ResponseCache()
+        elif response_cache is False:
+            response_cache = None
+        self.response_cache = response_cache
+
+        if candle_store is not None and not isinstance(candle_store, CandleStore):
+            candle_store = CandleStore(candle_store)
+        self.candle_store = candle_store
+
+        if retry_policy is True:
+            retry_policy = RetryPolicy()
+        elif retry_policy is False:
+            retry_policy = None
+        self.retry_policy = retry_policy
+
+        self.warm_up_connections = warm_up_connections
+
+        # Path of the snapshot of the account state
+        self.snapshot = snapshot
+
+        # The instruments tradeable by the account. Updated each time account_instruments is requested
+        self._instruments = InstrumentRegistry()
+
         # This is the default parameter dictionary. OandaClient Methods that require certain parameters
-        # that are  not explicitly passed will try to find it in this dict
-        self.default_parameters.update(
-            {
-                Authorization: "Bearer {}".format(token),
-                AcceptDatetimeFormat: datetime_format,
-            }
-        )
+        # that are  not explicitly passed will try to find it in this dict.
+        # Each instance has its own, so clients of different accounts don't overwrite each other
+        self.default_parameters = {
+            Authorization: "Bearer {}".format(token),
+            AcceptDatetimeFormat: datetime_format,
+        }
+
+        # AccountClient of each account. See account_client
+        self.accounts = {}
+
+        # Instruments requested by the first of the account clients to initialize
+        self._shared_instruments = None
 
         self.debug = debug
 
@@ -204,6 +371,125 @@ class OandaClient(
             await self.account_changes()
         return self._account
 
+    async def follow_account(self, reconcile_interval=60, reconnect_delay=1):
+        """Keep :attr:`account_state` up to date with the transactions received from
+        :meth:`stream_transactions`. Orders, trades and positions are updated as soon as
+        each transaction is received. Runs until cancelled or the client is closed.
+
+        :meth:`account_changes` is requested after connecting to the stream, when transactions
+        were missed and every `reconcile_interval` seconds to update the unrealized P/L,
+        margin and other calculated values.
+
+        Args:
+            reconcile_interval: Seconds between account_changes requests
+            reconnect_delay: Seconds to wait before reconnecting to the stream
+        """
+        await self.initialize()
+        self._following = asyncio.current_task()
+        while True:
+            try:
+                stream = await self.stream_transactions()
+                try:
+                    # Transactions received while reconciling wait in the stream
+                    await self._reconcile_account()
+                    reconciled = monotonic()
+                    async for response in stream:
+                        if not response:
+                            msg = f"stream_transactions returned status {response.status}"
+                            logger.error(msg)
+                            raise UnexpectedStatus(msg, response.status)
+                        transaction = response.get("transaction")
+                        if transaction is not None:
+                            if not self._apply_transaction(transaction):
+                                # Transactions were missed
+                                await self._reconcile_account()
+                                reconciled = monotonic()
+                                if not self._apply_transaction(transaction):
+                                    logger.warning("Transaction %s is still missing previous transactions "
+                                                   "after reconciling the account. Reconnecting", transaction.id)
+                                    break
+                        elif response["heartbeat"].last_transaction_id > self.default_parameters[LastTransactionID]:
+                            await self._reconcile_account()
+                            reconciled = monotonic()
+                        if monotonic() - reconciled > reconcile_interval:
+                            await self._reconcile_account()
+                            reconciled = monotonic()
+                finally:
+                    await stream.aclose()
+            except (ResponseTimeout, aiohttp.ClientError) as error:
+                logger.warning("Transaction stream disconnected: %r", error)
+            await asyncio.sleep(reconnect_delay)
+
+    def _apply_transaction(self, transaction):
+        """Apply a streamed transaction to the account state.
+        Returns False, without applying it, when previous transactions are missing"""
+        last_transaction_id = self.default_parameters[LastTransactionID]
+        if transaction.id <= last_transaction_id:
+            # Already applied by account_changes
+            return True
+        if transaction.id > last_transaction_id + 1:
+            return False
+        self.account_state.apply_transaction(transaction)
+        self.default_parameters.update(
+            {LastTransactionID: transaction.id, SinceTransactionID: transaction.id}
+        )
+        self.transactions.append(transaction)
+        return True
+
+    async def _reconcile_account(self):
+        response = await self.account_changes()
+        if not response:
+            logger.warning("Could not reconcile the account. Server returned status %s", response.status)
+
+    async def _close_transactions(self):
+        if self.transactions.spill is None:
+            self.transactions.close()
+        else:
+            # Waits for the evicted transactions to be written to the spill file
+            await run_in_executor(self, self.transactions.close)
+
+    def _stop_following(self):
+        if self._following is not None and not self._following.done():
+            self._following.cancel()
+        self._following = None
+
+    def account_client(self, account_id, snapshot=None):
+        """Return the client of another account, created the first time it is requested.
+        Account clients share the HTTP sessions, rate limiters, request scheduler and
+        instruments of this client
+
+        Args:
+            account_id: The account
+            snapshot: Path of the snapshot of the account. See the `snapshot` argument of OandaClient
+
+        Returns: :class:`~async_v20.client.AccountClient`
+        """
+        try:
+            return self.accounts[account_id]
+        except KeyError:
+            client = self.accounts[account_id] = AccountClient(self, account_id, snapshot)
+            return client
+
+    async def account_clients(self, account_ids=None):
+        """Initialize the client of each account concurrently
+
+        Args:
+            account_ids: The accounts. None initializes every account
+                returned by :meth:`list_accounts`
+
+        Returns: list of :class:`~async_v20.client.AccountClient`
+        """
+        if account_ids is None:
+            response = await self.list_accounts()
+            if not response:
+                msg = f"Could not list accounts. Server returned status {response.status}"
+                logger.error(msg)
+                raise InitializationFailure(msg)
+            account_ids = [account.id for account in response.accounts]
+        clients = [self.account_client(account_id) for account_id in account_ids]
+        await asyncio.gather(*[client.initialize() for client in clients])
+        return clients
+
     async def close_all_trades(self):
         """Close all open trades
 
@@ -246,20 +532,9 @@ class OandaClient(
 
         return close_trade_responses
 
-    async def _request_limiter(self):
-        """Wait for a minimum time interval before creating new request"""
-        try:
-            self._next_request_time += self._min_time_between_requests
-        except AttributeError:
-            self._next_request_time = time()
-            return
-
-        if self._next_request_time - time() > 0:
-            wait_time = self._next_request_time - time()
-            if self.debug:
-                logger.debug("Request waiting for %s seconds", wait_time)
-            await sleep(wait_time)
-        return
+    async def _request_limiter(self, host="REST"):
+        """Wait until the rate limiter of `host` allows a new request"""
+        await self.rate_limiters[host].acquire(self.debug)
 
     async def __aenter__(self):
         await self.initialize()
@@ -276,139 +551,349 @@ class OandaClient(
         pass
 
     async def close(self):
-        try:
-            await self.session.close()
-        except AttributeError:
-            # In case the client was never initialized
-            pass
+        self._stop_following()
+        for client in self.accounts.values():
+            await client.close()
+        if self.snapshot is not None and self.initialized:
+            await self._save_snapshot()
+        await self._close_transactions()
+        for session in self.sessions.values():
+            await session.close()
+        if self._owns_connection_pools and self.connection_pools is not None:
+            await self.connection_pools.close()
 
     async def initialize_session(self):
-        # Create http session this client will use to sent all requests
+        # Create the http sessions this client will use to sent all requests.
+        # Each host has its own connection pool
         logger.info("Initializing session")
-        conn = aiohttp.TCPConnector(limit=self.max_simultaneous_connections)
-
-        self.session = aiohttp.ClientSession(
-            json_serialize=json.dumps,
-            headers=self.headers,
-            connector=conn,
-            read_timeout=0  # async_v20 will handle timeouts to allow dynamic changing of timeout.
-            # after client initialization
-        )
+        if self.connection_pools is None:
+            self.connection_pools = ConnectionPools({"REST": self.max_simultaneous_connections})
+
+        self.sessions = {
+            host: aiohttp.ClientSession(
+                json_serialize=self.json_codec.dumps,
+                headers=self.headers,
+                connector=self.connection_pools.connector(host),
+                connector_owner=False,
+                read_timeout=0  # async_v20 will handle timeouts to allow dynamic changing of timeout.
+                # after client initialization
+            )
+            for host in self._hosts
+        }
+        self.session = self.sessions["REST"]
+
+    def save_snapshot(self, path=None):
+        """Save the account, instruments and last transaction ID to disk.
+        A client created with `snapshot=path` loads the state during initialization
+
+        Args:
+            path: The file to save to. Defaults to the `snapshot` argument of the client
+
+        Returns: :class:`~async_v20.snapshot.AccountSnapshot`
+        """
+        path = path or self.snapshot
+        if path is None:
+            msg = "No path to save the snapshot to"
+            logger.error(msg)
+            raise InvalidValue(msg)
+        snapshot = AccountSnapshot.from_client(self)
+        snapshot.save(path, self.json_codec)
+        return snapshot
+
+    async def _save_snapshot(self):
+        # Failing to save the snapshot only slows down the next initialization
+        try:
+            # The JSON is created on the event loop, while the account can't change.
+            # Encoding, compressing and writing it happens in the executor
+            snapshot = AccountSnapshot.from_client(self).json()
+            await run_in_executor(self, write_snapshot, self.snapshot, snapshot, self.json_codec)
+        except (OSError, InvalidValue) as error:
+            logger.warning("Could not save snapshot to %s: %r", self.snapshot, error)
+
+    async def warm_up(self, connections):
+        """Open REST connections so the following requests don't have to
+        wait for new connections and TLS handshakes.
+
+        The requests are counted by the REST rate limiter. Connections stay
+        open for the REST keepalive timeout of the connection pools
+
+        Args:
+            connections: Number of connections to open
+
+        Returns: The number of connections opened
+        """
+        if not self.session:
+            await self.initialize_session()
+        url = self._hosts["REST"]()
+
+        async def connect():
+            async with self.session.head(url) as response:
+                return response.status
+
+        # Requests sent at the same time can't reuse each others connections.
+        # So all are sent once the rate limiter allows them
+        await asyncio.gather(*[self._request_limiter("REST") for _ in range(connections)])
+        responses = await asyncio.gather(*[connect() for _ in range(connections)], return_exceptions=True)
+        opened = 0
+        for response in responses:
+            if isinstance(response, Exception):
+                logger.warning("Failed to open connection: %s", response)
+            else:
+                opened += 1
+        return opened
 
     async def initialize(self, initialization_method=False):
         """Initialize client instance
 
+        Concurrent calls wait for the same initialization. If initialization fails
+        every caller receives the error and the next call starts a new initialization.
+
         Args:
-            initialization_step: -- Used internally to allow requests to bypass
-                                    initialization.
+            initialization_method: -- Unused. Requests sent by the initialization
+                                      bypass it.
 
         Returns: True when complete
         """
-        if self.initialized or self._initialization_step == initialization_method:
-            # Do not initialize or wait for initialization to complete.
-            # If it did, due to circular logic, initialization would never
-            # complete.
-            pass
+        if self.initialized or _initializing.get():
+            # Requests sent during initialization do not wait for it to complete.
+            # If they did, due to circular logic, initialization would never complete.
+            return True
 
-        elif self.initializing:
-            # Wait for current initialization to complete before
-            # continuing with request.
-            while not self.initialized:
-                await sleep(self.initialization_sleep)
+        if self._initialization is None or self._initialization.done():
+            self._initialization = asyncio.ensure_future(self._initialize())
 
-        else:  # If it gets this far. An initialization if required.
+        # Shielded so cancelling one caller doesn't cancel the initialization of the others
+        await asyncio.shield(self._initialization)
 
-            msg = ""  # msg is used to create a useful Error msg if Initialization fails
-            try:
-                logger.info("Initializing client")
-                self.initializing = True  # immediately set initializing to make sure
-                # Upcoming requests wait for this initialization to complete.
-
-                # V1 REST API is deprecated
-                # self._initialization_step = self.list_services.__name__
-                # response = await self.list_services()
-                # if response:
-                #     for service in response.services:
-                #         if service.current_event.status.name != 'Up':
-                #             logger.warning(f'{service.name} {service.current_event.message}')
-                # else:
-                #     logging.warning('Server did not return available services')
-                #     print(response.json())
-
-                # Get the first account listed in in accounts.
+        # Always return True when initialization has complete
+        return True
+
+    async def _initialization_request(self, method):
+        """Send a request of the initialization"""
+        try:
+            return await method()
+        except ResponseTimeout:
+            msg = (
+                f"Initialization step {method.__name__} "
+                f"took longer than {self.rest_timeout} seconds"
+            )
+            logger.exception(msg)
+            raise InitializationFailure(msg)
+
+    async def _initialization_step(self, method, key, description):
+        """Send a request of the initialization. Return response[key]"""
+        response = await self._initialization_request(method)
+        if not response:
+            msg = f"Server did not return {description} during initialization"
+            logger.error(msg)
+            raise InitializationFailure(msg)
+        return response[key]
+
+    @staticmethod
+    async def _run_initialization_steps(*steps):
+        """Run the steps concurrently. Fail as soon as any step fails"""
+        tasks = [asyncio.ensure_future(step) for step in steps]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _initialize_account(self):
+        self._account = await self._initialization_step(
+            self.get_account_details, "account", "Account Details"
+        )
+
+    async def _initialize_instruments(self):
+        self.instruments = await self._initialization_step(
+            self.account_instruments, "instruments", "Account Instruments"
+        )
+
+    async def _initialize_from_snapshot(self):
+        """Load the account state saved at `snapshot` and request the account changes
+        since. Returns True when the account state is up to date"""
+        snapshot = await run_in_executor(self, AccountSnapshot.load, self.snapshot, self.json_codec)
+        if snapshot is None:
+            return False
+        if snapshot.account_id != self.default_parameters[AccountID]:
+            logger.info("Snapshot %s is of account %s", self.snapshot, snapshot.account_id)
+            return False
+
+        self._account = snapshot.account
+        self._restore_instruments(snapshot.instruments)
+        last_transaction_id = TransactionID(snapshot.last_transaction_id)
+        self.default_parameters.update(
+            {LastTransactionID: last_transaction_id, SinceTransactionID: last_transaction_id}
+        )
+        # The changes are applied to the account when the response is parsed
+        response = await self._initialization_request(self.account_changes)
+        if not response:
+            logger.warning("Could not get account changes since snapshot %s. "
+                           "Server returned status %s", self.snapshot, response.status)
+            return False
+        passed = self.default_parameters[LastTransactionID] - last_transaction_id
+        if passed > ALLOWED_SINCE_TRANSACTION_ID:
+            logger.info("%s transactions have passed since snapshot %s", passed, self.snapshot)
+            return False
+        logger.info("Caught up %s transactions since snapshot %s", passed, self.snapshot)
+        return True
+
+    def _restore_instruments(self, instruments):
+        self.instruments = instruments
+
+    async def _initialize_account_state(self):
+        if self.snapshot is not None and await self._initialize_from_snapshot():
+            return
+        # The Account, last transaction id and instruments only
+        # depend on the AccountID. They are requested at the same time.
+        # The last transaction id is updated when the response is parsed
+        await self._run_initialization_steps(self._initialize_account(), self._initialize_instruments())
+        if self.snapshot is not None:
+            await self._save_snapshot()
+
+    async def _initialize(self):
+        logger.info("Initializing client")
+        # Requests sent by this task, and the tasks it creates, bypass initialize()
+        _initializing.set(True)
+        self.initializing = True
+        try:
+            if not self.session:
+                await self.initialize_session()
+
+            if self.account_id:  # Allow manual assignment of AccountID
+                self.default_parameters.update({AccountID: self.account_id})
+
+            else:  # Get the first account listed for the provided token.
                 # If another is desired the account must be configured
                 # manually when instantiating the client
-
-                if self.account_id:  # Allow manual assignment of AccountID
-                    self.default_parameters.update({AccountID: self.account_id})
-                    self.account_id = self.account_id
-
-                else:  # Get the corresponding AccountID for the provided token
-
-                    self._initialization_step = self.list_accounts.__name__
-                    response = await self.list_accounts()
-                    if (
-                        response
-                    ):  # Checks is the response status was the expected status as
-                        # defined by OANDA spec.
-                        self.default_parameters.update(
-                            {AccountID: response["accounts"][0].id}
-                        )
-                    else:
-                        self.initializing = False
-                        msg = f"Server did not return AccountID during initialization"
-                        logger.error(msg)
-                        raise InitializationFailure(msg)
-
-                # Get Account snapshot and last transaction id
-                # last transaction is automatically updated when the
-                # response is parsed
-
-                self._initialization_step = self.get_account_details.__name__
-                response = await self.get_account_details()
-                if response:
-                    self._account = response["account"]
-                else:
-                    self.initializing = False
-                    msg = (
-                        f"Server did not return Account Details during initialization."
-                    )
-                    logger.error(msg)
-                    raise InitializationFailure(msg)
-
-                self._initialization_step = self.account_instruments.__name__
-                response = await self.account_instruments()
-                if response:
-                    self.instruments = response["instruments"]
-                else:
-                    self.initializing = False
-                    msg = f"Server did not return Account Instruments during initialization"
-                    logger.error(msg)
-                    raise InitializationFailure(msg)
-
-                # On initialization the SinceTransactionID needs updated to reflect LastTransactionID
-                self.default_parameters.update(
-                    {SinceTransactionID: self.default_parameters[LastTransactionID]}
+                accounts = await self._initialization_step(
+                    self.list_accounts, "accounts", "AccountID"
                 )
+                self.default_parameters.update({AccountID: accounts[0].id})
 
-                self.initializing = False
-                self.initialized = True
+            steps = [self._initialize_account_state()]
+            if self.warm_up_connections:
+                steps.append(self.warm_up(self.warm_up_connections))
+            await self._run_initialization_steps(*steps)
 
-            except ResponseTimeout:
-                self.initializing = False
-                self.initialized = False
-                msg = (
-                    f"Initialization step {self._initialization_step} "
-                    f"took longer than {self.rest_timeout} seconds"
-                )
-                logger.exception(msg)
-                raise InitializationFailure(msg)
+            # On initialization the SinceTransactionID needs updated to reflect LastTransactionID
+            self.default_parameters.update(
+                {SinceTransactionID: self.default_parameters[LastTransactionID]}
+            )
+            self.initialized = True
+        finally:
+            self.initializing = False
 
-            except InitializationFailure:
-                self.initializing = False
-                self.initialized = False
-                logging.exception(msg)
-                raise InitializationFailure(msg)
 
-        # Always return True when initialization has complete
-        return True
+def _shared_attribute(name):
+    """An attribute of the OandaClient that is shared by its account clients"""
+    return property(lambda self: getattr(self.client, name),
+                    lambda self, value: setattr(self.client, name, value))
+
+
+class AccountClient(OandaClient):
+    """The client of one account of a multi account :class:`~async_v20.OandaClient`
+
+    Created by :meth:`~async_v20.OandaClient.account_client`. Shares the HTTP sessions,
+    connection pools, rate limiters, request scheduler, caches, settings and instruments of
+    the OandaClient. Changing a shared setting on an AccountClient changes it for every account.
+    Has its own AccountID, transaction IDs, account state and transaction history.
+    Api methods called on the AccountClient are sent for its account.
+    The sessions are closed by the OandaClient
+
+    Args:
+        client: The :class:`~async_v20.OandaClient` shared
+        account_id: The account
+        snapshot: Path of the snapshot of the account. See the `snapshot` argument of OandaClient
+    """
+
+    # Connections and the limits of the requests sent over them
+    sessions = _shared_attribute('sessions')
+    session = _shared_attribute('session')
+    connection_pools = _shared_attribute('connection_pools')
+    _owns_connection_pools = _shared_attribute('_owns_connection_pools')
+    _hosts = _shared_attribute('_hosts')
+    rate_limiters = _shared_attribute('rate_limiters')
+    _max_requests_per_second = _shared_attribute('_max_requests_per_second')
+    scheduler = _shared_attribute('scheduler')
+    _max_simultaneous_connections = _shared_attribute('_max_simultaneous_connections')
+    retry_policy = _shared_attribute('retry_policy')
+    rest_timeout = _shared_attribute('rest_timeout')
+    stream_timeout = _shared_attribute('stream_timeout')
+
+    # Response handling
+    _datetime_format = _shared_attribute('_datetime_format')
+    large_response_threshold = _shared_attribute('large_response_threshold')
+    executor = _shared_attribute('executor')
+    json_codec = _shared_attribute('json_codec')
+    lazy_responses = _shared_attribute('lazy_responses')
+    raw_body_limit = _shared_attribute('raw_body_limit')
+    coalesce_requests = _shared_attribute('coalesce_requests')
+    _in_flight_requests = _shared_attribute('_in_flight_requests')
+    coalesced_requests = _shared_attribute('coalesced_requests')
+    response_cache = _shared_attribute('response_cache')
+    candle_store = _shared_attribute('candle_store')
+
+    # Instruments and the formatting of order requests for them
+    _instruments = _shared_attribute('_instruments')
+    format_order_requests = _shared_attribute('format_order_requests')
+
+    max_transaction_history = _shared_attribute('max_transaction_history')
+    transaction_spill = _shared_attribute('transaction_spill')
+    accounts = _shared_attribute('accounts')
+    version = _shared_attribute('version')
+    debug = _shared_attribute('debug')
+
+    def __init__(self, client, account_id, snapshot=None):
+        self.client = client
+        self.account_id = account_id
+        self.snapshot = snapshot
+        self.default_parameters = {
+            key: value
+            for key, value in client.default_parameters.items()
+            if key in (Authorization, AcceptDatetimeFormat)
+        }
+        self._account = None
+        spill = client.transaction_spill and f"{client.transaction_spill}.{account_id}"
+        self.transactions = TransactionHistory(client.max_transaction_history, spill, client.json_codec)
+        self.initialized = False
+        self.initializing = False
+        self._initialization = None
+        self._following = None
+        # Request plans cache headers taken from default_parameters
+        self._request_plans = {}
+        self._formatted_orders = {}
+        self.warm_up_connections = 0
+
+    async def initialize_session(self):
+        if not self.client.session:
+            await self.client.initialize_session()
+
+    def account_client(self, account_id, snapshot=None):
+        return self.client.account_client(account_id, snapshot)
+
+    def _restore_instruments(self, instruments):
+        # The registry is shared by all accounts. The snapshot's instruments are added
+        # without removing those other accounts use
+        self.instruments.update(instruments)
+
+    async def _initialize_instruments(self):
+        # Instruments are shared by all accounts. Only requested when there are none
+        client = self.client
+        if len(self.instruments):
+            return
+        if client._shared_instruments is None or client._shared_instruments.done():
+            client._shared_instruments = asyncio.ensure_future(super()._initialize_instruments())
+        await asyncio.shield(client._shared_instruments)
+
+    async def close(self):
+        """Save the snapshot of the account. Doesn't close the shared sessions"""
+        self._stop_following()
+        if self.snapshot is not None and self.initialized:
+            await self._save_snapshot()
+        await self._close_transactions()
+
+    def __repr__(self):
+        return f"<AccountClient {self.account_id}>"
@@ -0,0 +1,120 @@
+"""JSON codecs used to encode requests and decode responses
+
+A codec is selected when creating the :class:`~async_v20.OandaClient`
+using the `json_codec` argument. Either the name of a built in codec
+('json', 'ujson', 'orjson') or a :class:`Codec` instance may be passed.
+
+Note:
+    async_v20 converts all floats to strings before encoding JSON, as
+    per OANDA's specification. The JSON sent to OANDA is therefore the
+    same regardless of the codec used.
+"""
+import json
+import logging
+
+import ujson
+
+from .exceptions import InvalidValue
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = ['Codec', 'JSONCodec', 'UJSONCodec', 'ORJSONCodec', 'get_codec']
+
+logger = logging.getLogger(__name__)
+
+
+class Codec(object):
+    """Base class of all JSON codecs"""
+
+    name = None
+
+    def loads(self, data):
+        """Decode a JSON document
+
+        Args:
+            data: bytes or str
+        """
+        raise NotImplementedError
+
+    def dumps(self, obj):
+        """Encode obj as a JSON str"""
+        raise NotImplementedError
+
+    def dumpb(self, obj):
+        """Encode obj as JSON bytes"""
+        return self.dumps(obj).encode()
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}>'
+
+
+class JSONCodec(Codec):
+    """Codec that uses the standard library :mod:`json` module"""
+
+    name = 'json'
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'))
+
+
+class UJSONCodec(Codec):
+    """Codec that uses :mod:`ujson`. This is the default codec"""
+
+    name = 'ujson'
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+    def dumps(self, obj):
+        return ujson.dumps(obj)
+
+
+class ORJSONCodec(Codec):
+    """Codec that uses :mod:`orjson`. orjson encodes directly to bytes"""
+
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            msg = 'orjson must be installed to use the orjson codec'
+            logger.error(msg)
+            raise InvalidValue(msg)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, obj):
+        return orjson.dumps(obj).decode()
+
+    def dumpb(self, obj):
+        return orjson.dumps(obj)
+
+
+codecs = {codec.name: codec for codec in (JSONCodec, UJSONCodec, ORJSONCodec)}
+
+default_codec = UJSONCodec()
+
+
+def get_codec(codec=None):
+    """Return the codec instance for the passed name or instance
+
+    Args:
+        codec: None, a codec name or a :class:`Codec` instance.
+            None returns the default (ujson) codec
+    """
+    if codec is None:
+        return default_codec
+    if isinstance(codec, Codec):
+        return codec
+    try:
+        return codecs[codec]()
+    except KeyError:
+        msg = f'{codec} is not a valid codec. Possible values are {", ".join(codecs)}'
+        logger.error(msg)
+        raise InvalidValue(msg)
@@ -1,5 +1,4 @@
 import logging
-import ujson as json
 from functools import wraps, partial
 from inspect import signature
 
@@ -12,6 +11,7 @@ from .helpers import flatten_dict
 from .helpers import json_to_instance_attributes
 from .helpers import sentinel
 from .primitives import Primitive, Specifier, InstrumentName
+from ..codecs import get_codec
 from ..exceptions import IncompatibleValue, UnknownKeywordArgument, InstantiationFailure
 
 logger = logging.getLogger(__name__)
@@ -232,13 +232,15 @@ class Model(object, metaclass=Metaclass):
             json_attributes[field] if json else field: attr for field, attr in fields()
         }
 
-    def json(self, datetime_format="UNIX"):
+    def json(self, datetime_format="UNIX", codec=None):
         """Return the JSON representation of the object
 
         Args:
             datetime_format: either `UNIX` or `RFC3339` controls the representation
-              of :class:`~async_v20.definitions.primitives.DataTime` objects"""
-        return json.dumps(self.dict(json=True, datetime_format=datetime_format))
+              of :class:`~async_v20.definitions.primitives.DataTime` objects
+            codec: The :class:`~async_v20.codecs.Codec` or codec name used to encode
+              the object. Defaults to ujson"""
+        return get_codec(codec).dumps(self.dict(json=True, datetime_format=datetime_format))
 
     def data(self, json=False, datetime_format=None, delimiter=None):
         """Return the a flattened dictionary representation of the object
@@ -414,6 +416,17 @@ class Array(object):
             _instrument_index=instrument_index,
         )
 
+    def raw_items(self):
+        """Return a tuple of the items the array was created with. Each
+        item is its JSON dict or an already created object. Objects are
+        not created, so this is cheaper than iterating over the array"""
+        return self._items
+
+    def ids(self):
+        """Return the ids, as strings, of the objects in the array
+        that have an id. Objects are not created"""
+        return self._id_index.keys()
+
     def get_id(self, id_, default=None):
         """Return the objects in the array where the
         `object.id` attribute matches the passed id
@@ -42,7 +42,9 @@ class InstantiationFailure(AsyncV20Exception):
 
 class UnexpectedStatus(AsyncV20Exception):
     """The server returned an unexpected HTTP status"""
-    pass
+    def __init__(self, msg='', status=None):
+        super().__init__(msg)
+        self.status = status
 
 class FailedToCreatePath(AsyncV20Exception):
     """Unable to construct the path for the requested endpoint"""
@@ -51,4 +53,12 @@ class FailedToCreatePath(AsyncV20Exception):
 class InvalidOrderRequest(AsyncV20Exception):
     """The order request is not with in the instruments specification
     the order is for"""
-    pass
\ No newline at end of file
+    pass
+
+class CandleDownloadFailure(AsyncV20Exception):
+    """Failed to get the candles of a time range"""
+    pass
+
+class TransactionDownloadFailure(AsyncV20Exception):
+    """Failed to download the transactions of a time range"""
+    pass
@@ -0,0 +1,22 @@
+"""Writing the files of the stores and snapshots
+
+Files are replaced atomically, so readers never see a partially written file.
+"""
+import os
+from tempfile import NamedTemporaryFile
+
+__all__ = ['atomic_write']
+
+
+def atomic_write(path, data):
+    """Replace the file at `path` with the bytes `data`
+
+    The data is written to a temporary file in the same directory, synced to
+    disk and then renamed over `path`.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    with NamedTemporaryFile(dir=directory, delete=False) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f.name, path)
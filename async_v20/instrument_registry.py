@@ -0,0 +1,238 @@
+"""Registry of the instruments tradeable by an account
+
+Instruments are looked up by name in a dict. The trading metadata of all
+instruments is also kept column wise in numpy arrays, so prices and units
+of many instruments can be converted and rounded at once.
+"""
+import logging
+
+import numpy as np
+
+from .definitions.base import Model
+from .definitions.types import Instrument, ArrayInstrument
+from .exceptions import InvalidValue
+from .interface.helpers import OrderFormatter
+
+__all__ = ['InstrumentRegistry']
+
+logger = logging.getLogger(__name__)
+
+# Array name: (JSON key, dtype, value when missing)
+columns = {
+    'pip_location': ('pipLocation', np.int64, 0),
+    'display_precision': ('displayPrecision', np.int64, 0),
+    'trade_units_precision': ('tradeUnitsPrecision', np.int64, 0),
+    'margin_rate': ('marginRate', np.float64, np.nan),
+    'minimum_trade_size': ('minimumTradeSize', np.float64, np.nan),
+    'maximum_order_units': ('maximumOrderUnits', np.float64, np.nan),
+    'maximum_position_size': ('maximumPositionSize', np.float64, np.nan),
+    'minimum_trailing_stop_distance': ('minimumTrailingStopDistance', np.float64, np.nan),
+    'maximum_trailing_stop_distance': ('maximumTrailingStopDistance', np.float64, np.nan),
+}
+
+
+def _instrument_json(instrument):
+    if isinstance(instrument, Model):
+        return instrument.dict(json=True)
+    return instrument
+
+
+def _raw_instruments(instruments):
+    """Iterate over the JSON representation of each instrument, without
+    creating Instrument objects for arrays that haven't created them"""
+    if isinstance(instruments, ArrayInstrument):
+        instruments = instruments.raw_items()
+    return map(_instrument_json, instruments)
+
+
+class InstrumentRegistry(object):
+    """The instruments tradeable by an account
+
+    Iterating over the registry yields :class:`~async_v20.Instrument` objects, as
+    iterating over an :class:`~async_v20.ArrayInstrument` does.
+
+    Args:
+        instruments: Iterable of :class:`~async_v20.Instrument` or their JSON representation
+
+    Attributes:
+        names: numpy array of the instrument names. The row of each instrument in the
+            metadata arrays
+        pip_location, display_precision, trade_units_precision, margin_rate,
+        minimum_trade_size, maximum_order_units, maximum_position_size,
+        minimum_trailing_stop_distance, maximum_trailing_stop_distance:
+            numpy array of the attribute of each instrument
+        version: Incremented each time the instruments change
+    """
+
+    def __init__(self, instruments=()):
+        self._json = {}  # name: instrument JSON
+        self._instruments = {}  # name: Instrument. Created when first requested
+        self._formatters = {}  # name: OrderFormatter. Created when the instrument is added or changed
+        self.version = 0
+        self._build_arrays()
+        self.update(instruments)
+
+    def _build_arrays(self):
+        self.names = np.array(list(self._json), dtype=object)
+        self._rows = {name: row for row, name in enumerate(self._json)}
+        for attr, (key, dtype, missing) in columns.items():
+            setattr(self, attr, np.array([data.get(key, missing) for data in self._json.values()], dtype=dtype))
+
+    def update(self, instruments, remove=False):
+        """Update the registry with the instruments returned by
+        :meth:`~async_v20.OandaClient.account_instruments`. Only instruments that
+        have changed are updated
+
+        Args:
+            instruments: Iterable of :class:`~async_v20.Instrument` or their JSON representation
+            remove: True removes instruments that weren't passed
+
+        Returns: list of the names of the instruments added, changed or removed
+        """
+        changed = []
+        added = False
+        passed = set()
+        for data in _raw_instruments(instruments):
+            name = data['name']
+            passed.add(name)
+            current = self._json.get(name)
+            if current == data:
+                continue
+            added = added or current is None
+            changed.append(name)
+            self._json[name] = data
+            self._instruments.pop(name, None)
+
+        # Orders are formatted without building a formatter for the first order of an instrument
+        for name in changed:
+            self._formatters[name] = OrderFormatter(self.get_instrument(name))
+
+        if remove:
+            for name in set(self._json) - passed:
+                changed.append(name)
+                del self._json[name]
+                self._instruments.pop(name, None)
+                self._formatters.pop(name, None)
+                added = True
+
+        if not changed:
+            return changed
+
+        if added:
+            self._build_arrays()
+        else:
+            # Update the changed rows in place
+            for name in changed:
+                row, data = self._rows[name], self._json[name]
+                for attr, (key, dtype, missing) in columns.items():
+                    getattr(self, attr)[row] = data.get(key, missing)
+        self.version += 1
+        logger.info('Updated instruments %s', changed)
+        return changed
+
+    def get_instrument(self, instrument, default=None):
+        """Return the :class:`~async_v20.Instrument` named `instrument` else return default"""
+        try:
+            return self._instruments[instrument]
+        except KeyError:
+            try:
+                data = self._json[instrument]
+            except (KeyError, TypeError):
+                return default
+        result = self._instruments[instrument] = Instrument(**data)
+        return result
+
+    def formatter(self, instrument):
+        """Return the :class:`~async_v20.interface.helpers.OrderFormatter` of `instrument`
+        or None if it isn't in the registry. Formatters are built when instruments are
+        added to the registry or change"""
+        try:
+            return self._formatters[instrument]
+        except (KeyError, TypeError):
+            return None
+
+    def rows(self, instruments):
+        """Return a numpy array of the row of each instrument in the metadata arrays
+
+        Args:
+            instruments: An instrument name or iterable of instrument names
+        """
+        if isinstance(instruments, str):
+            instruments = (instruments,)
+        try:
+            return np.fromiter((self._rows[name] for name in instruments), dtype=np.int64)
+        except KeyError as error:
+            msg = f'{error.args[0]} is not a tradeable instrument'
+            logger.error(msg)
+            raise InvalidValue(msg)
+
+    def pips_to_price(self, instruments, pips):
+        """Convert distances in pips of each instrument to a price distance
+
+        Args:
+            instruments: An instrument name or iterable of instrument names
+            pips: The pips of each instrument
+        """
+        return np.asarray(pips, dtype=np.float64) * 10.0 ** self.pip_location[self.rows(instruments)]
+
+    def price_to_pips(self, instruments, prices):
+        """Convert price distances of each instrument to pips"""
+        return np.asarray(prices, dtype=np.float64) / 10.0 ** self.pip_location[self.rows(instruments)]
+
+    def round_prices(self, instruments, prices):
+        """Round the price of each instrument to its display precision"""
+        scale = 10.0 ** self.display_precision[self.rows(instruments)]
+        return np.rint(np.asarray(prices, dtype=np.float64) * scale) / scale
+
+    def round_units(self, instruments, units, clip=False):
+        """Round the units of each instrument to its trade units precision
+
+        Args:
+            instruments: An instrument name or iterable of instrument names
+            units: The units of each instrument. Negative units are kept negative
+            clip: True clips the absolute units to the instruments minimum trade size
+                and maximum order units
+        """
+        rows = self.rows(instruments)
+        units = np.asarray(units, dtype=np.float64)
+        size = np.abs(units)
+        if clip:
+            # fmax/fmin ignore missing (nan) limits
+            size = np.fmin(np.fmax(size, self.minimum_trade_size[rows]), self.maximum_order_units[rows])
+        scale = 10.0 ** self.trade_units_precision[rows]
+        return np.copysign(np.rint(size * scale) / scale, units)
+
+    def raw_items(self):
+        """Return a tuple of the JSON representation of each instrument, as
+        :meth:`~async_v20.definitions.base.Array.raw_items` does"""
+        return tuple(self._json.values())
+
+    def array(self):
+        """Return an :class:`~async_v20.ArrayInstrument` of all instruments"""
+        return ArrayInstrument(*self._json.values())
+
+    def dataframe(self, json=False, datetime_format=None):
+        """Create a pandas.DataFrame of all instruments"""
+        return self.array().dataframe(json=json, datetime_format=datetime_format)
+
+    def __iter__(self):
+        return (self.get_instrument(name) for name in list(self._json))
+
+    def __len__(self):
+        return len(self._json)
+
+    def __contains__(self, item):
+        return getattr(item, 'name', item) in self._json
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            instrument = self.get_instrument(key)
+            if instrument is None:
+                raise KeyError(key)
+            return instrument
+        if isinstance(key, slice):
+            return ArrayInstrument(*(self._json[name] for name in self.names[key]))
+        return self.get_instrument(self.names[key])
+
+    def __repr__(self):
+        return f'<InstrumentRegistry {len(self)} instruments>'
@@ -0,0 +1,136 @@
+"""Cache the responses of idempotent endpoints"""
+import logging
+from collections import Counter, OrderedDict
+from time import monotonic
+
+import pandas as pd
+
+from ..definitions.primitives import DateTime
+from ..endpoints.account import GETAccountIDInstruments
+from ..endpoints.health import GETServices, GETService, GETServiceLists, GETServiceList
+from ..endpoints.health import GETEvents, GETCurrentEvent, GETEvent, GETStatuses, GETStatus, GETImages
+from ..endpoints.instrument import GETInstrumentsCandles
+from ..exceptions import InvalidValue
+
+__all__ = ['ResponseCache', 'PERMANENT']
+
+logger = logging.getLogger(__name__)
+
+PERMANENT = float('inf')
+
+# Seconds a response is cached for. Endpoints not listed are not cached
+default_ttls = {
+    GETAccountIDInstruments: 3600,
+    GETServices: 3600,
+    GETService: 3600,
+    GETServiceLists: 3600,
+    GETServiceList: 3600,
+    GETImages: 3600,
+    GETStatuses: 3600,
+    GETStatus: 3600,
+    GETEvents: 60,
+    GETCurrentEvent: 60,
+    GETEvent: 60,
+    GETInstrumentsCandles: 0,
+}
+
+
+def _is_complete_candle_range(endpoint, request_kwargs, response):
+    """True when the response contains a fixed range of candles that are all complete"""
+    if endpoint is not GETInstrumentsCandles:
+        return False
+    to_time = request_kwargs.get('params', {}).get('to')
+    if to_time is None or DateTime(to_time) >= pd.Timestamp.now(tz='UTC'):
+        # Without an end in the past the range moves with time
+        return False
+    candles = response.candles
+    return bool(candles) and all(candle.complete for candle in candles)
+
+
+class ResponseCache(object):
+    """Least recently used cache of responses bounded by the size of the response bodies
+
+    Args:
+        max_bytes: The maximum total size of the cached response bodies
+        ttls: dict of {EndPoint: seconds} that updates the default cache times.
+            0 disables caching for the endpoint. :data:`PERMANENT` never expires
+
+    Ranges of candles that end in the past and are all complete are cached permanently
+
+    Attributes:
+        hits: :class:`~collections.Counter` of cache hits per endpoint name
+        misses: :class:`~collections.Counter` of cache misses per endpoint name
+        evictions: Number of responses removed to keep the cache within `max_bytes`
+    """
+
+    def __init__(self, max_bytes=64 * 1024 ** 2, ttls=None):
+        if max_bytes < 0:
+            msg = f'max_bytes must be positive. Not {max_bytes}'
+            logger.error(msg)
+            raise InvalidValue(msg)
+        self.max_bytes = max_bytes
+        self.ttls = dict(default_ttls)
+        self.ttls.update(ttls or {})
+        self.size = 0
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = 0
+        self._entries = OrderedDict()  # key: (response, size, expires)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def caches(self, endpoint):
+        """True if responses from endpoint may be cached"""
+        return endpoint in self.ttls
+
+    def get(self, endpoint, key):
+        """Return the cached response or None"""
+        try:
+            response, size, expires = self._entries[key]
+        except KeyError:
+            self.misses[endpoint.__name__] += 1
+            return None
+        if expires <= monotonic():
+            self._remove(key)
+            self.misses[endpoint.__name__] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits[endpoint.__name__] += 1
+        return response
+
+    def put(self, endpoint, key, request_kwargs, response):
+        """Cache the response if the endpoint's policy allows it"""
+        if not response:
+            return
+        ttl = self.ttls.get(endpoint, 0)
+        if _is_complete_candle_range(endpoint, request_kwargs, response):
+            ttl = PERMANENT
+        size = response.body_size
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (response, size, monotonic() + ttl)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
+
+    def clear(self):
+        """Remove all cached responses. Stats are kept"""
+        self._entries.clear()
+        self.size = 0
+
+    def __repr__(self):
+        return f'<ResponseCache {len(self)} responses {self.size}/{self.max_bytes} bytes ' \
+               f'hits={sum(self.hits.values())} misses={sum(self.misses.values())}>'
@@ -0,0 +1,47 @@
+"""Share one HTTP request between concurrent identical GET requests"""
+import logging
+from asyncio import ensure_future, shield
+
+logger = logging.getLogger(__name__)
+
+
+def can_coalesce(endpoint, incremental=None):
+    """True when requests to `endpoint` are idempotent and return a single response"""
+    return endpoint.method == 'GET' and endpoint.host != 'STREAM' and not incremental
+
+
+def request_key(endpoint, request_kwargs):
+    """Create a hashable key that identifies the HTTP request"""
+    return (endpoint,
+            request_kwargs['url'],
+            tuple(sorted(request_kwargs.get('params', {}).items())),
+            tuple(sorted(request_kwargs.get('headers', {}).items())))
+
+
+async def coalesce(self, key, method_name, send):
+    """Await the in flight request identified by `key`. Or create it by calling `send`
+    when there is none.
+
+    Every caller receives the same Response object.
+
+    Args:
+        self: -- OandaClient instance
+        key: -- The key returned by :func:`request_key`
+        method_name: -- Name of the client method making the request
+        send: -- Coroutine function that sends the request and parses the response
+
+    Returns: The parsed response
+    """
+    try:
+        task = self._in_flight_requests[key]
+    except KeyError:
+        task = ensure_future(send())
+        self._in_flight_requests[key] = task
+        task.add_done_callback(lambda _: self._in_flight_requests.pop(key, None))
+    else:
+        self.coalesced_requests[method_name] += 1
+        if self.debug:
+            logger.debug('%s joined an in flight request', method_name)
+
+    # shield() stops a cancelled caller from cancelling the request of the others
+    return await shield(task)
@@ -1,11 +1,14 @@
 """Module that defines the behaviour of the exposed client method calls by using decorators
 """
 import logging
-from functools import wraps
-from inspect import signature
+from functools import wraps, partial
+from inspect import Parameter, signature
 
-from .helpers import create_request_kwargs, construct_arguments
+from .coalesce import can_coalesce, coalesce, request_key
+from .helpers import create_request_kwargs, create_argument_binder
 from .parser import parse_response
+from .retry import requested_retry
+from .scheduler import default_priority, get_priority, requested_priority
 from ..definitions.helpers import create_doc_signature
 from ..endpoints.annotations import SinceTransactionID
 from ..exceptions import ResponseTimeout
@@ -13,8 +16,22 @@ from asyncio import TimeoutError as AsyncTimeOutError
 logger = logging.getLogger(__name__)
 
 
-def endpoint(endpoint, rest=False, initialize_required=True):
-    """Define a method call to be exposed to the user"""
+def endpoint(endpoint, rest=False, initialize_required=True, incremental=None):
+    """Define a method call to be exposed to the user
+
+    Args:
+        endpoint: The endpoint the method sends requests to
+        rest: True if the response should be used to update the clients account
+        initialize_required: True if the client needs to be initialized before the request is sent
+        incremental: The key of the array in the response to yield objects from as
+            they are received. The method then returns an async iterator
+
+    The decorated method accepts keyword only arguments:
+        priority: overrides the priority class of the endpoint.
+            See :mod:`async_v20.interface.scheduler`
+        retry: True allows a POST/PUT request to be retried by the clients retry_policy.
+            False disables retries. See :mod:`async_v20.interface.retry`
+    """
 
     def wrapper(method):
         """Take the wrapped method and return a coroutine"""
@@ -23,19 +40,52 @@ def endpoint(endpoint, rest=False, initialize_required=True):
 
         method.initialize_required = initialize_required
 
+        method.incremental = incremental
+
         sig = signature(method)
 
         method.__doc__ = create_doc_signature(method, sig)
 
+        bind_arguments = create_argument_binder(sig)
+
+        coalescable = can_coalesce(endpoint, incremental)
+
+        # Streams and incremental responses hold their connection after
+        # returning. They are only rate limited
+        scheduled = endpoint.host != 'STREAM' and not incremental
+
+        method.priority = default_priority(endpoint)
+
+        async def send(self, request_kwargs, enable_rest, priority):
+            if scheduled:
+                await self.scheduler.acquire(priority)
+            try:
+                await self._request_limiter(endpoint.host)
+
+                if self.debug:
+                    logger.debug('client.sessions[%s].request(kwargs=%s)', endpoint.host, request_kwargs)
+                response = self.sessions[endpoint.host].request(**request_kwargs)
+
+                return await parse_response(self, response, endpoint, enable_rest, method.__name__, incremental)
+            finally:
+                if scheduled:
+                    self.scheduler.release()
+
+        async def request(self, request_kwargs, enable_rest, priority, retry):
+            policy = self.retry_policy
+            if policy is None or not scheduled or not policy.retries_endpoint(endpoint, retry):
+                return await send(self, request_kwargs, enable_rest, priority)
+            return await policy.send(endpoint, partial(send, self, request_kwargs, enable_rest, priority))
+
         @wraps(method)
-        async def wrap(self, *args, **kwargs):
+        async def wrap(self, *args, priority=None, retry=None, **kwargs):
             if initialize_required:
                 await self.initialize(method.__name__)
             elif not self.session:
                 await self.initialize_session()
 
             logger.info('%s(args=%s, kwargs=%s)', method.__name__, args, kwargs)
-            arguments = construct_arguments(self, sig, *args, **kwargs)
+            arguments = bind_arguments(self, args, kwargs)
 
             enable_rest = False
             if rest and arguments[SinceTransactionID] == self.default_parameters[SinceTransactionID]:
@@ -43,31 +93,74 @@ def endpoint(endpoint, rest=False, initialize_required=True):
 
             request_kwargs = create_request_kwargs(self, endpoint, arguments)
 
-            await self._request_limiter()
+            if priority is None:
+                priority = requested_priority.get()
+            priority = method.priority if priority is None else get_priority(priority)
+            if retry is None:
+                retry = requested_retry.get()
+
+            if not coalescable:
+                return await request(self, request_kwargs, enable_rest, priority, retry)
+
+            key = request_key(endpoint, request_kwargs)
+
+            cache = self.response_cache
+            if cache is not None and cache.caches(endpoint):
+                response = cache.get(endpoint, key)
+                if response is not None:
+                    return response
 
-            if self.debug:
-                logger.debug('client.session.request(kwargs=%s)', request_kwargs)
-            response = self.session.request(**request_kwargs)
+            if self.coalesce_requests:
+                response = await coalesce(self, key, method.__name__, partial(request, self, request_kwargs, enable_rest, priority, retry))
+            else:
+                response = await request(self, request_kwargs, enable_rest, priority, retry)
 
-            return await parse_response(self, response, endpoint, enable_rest, method.__name__)
+            if cache is not None and cache.caches(endpoint):
+                cache.put(endpoint, key, request_kwargs, response)
 
+            return response
 
-        wrap.__signature__ = sig
+        wrap.__signature__ = _add_request_options(sig)
 
         return wrap
 
     return wrapper
 
 
+def _add_request_options(sig):
+    """Add the keyword only `priority` and `retry` arguments to the signature"""
+    parameters = list(sig.parameters.values())
+    options = [Parameter('priority', Parameter.KEYWORD_ONLY, default=None),
+               Parameter('retry', Parameter.KEYWORD_ONLY, default=None)]
+    if parameters and parameters[-1].kind is Parameter.VAR_KEYWORD:
+        return sig.replace(parameters=parameters[:-1] + options + parameters[-1:])
+    return sig.replace(parameters=parameters + options)
+
+
+async def _await_with_options(awaitable, priority, retry):
+    # Passed on to the endpoint method that created the awaitable
+    priority_token = requested_priority.set(priority)
+    retry_token = requested_retry.set(retry)
+    try:
+        return await awaitable
+    finally:
+        requested_retry.reset(retry_token)
+        requested_priority.reset(priority_token)
+
+
 def shortcut(func):
     sig = signature(func)
 
     @wraps(func)
-    def wrap(self, *args, **kwargs):
-        return func(self, *args, **kwargs)
+    def wrap(self, *args, priority=None, retry=None, **kwargs):
+        if priority is None and retry is None:
+            return func(self, *args, **kwargs)
+        if priority is not None:
+            priority = get_priority(priority)
+        return _await_with_options(func(self, *args, **kwargs), priority, retry)
 
     wrap.shortcut = True
-    wrap.__signature__ = sig
+    wrap.__signature__ = _add_request_options(sig)
     wrap.__doc__ = create_doc_signature(wrap, sig)
 
     return wrap
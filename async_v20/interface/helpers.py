@@ -1,4 +1,6 @@
 import logging
+from asyncio import get_event_loop
+from concurrent.futures import ProcessPoolExecutor
 from functools import partial
 from inspect import _empty
 
@@ -9,7 +11,8 @@ from ..definitions.types import OrderRequest
 from ..definitions.helpers import sentinel
 from ..endpoints.annotations import LastTransactionID
 from ..endpoints.annotations import SinceTransactionID
-from ..exceptions import FailedToCreatePath, InvalidOrderRequest
+from ..endpoints.base import HEADER, QUERY
+from ..exceptions import FailedToCreatePath, InvalidOrderRequest, InstantiationFailure
 
 logger = logging.getLogger(__name__)
 
@@ -139,6 +142,115 @@ def create_url(self, endpoint, arguments):
     return host(path=path)
 
 
+class OrderFormatter(object):
+    """Format order requests as per the specification of one instrument
+
+    The instruments precisions and limits are looked up once when the formatter
+    is created. :meth:`body` formats the JSON representation of an order request,
+    rather than creating a new OrderRequest for each formatted attribute.
+    """
+
+    __slots__ = ('name', 'units_precision', 'minimum_units', 'maximum_units', 'precision',
+                 'minimum_trailing_stop_distance', 'maximum_trailing_stop_distance')
+
+    def __init__(self, instrument):
+        self.name = instrument.name
+        self.units_precision = instrument.trade_units_precision
+        self.minimum_units = instrument.minimum_trade_size
+        self.maximum_units = instrument.maximum_order_units
+        self.precision = instrument.display_precision
+        self.minimum_trailing_stop_distance = instrument.minimum_trailing_stop_distance
+        self.maximum_trailing_stop_distance = instrument.maximum_trailing_stop_distance
+
+    def units(self, units, clip=False):
+        units = float(units)
+        if clip:
+            value = abs(units)
+            if self.minimum_units and value < self.minimum_units:
+                value = self.minimum_units
+            if self.maximum_units and value > self.maximum_units:
+                value = self.maximum_units
+            units = -value if units < 0 else value
+        elif not self.minimum_units <= abs(units) <= self.maximum_units:
+            msg = f'OrderRequest units {units} {self.name} specified range ' \
+                  f'{self.minimum_units} - {self.maximum_units}'
+            logger.error(msg)
+            raise InvalidOrderRequest(msg)
+        return str(round(units, self.units_precision))
+
+    def price(self, price):
+        return str(round(float(price), self.precision))
+
+    def trailing_stop_distance(self, distance, clip=False):
+        distance = float(distance)
+        minimum, maximum = self.minimum_trailing_stop_distance, self.maximum_trailing_stop_distance
+        if clip:
+            if minimum and distance < minimum:
+                distance = minimum
+            if maximum and distance > maximum:
+                distance = maximum
+        elif not minimum <= distance <= maximum:
+            msg = f'Trailing stop loss distance {distance} is not within {self.name} ' \
+                  f'specified range {minimum} - {maximum}'
+            logger.error(msg)
+            raise InvalidOrderRequest(msg)
+        return str(round(distance, self.precision))
+
+    def body(self, order_request, clip=False, datetime_format=None):
+        """Return the JSON representation of the formatted order request
+
+        Args:
+            order_request: The OrderRequest to format
+            clip: True=Clip values to the instruments limits.
+                False=raise InvalidOrderRequest for values outside of the limits
+            datetime_format: The format of DateTime values
+        """
+        body = order_request.dict(json=True, datetime_format=datetime_format)
+        if 'units' in body:
+            body['units'] = self.units(body['units'], clip)
+        for key in ('price', 'priceBound', 'distance'):
+            value = body.get(key)
+            if value and float(value):
+                body[key] = self.price(value)
+        for key in ('takeProfitOnFill', 'stopLossOnFill'):
+            details = body.get(key)
+            if details and details.get('price'):
+                details['price'] = self.price(details['price'])
+        details = body.get('trailingStopLossOnFill')
+        if details and 'distance' in details:
+            details['distance'] = self.trailing_stop_distance(details['distance'], clip)
+        return body
+
+
+def get_order_formatter(self, instrument):
+    """Return the OrderFormatter of `instrument` or None if the account can't trade it"""
+    return self.instruments.formatter(instrument)
+
+
+def format_order_request(self, order_request):
+    """Return the JSON representation of the order request formatted as per
+    the specification of its instrument
+
+    Raises:
+        InvalidOrderRequest: The instrument isn't tradeable by the account or the
+            order request is outside of the instruments specification
+    """
+    try:
+        formatted, body = self._formatted_orders[id(order_request)]
+    except KeyError:
+        pass
+    else:
+        if formatted is order_request:
+            return body
+    formatter = get_order_formatter(self, order_request.instrument)
+    if formatter is None:
+        msg = f'The instrument specified instrument {order_request.instrument} ' \
+              f'for OrderRequest {order_request} is not tradeable by this account'
+        logger.error(msg)
+        raise InvalidOrderRequest(msg)
+    return formatter.body(order_request, self.format_order_requests, self.datetime_format)
+
+
 def create_body(self, request_schema, arguments):
     """Create the JSON body to add to the HTTP request
 
@@ -161,21 +273,12 @@ def create_body(self, request_schema, arguments):
             else:
                 # Only attempt to format OrderRequests that have an `instrument` attribute
                 if isinstance(value, OrderRequest):
-                    instrument = self.instruments.get_instrument(value.instrument)
-                    if instrument is not None:
-                        value = _format_order_request(value,
-                                                      instrument,
-                                                      self.format_order_requests)
-                    else:
-                        msg = f'The instrument specified instrument {value.instrument} ' \
-                              f'for OrderRequest {value} is not tradeable by this account'
-                        logger.error(msg)
-                        raise InvalidOrderRequest(msg)
-
-                try:
-                    value = value.dict(json=True, datetime_format=self.datetime_format)
-                except AttributeError:
-                    pass
+                    value = format_order_request(self, value)
+                else:
+                    try:
+                        value = value.dict(json=True, datetime_format=self.datetime_format)
+                    except AttributeError:
+                        pass
                 yield key, value
 
     return dict(tuple(dumps()))
@@ -197,6 +300,19 @@ def too_many_passed_transactions(self):
     return False
 
 
+def _check_since_transaction_id(self, value, passed):
+    """Limit the default `since_transaction_id` to ALLOWED_SINCE_TRANSACTION_ID
+    transactions ago, and warn when too many transactions have passed"""
+    if too_many_passed_transactions(self):
+        if not passed:
+            logging.warning('Too many transactions have passed to use the default '
+                            '`since_transaction_id` value.')
+            value = self.default_parameters[LastTransactionID] - ALLOWED_SINCE_TRANSACTION_ID
+        logging.warning(f'The passed `since_transaction_id` value {value} '
+                        f'is more than {ALLOWED_SINCE_TRANSACTION_ID} transactions ago.')
+    return value
+
+
 def construct_arguments(self, sig, *args, **kwargs):
     """Construct passed arguments into corresponding objects
 
@@ -216,22 +332,16 @@ def construct_arguments(self, sig, *args, **kwargs):
         for name, value in bound.arguments.items():
             annotation = sig.parameters[name].annotation
 
+            passed = True
             if value == sentinel:
                 try:
                     value = self.default_parameters[annotation]
                 except KeyError:
                     continue
+                passed = False
 
-                if issubclass(annotation, SinceTransactionID) \
-                        and too_many_passed_transactions(self):
-                    logging.warning('Too many transactions have passed to use the default '
-                                    '`since_transaction_id` value.')
-                    value = self.default_parameters[LastTransactionID] - ALLOWED_SINCE_TRANSACTION_ID
-
-            if issubclass(annotation, SinceTransactionID) \
-                    and too_many_passed_transactions(self):
-                logging.warning(f'The passed `since_transaction_id` value {value} '
-                                f'is more than {ALLOWED_SINCE_TRANSACTION_ID} transactions ago.')
+            if issubclass(annotation, SinceTransactionID):
+                value = _check_since_transaction_id(self, value, passed)
 
             if not annotation == _empty:
                 yield annotation, create_attribute(annotation, value)
@@ -239,28 +349,216 @@ def construct_arguments(self, sig, *args, **kwargs):
     return dict(yield_annotations())
 
 
+def create_argument_binder(sig):
+    """Compile a function that performs the same work as :func:`construct_arguments`
+    for the api method with signature `sig`
+
+    The parameters are resolved once. Default values are validated once and
+    the `since_transaction_id` check is only made by methods that take it
+
+    Returns:
+        function bind(self, args, kwargs) returning a dict with annotations as keys
+        and annotation instances as values
+    """
+    parameters = tuple(sig.parameters.values())[1:]  # Skip `self`
+
+    if any(parameter.kind != parameter.POSITIONAL_OR_KEYWORD for parameter in parameters):
+        def bind(self, args, kwargs):
+            return construct_arguments(self, sig, *args, **kwargs)
+
+        return bind
+
+    names = tuple(parameter.name for parameter in parameters)
+    positions = {name: index for index, name in enumerate(names)}
+
+    specs = []
+    for parameter in parameters:
+        annotation = parameter.annotation
+        default = parameter.default
+        if annotation == _empty:
+            continue
+        since = issubclass(annotation, SinceTransactionID)
+        validated = _empty
+        if default is not _empty and default is not sentinel and not since:
+            try:
+                validated = create_attribute(annotation, default)
+            except InstantiationFailure:
+                pass  # Let the error be raised when the method is called
+        specs.append((parameter.name, annotation, default, validated, since))
+    specs = tuple(specs)
+
+    def bind(self, args, kwargs):
+        if len(args) > len(names) or \
+                not all(positions.get(name, -1) >= len(args) for name in kwargs):
+            # Let inspect raise the appropriate TypeError
+            sig.bind(self, *args, **kwargs)
+
+        values = dict(zip(names, args))
+        values.update(kwargs)
+
+        arguments = {}
+        for name, annotation, default, validated, since in specs:
+            try:
+                value = values[name]
+            except KeyError:
+                if validated is not _empty:
+                    arguments[annotation] = validated
+                    continue
+                if default is _empty:
+                    sig.bind(self, *args, **kwargs)  # Raises missing argument TypeError
+                value = default
+
+            passed = True
+            if value is sentinel:
+                try:
+                    value = self.default_parameters[annotation]
+                except KeyError:
+                    continue
+                passed = False
+
+            if since:
+                value = _check_since_transaction_id(self, value, passed)
+
+            arguments[annotation] = create_attribute(annotation, value)
+
+        return arguments
+
+    return bind
+
+
+class RequestPlan(object):
+    """The parts of the HTTP requests to an endpoint that are the same for every call
+
+    Created once per endpoint by :func:`get_request_plan`
+
+    Args:
+        endpoint: The endpoint the plan creates requests for
+        host: The client's host function for the endpoint
+    """
+
+    __slots__ = ('endpoint', 'method', 'request_schema', 'base_url', 'path', 'path_types', 'header_types', 'headers',
+                 'query', '_default_headers', '_static_headers')
+
+    def __init__(self, endpoint, host):
+        self.endpoint = endpoint
+        self.method = endpoint.method
+        self.request_schema = endpoint.request_schema
+        self.base_url = host()
+        self.path = tuple(endpoint.path)
+        self.path_types = tuple(segment for segment in self.path if not isinstance(segment, str))
+        self.headers = tuple((typ, name) for typ, (location, name) in endpoint.parameters.items()
+                             if location == HEADER)
+        self.header_types = tuple(typ for typ, _ in self.headers)
+        self.query = tuple((typ, name) for typ, (location, name) in endpoint.parameters.items()
+                           if location == QUERY)
+        self._default_headers = None
+        self._static_headers = {}
+
+    def _lookup(self, client, parameters, arguments):
+        default_parameters = client.default_parameters
+        result = {}
+        for typ, name in parameters:
+            try:
+                value = arguments[typ]
+            except KeyError:
+                try:
+                    value = default_parameters[typ]
+                except KeyError:
+                    continue
+
+            if isinstance(value, pd.Timestamp):
+                # json method added in primitives module
+                result[name] = value.json(client.datetime_format)
+            else:
+                result[name] = str(value)
+        return result
+
+    def create_headers(self, client, arguments):
+        """Create the header dict. Headers taken from default_parameters
+        are cached until those default values change"""
+        if any(typ in arguments for typ in self.header_types):
+            return self._lookup(client, self.headers, arguments)
+
+        default_parameters = client.default_parameters
+        default_headers = tuple(default_parameters.get(typ) for typ in self.header_types)
+        if default_headers != self._default_headers:
+            self._static_headers = self._lookup(client, self.headers, {})
+            self._default_headers = default_headers
+        return self._static_headers.copy()
+
+    def create_url(self, client, arguments):
+        if not self.path_types:
+            return self.base_url.with_path(''.join(self.path))
+
+        default_parameters = client.default_parameters
+        path = []
+        for segment in self.path:
+            if isinstance(segment, str):
+                path.append(segment)
+                continue
+            # Need to cast to string as specifier may be an int.
+            try:
+                path.append(str(arguments[segment]))
+            except KeyError:
+                try:
+                    path.append(str(default_parameters[segment]))
+                except KeyError:
+                    # Means path can not be constructed
+                    msg = f'Could not construct path for {self.endpoint.__name__}. ' \
+                          f'{segment} is missing in supplied arguments {arguments}'
+                    logger.error(msg)
+                    raise FailedToCreatePath(msg)
+        return self.base_url.with_path(''.join(path))
+
+    def create_query(self, client, arguments):
+        return self._lookup(client, self.query, arguments)
+
+
+def get_request_plan(self, endpoint):
+    """Return the clients :class:`RequestPlan` for `endpoint`"""
+    try:
+        return self._request_plans[endpoint]
+    except KeyError:
+        plan = self._request_plans[endpoint] = RequestPlan(endpoint, self._hosts[endpoint.host])
+        return plan
+
+
 def create_request_kwargs(self, endpoint, arguments):
     """Format arguments to be passed to an aiohttp request"""
 
-    json = create_body(self, endpoint.request_schema, arguments)
+    plan = get_request_plan(self, endpoint)
+
+    json = create_body(self, plan.request_schema, arguments)
+
+    headers = plan.create_headers(self, arguments)
 
-    headers = header_params(self, endpoint, arguments)
+    data = None
+    if json:
+        # Encode the body with the clients codec straight to bytes
+        data = self.json_codec.dumpb(json)
+        headers['Content-Type'] = 'application/json'
 
-    url = create_url(self, endpoint, arguments)
+    url = plan.create_url(self, arguments)
 
     # yarl doesn't accept int subclass'
-    parameters = query_params(self, endpoint, arguments)
-
-    request_kwargs = {}
-    for parameter, value in (
-            ('method', endpoint.method),
-            ('url', url),
-            ('headers', headers),
-            ('params', parameters),
-            ('json', json)):
-        if not value:
-            continue
-        else:
-            request_kwargs.update({parameter: value})
+    parameters = plan.create_query(self, arguments)
+
+    request_kwargs = {'method': plan.method, 'url': url}
+    if headers:
+        request_kwargs['headers'] = headers
+    if parameters:
+        request_kwargs['params'] = parameters
+    if data:
+        request_kwargs['data'] = data
 
     return request_kwargs
+
+
+async def run_in_executor(self, function, *args):
+    """Run blocking file I/O in the client's executor. async_v20 objects can
+    not be pickled, so a ProcessPoolExecutor is replaced by the event loop's
+    default executor"""
+    executor = self.executor
+    if isinstance(executor, ProcessPoolExecutor):
+        executor = None
+    return await get_event_loop().run_in_executor(executor, partial(function, *args))
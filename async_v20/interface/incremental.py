@@ -0,0 +1,143 @@
+"""Module that decodes the elements of a JSON array as the response body arrives"""
+import codecs
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Characters that may follow a number or literal
+DELIMITERS = ' \t\n\r,]}'
+
+# Positions in the top level JSON object
+KEY, COLON, VALUE, ARRAY, COMMA, END = range(6)
+
+
+class ArrayDecoder(object):
+    """Incrementally decode a JSON object of the form {..., key: [element, ...], ...}
+
+    Chunks of the response body are passed to :meth:`feed`, which returns the
+    elements of the `key` array that have been completely received. All other
+    top level fields are decoded into :attr:`fields`.
+
+    Args:
+        key: The top level key of the array to decode incrementally
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.fields = {}
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._scanner = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._state = None  # None until the opening brace has been found
+        self._current_key = None
+
+    @property
+    def finished(self):
+        return self._state == END
+
+    def _skip_whitespace(self):
+        self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+        return self._pos < len(self._buffer)
+
+    def _decode_value(self, eof):
+        """Decode the next value in the buffer. Returns None if the value has not
+        been completely received. The scanner stops a number at the end of the
+        buffer or at a '.' or 'e' whose digits are in the next chunk, so a number or
+        literal is only accepted once the character following it is a delimiter"""
+        try:
+            value, end = self._scanner.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            return None
+        if self._buffer[self._pos] not in '"{[':
+            if end == len(self._buffer):
+                if not eof:
+                    return None
+            elif self._buffer[end] not in DELIMITERS:
+                if not eof:
+                    return None
+                msg = f'Invalid value at position {self._pos}: {self._buffer[self._pos:end + 1]!r}'
+                logger.error(msg)
+                raise ValueError(msg)
+        self._pos = end
+        return (value,)
+
+    def _expect(self, character):
+        if self._buffer[self._pos] != character:
+            msg = f'Expected {character!r} at position {self._pos} found {self._buffer[self._pos]!r}'
+            logger.error(msg)
+            raise ValueError(msg)
+        self._pos += 1
+
+    def _elements(self, eof):
+        while self._skip_whitespace():
+            character = self._buffer[self._pos]
+            if self._state is None:
+                self._expect('{')
+                self._state = KEY
+            elif self._state == KEY:
+                if character == '}':
+                    self._pos += 1
+                    self._state = END
+                    return
+                decoded = self._decode_value(eof)
+                if decoded is None:
+                    return
+                self._current_key, = decoded
+                self._state = COLON
+            elif self._state == COLON:
+                self._expect(':')
+                self._state = VALUE
+            elif self._state == VALUE:
+                if self._current_key == self.key and character == '[':
+                    self._pos += 1
+                    self._state = ARRAY
+                    continue
+                decoded = self._decode_value(eof)
+                if decoded is None:
+                    return
+                self.fields[self._current_key], = decoded
+                self._state = COMMA
+            elif self._state == ARRAY:
+                if character == ']':
+                    self._pos += 1
+                    self._state = COMMA
+                    continue
+                if character == ',':
+                    self._pos += 1
+                    continue
+                decoded = self._decode_value(eof)
+                if decoded is None:
+                    return
+                yield decoded[0]
+            elif self._state == COMMA:
+                if character == '}':
+                    self._pos += 1
+                    self._state = END
+                    return
+                self._expect(',')
+                self._state = KEY
+            else:
+                return
+
+    def feed(self, chunk, eof=False):
+        """Add a chunk of the response body and return the completed array elements
+
+        Args:
+            chunk: bytes received from the server
+            eof: True when this is the last chunk of the body
+        """
+        self._buffer = self._buffer[self._pos:] + self._decoder.decode(chunk, final=eof)
+        self._pos = 0
+        elements = list(self._elements(eof))
+        if eof and not self.finished:
+            msg = f'Response body ended before the JSON object was complete'
+            logger.error(msg)
+            raise ValueError(msg)
+        return elements
@@ -1,9 +1,15 @@
+import logging
+from asyncio import Semaphore, gather
+
 from .decorators import endpoint
+from .helpers import run_in_executor
+from ..candle_store import array_to_candles, normalise_price, split_range, to_nanoseconds, candle_json
 from ..definitions.primitives import InstrumentName
 from ..definitions.types import CandlestickGranularity
 from ..definitions.types import PriceComponent
 from ..definitions.types import WeeklyAlignment
 from ..definitions.types import DateTime
+from ..definitions.types import ArrayCandlestick
 from ..endpoints.annotations import AlignmentTimezone
 from ..endpoints.annotations import Count
 from ..endpoints.annotations import DailyAlignment
@@ -13,9 +19,17 @@ from ..endpoints.annotations import Smooth
 from ..endpoints.annotations import ToTime
 from ..endpoints.instrument import *
 from ..definitions.helpers import sentinel
+from ..exceptions import CandleDownloadFailure
 
 __all__ = ['InstrumentInterface']
 
+logger = logging.getLogger(__name__)
+
+
+def _read_candles(store, instrument, granularity, price, start, end):
+    """The JSON representation of the stored candles from start to end"""
+    return array_to_candles(store.read(instrument, granularity, price, start, end), price)
+
 
 class InstrumentInterface(object):
     @endpoint(GETInstrumentsCandles)
@@ -82,6 +96,64 @@ class InstrumentInterface(object):
         """
         pass
 
+    @endpoint(GETInstrumentsCandles, incremental='candles')
+    def iter_candles(self,
+                     instrument: InstrumentName,
+                     price: PriceComponent = 'M',
+                     granularity: CandlestickGranularity = 'S5',
+                     count: Count = sentinel,
+                     from_time: FromTime = sentinel,
+                     to_time: ToTime = sentinel,
+                     smooth: Smooth = False,
+                     include_first_query: IncludeFirstQuery = sentinel,
+                     daily_alignment: DailyAlignment = 17,
+                     alignment_timezone: AlignmentTimezone = 'America/New_York',
+                     weekly_alignment: WeeklyAlignment = 'Friday',
+                     ):
+        """
+        Fetch candlestick data for an instrument. Candlesticks are decoded and
+        yielded as the response is received, rather than after the entire
+        response has been downloaded.
+
+        Args:
+
+            include_first_query: :class:`~async_v20.endpoints.annotations.IncludeFirstQuery`
+            instrument: :class:`~async_v20.InstrumentName`
+                Name of the Instrument
+            price: :class:`~async_v20.endpoints.annotations.PriceComponent`
+                The Price component(s) to get candlestick data for.
+            granularity: :class:`~async_v20.endpoints.annotations.CandlestickGranularity`
+                The granularity of the candlesticks to fetch
+            count: :class:`~async_v20.endpoints.annotations.Count`
+                The number of candlesticks to return in the reponse.
+            from_time: :class:`~async_v20.endpoints.annotations.FromTime`
+                The start of the time range to fetch candlesticks for.
+            to_time: :class:`~async_v20.endpoints.annotations.ToTime`
+                The end of the time range to fetch candlesticks for.
+            smooth: :class:`~async_v20.endpoints.annotations.Smooth`
+                A flag that controls whether the candlestick is "smoothed" or
+                not.
+            daily_alignment: :class:`~async_v20.endpoints.annotations.DailyAlignment`
+                The hour of the day (in the specified timezone) to use for
+                granularities that have daily alignments.
+            alignment_timezone: :class:`~async_v20.endpoints.annotations.AlignmentTimezone`
+                The timezone to use for the dailyAlignment parameter.
+            weekly_alignment: :class:`~async_v20.WeeklyAlignment`
+                The day of the week used for granularities that have weekly
+                alignment.
+
+        Returns:
+
+            status [200]
+                async iterator of :class:`~async_v20.Candlestick`
+
+                **OR**
+
+                :class:`~async_v20.interface.response.Response` that evaluates False
+                when the server returns an error status
+        """
+        pass
+
     @endpoint(GETInstrumentOrderBook)
     def get_order_book(self,
                        instrument: InstrumentName,
@@ -126,4 +198,75 @@ class InstrumentInterface(object):
         """
         pass
 
+    async def get_candles_range(self, instrument, from_time, to_time, price='M', granularity='S5',
+                                max_concurrency=4):
+        """Get the candles with from_time <= time < to_time
+
+        The range is requested in parts of at most 5000 candles. When the client has a
+        :class:`~async_v20.candle_store.CandleStore` the stored candles are read from disk,
+        only the parts of the range that are not stored are requested and the complete
+        candles received are stored.
+
+        Args:
+
+            instrument: :class:`~async_v20.InstrumentName`
+                Name of the Instrument
+            from_time: :class:`~async_v20.DateTime`
+                The start of the time range
+            to_time: :class:`~async_v20.DateTime`
+                The end of the time range
+            price: :class:`~async_v20.PriceComponent`
+                The Price component(s) to get candlestick data for
+            granularity: :class:`~async_v20.CandlestickGranularity`
+                The granularity of the candlesticks to get
+            max_concurrency: :class:`int`
+                The maximum number of concurrent requests
+
+        Returns:
+
+            :class:`~async_v20.ArrayCandlestick`
+        """
+        logger.info('get_candles_range(instrument=%s, from_time=%s, to_time=%s, price=%s, granularity=%s)',
+                    instrument, from_time, to_time, price, granularity)
+        price = normalise_price(price)
+        start, end = to_nanoseconds(from_time), to_nanoseconds(to_time)
+        store = self.candle_store
+        if store is not None:
+            missing = await run_in_executor(self, store.missing, instrument, granularity, price, start, end)
+        else:
+            missing = [(start, end)]
+
+        semaphore = Semaphore(max_concurrency)
+
+        async def request(window):
+            async with semaphore:
+                response = await self.get_candles(instrument, price=price, granularity=granularity,
+                                                  from_time=window[0], to_time=window[1])
+            if not response:
+                msg = f'Failed to get {instrument} {granularity} candles for {window}. ' \
+                      f'Server returned status {response.status}'
+                logger.error(msg)
+                raise CandleDownloadFailure(msg)
+            if store is not None:
+                # Writing fsyncs and waits for the store's lock
+                await run_in_executor(self, store.write, instrument, granularity, price, window[0], window[1],
+                                      response.candles)
+            return response.candles
+
+        windows = [window for gap in missing for window in split_range(*gap, granularity)]
+        received = await gather(*map(request, windows))
+
+        candles = {}
+        if store is not None:
+            # Reading touches the memory mapped segments, so the candles are created in the executor
+            candles.update((candle['time'], candle)
+                           for candle in await run_in_executor(self, _read_candles, store, instrument,
+                                                               granularity, price, start, end))
+        for array in received:
+            for candle in array.raw_items():
+                candle = candle_json(candle)
+                time = to_nanoseconds(candle['time'])
+                if start <= time < end and time not in candles:
+                    candles[time] = candle
 
+        return ArrayCandlestick(*(candles[time] for time in sorted(candles)))
@@ -0,0 +1,142 @@
+"""Limit the rate requests are sent to OANDA"""
+import logging
+from asyncio import sleep
+from time import monotonic
+
+from ..exceptions import InvalidValue
+
+__all__ = ['TokenBucket']
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket(object):
+    """Token bucket rate limiter
+
+    Tokens are added at `rate` per second up to `burst` tokens. Each request takes
+    a token. Requests that find the bucket empty reserve a future token and wait
+    for it, so waiting requests are released in the order they arrived.
+
+    When the server responds with HTTP 429 (too many requests) :meth:`throttle`
+    halves the rate. The rate then recovers by `recovery_step` of `max_rate`
+    every `recovery_interval` seconds without another 429.
+
+    Args:
+        max_rate: Maximum requests per second
+        burst: Maximum number of requests sent at once after being idle
+        min_rate: The rate is never throttled below this many requests per second
+        recovery_interval: Seconds between each increase of a throttled rate
+        recovery_step: Fraction of `max_rate` added each `recovery_interval`
+
+    Attributes:
+        queue_depth: Number of requests currently waiting for a token
+        max_queue_depth: The largest queue_depth observed
+        requests: Number of tokens taken
+        waited: Number of requests that had to wait for a token
+        total_wait: Total seconds spent waiting for tokens
+        max_wait: Longest wait for a token in seconds
+        throttled: Number of 429 responses received
+    """
+
+    def __init__(self, max_rate, burst=1, min_rate=0.1, recovery_interval=10, recovery_step=0.1):
+        if burst < 1:
+            msg = f'burst must be at least 1. Not {burst}'
+            logger.error(msg)
+            raise InvalidValue(msg)
+        self.burst = burst
+        self.min_rate = min_rate
+        self.recovery_interval = recovery_interval
+        self.recovery_step = recovery_step
+        self.max_rate = max_rate
+        self._tokens = burst
+        self._updated = monotonic()
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.requests = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+    @property
+    def max_rate(self):
+        return self._max_rate
+
+    @max_rate.setter
+    def max_rate(self, value):
+        if value <= 0:
+            msg = f'max_rate must be greater than 0. Not {value}'
+            logger.error(msg)
+            raise InvalidValue(msg)
+        self._max_rate = value
+        self.rate = value
+        self._recovered = monotonic()
+
+    def _refill(self, now):
+        if self.rate < self._max_rate:
+            steps = int((now - self._recovered) // self.recovery_interval)
+            if steps:
+                self.rate = min(self._max_rate, self.rate + steps * self.recovery_step * self._max_rate)
+                self._recovered += steps * self.recovery_interval
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        """Take a token. Return the seconds to wait before it may be used"""
+        self._refill(monotonic())
+        self._tokens -= 1
+        self.requests += 1
+        if self._tokens >= 0:
+            return 0
+        return -self._tokens / self.rate
+
+    async def acquire(self, debug=False):
+        """Wait until a request may be sent
+
+        Returns: The seconds waited
+        """
+        wait_time = self.reserve()
+        if wait_time <= 0:
+            return 0
+        if debug:
+            logger.debug('Request waiting for %s seconds', wait_time)
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            await sleep(wait_time)
+        finally:
+            self.queue_depth -= 1
+        self.waited += 1
+        self.total_wait += wait_time
+        self.max_wait = max(self.max_wait, wait_time)
+        return wait_time
+
+    def throttle(self, retry_after=None):
+        """Reduce the rate after the server responded with HTTP 429
+
+        Args:
+            retry_after: Seconds the server asked to wait before sending another request
+        """
+        now = monotonic()
+        self._refill(now)
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._recovered = now
+        self._tokens = min(self._tokens, 0)
+        if retry_after:
+            self._tokens = min(self._tokens, -retry_after * self.rate)
+        logger.warning('Server responded with too many requests. Rate reduced to %s requests per second',
+                       self.rate)
+
+    @property
+    def metrics(self):
+        """dict of the current rate and wait statistics"""
+        return {'rate': self.rate, 'max_rate': self._max_rate, 'burst': self.burst,
+                'queue_depth': self.queue_depth, 'max_queue_depth': self.max_queue_depth,
+                'requests': self.requests, 'waited': self.waited, 'total_wait': self.total_wait,
+                'max_wait': self.max_wait, 'throttled': self.throttled,
+                'mean_wait': self.total_wait / self.waited if self.waited else 0.0}
+
+    def __repr__(self):
+        return f'<TokenBucket {self.rate}/{self._max_rate} per second burst={self.burst} ' \
+               f'queue_depth={self.queue_depth}>'
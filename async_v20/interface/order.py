@@ -1,4 +1,13 @@
+import logging
+from asyncio import Semaphore, gather
+from functools import partial
+
+from aiohttp import ClientError
+
 from .decorators import endpoint, shortcut
+from .pagination import paginate, min_id
+from .helpers import format_order_request
+from ..definitions.base import create_attribute
 from ..definitions.types import ClientExtensions
 from ..definitions.types import ClientID
 from ..definitions.types import DateTime
@@ -29,9 +38,53 @@ from ..endpoints.annotations import Ids
 from ..endpoints.annotations import TradeClientExtensions
 from ..endpoints.order import *
 from ..definitions.helpers import sentinel
+from ..exceptions import AsyncV20Exception
 
 __all__ = ['OrderInterface']
 
+logger = logging.getLogger(__name__)
+
+
+def _prepare_order_request(self, order_request):
+    """Return the validated order request or the error that prevents it being sent.
+    The formatted body is kept until the batch is sent, so it is only formatted once"""
+    try:
+        order_request = create_attribute(OrderRequest, order_request)
+        body = format_order_request(self, order_request)
+    except AsyncV20Exception as error:
+        return error
+    self._formatted_orders[id(order_request)] = (order_request, body)
+    return order_request
+
+
+def _forget_order_requests(self, order_requests):
+    for order_request in order_requests:
+        if not isinstance(order_request, Exception):
+            self._formatted_orders.pop(id(order_request), None)
+
+
+async def _send_batch(requests, max_concurrency):
+    """Await each request with at most `max_concurrency` at once.
+
+    Args:
+        requests: list of callables returning the awaitable to send, or
+            the exception to return in its place
+
+    Returns: list of the Response or exception of each request in order
+    """
+    semaphore = Semaphore(max_concurrency)
+
+    async def send(request):
+        if isinstance(request, Exception):
+            return request
+        try:
+            async with semaphore:
+                return await request()
+        except (AsyncV20Exception, ClientError) as error:
+            return error
+
+    return await gather(*map(send, requests))
+
 
 class OrderInterface(object):
     @endpoint(POSTOrders)
@@ -180,6 +233,45 @@ class OrderInterface(object):
         """
         pass
 
+    def iter_orders(self, state=sentinel, instrument=sentinel, count=500, before_id=sentinel, prefetch=1):
+        """
+        Iterate over the Orders of an Account, most recent first. Pages of
+        `count` Orders are requested with :meth:`list_orders`. The next page is
+        requested before the Orders of the current page are consumed
+
+        Args:
+
+            state: :class:`~async_v20.OrderStateFilter`
+                The state to filter the requested Orders by
+            instrument: :class:`~async_v20.InstrumentName`
+                The instrument to filter the requested orders by
+            count: :class:`int`
+                The number of Orders requested in each page. At most 500
+            before_id: :class:`~async_v20.OrderID`
+                The maximum Order ID to return. If not provided the most recent
+                Orders in the Account are returned
+            prefetch: :class:`int`
+                The number of pages received ahead of the consumer
+
+        Returns:
+
+            async iterator of :class:`~async_v20.Order`
+
+            Raises :class:`~async_v20.exceptions.UnexpectedStatus` when a page
+            can't be received
+        """
+
+        def request_page(response):
+            if response is None:
+                return self.list_orders(state=state, instrument=instrument, count=count, before_id=before_id)
+            orders = response.orders
+            if len(orders) < count or min_id(orders) <= 1:
+                return None
+            return self.list_orders(state=state, instrument=instrument, count=count,
+                                    before_id=min_id(orders) - 1)
+
+        return paginate(request_page, 'orders', prefetch)
+
     @endpoint(GETPendingOrders)
     def list_pending_orders(self):
         """
@@ -1471,3 +1563,99 @@ class OrderInterface(object):
                 trigger_condition=trigger_condition,
                 client_extensions=client_extensions
             ))
+
+    async def post_orders(self, order_requests, max_concurrency=4, priority=None, retry=None):
+        """Post many OrderRequests
+
+        Every order request is formatted and validated against the accounts instruments
+        before any are sent. Order requests that fail validation are not sent.
+
+        Args:
+
+            order_requests: Iterable of :class:`~async_v20.OrderRequest`
+                or a class derived from OrderRequest
+            max_concurrency: :class:`int`
+                The maximum number of orders sent at once
+            priority: The priority class of the requests.
+                See :mod:`~async_v20.interface.scheduler`
+            retry: True allows the requests to be retried by the clients retry_policy.
+                See :mod:`~async_v20.interface.retry`
+
+        Returns:
+
+            list of the :class:`~async_v20.interface.response.Response` of each order request
+            in the order they were passed. Order requests that failed validation or could not be
+            sent have the raised :class:`~async_v20.exceptions.AsyncV20Exception` or
+            :class:`aiohttp.ClientError` in their place
+        """
+        await self.initialize()
+        order_requests = [_prepare_order_request(self, order_request) for order_request in order_requests]
+        logger.info('post_orders(%s orders, max_concurrency=%s)', len(order_requests), max_concurrency)
+        try:
+            return await _send_batch(
+                [order_request if isinstance(order_request, Exception) else
+                 partial(self.post_order, order_request, priority=priority, retry=retry)
+                 for order_request in order_requests],
+                max_concurrency)
+        finally:
+            _forget_order_requests(self, order_requests)
+
+    async def replace_orders(self, replacements, max_concurrency=4, priority=None, retry=None):
+        """Replace many Orders
+
+        Every order request is formatted and validated against the accounts instruments
+        before any are sent. Replacements that fail validation are not sent.
+
+        Args:
+
+            replacements: Iterable of (:class:`~async_v20.OrderSpecifier`,
+                :class:`~async_v20.OrderRequest`) pairs
+            max_concurrency: :class:`int`
+                The maximum number of orders replaced at once
+            priority: The priority class of the requests.
+                See :mod:`~async_v20.interface.scheduler`
+            retry: True allows the requests to be retried by the clients retry_policy.
+                See :mod:`~async_v20.interface.retry`
+
+        Returns:
+
+            list of the :class:`~async_v20.interface.response.Response` or exception of each
+            replacement in the order they were passed. See :meth:`post_orders`
+        """
+        await self.initialize()
+        replacements = [(order_specifier, _prepare_order_request(self, order_request))
+                        for order_specifier, order_request in replacements]
+        logger.info('replace_orders(%s orders, max_concurrency=%s)', len(replacements), max_concurrency)
+        try:
+            return await _send_batch(
+                [order_request if isinstance(order_request, Exception) else
+                 partial(self.replace_order, order_specifier, order_request, priority=priority, retry=retry)
+                 for order_specifier, order_request in replacements],
+                max_concurrency)
+        finally:
+            _forget_order_requests(self, [order_request for _, order_request in replacements])
+
+    async def cancel_orders(self, order_specifiers, max_concurrency=4, priority=None, retry=None):
+        """Cancel many pending Orders
+
+        Args:
+
+            order_specifiers: Iterable of :class:`~async_v20.OrderSpecifier`
+            max_concurrency: :class:`int`
+                The maximum number of orders cancelled at once
+            priority: The priority class of the requests.
+                See :mod:`~async_v20.interface.scheduler`
+            retry: True allows the requests to be retried by the clients retry_policy.
+                See :mod:`~async_v20.interface.retry`
+
+        Returns:
+
+            list of the :class:`~async_v20.interface.response.Response` or exception of each
+            order specifier in the order they were passed. See :meth:`post_orders`
+        """
+        order_specifiers = list(order_specifiers)
+        logger.info('cancel_orders(%s orders, max_concurrency=%s)', len(order_specifiers), max_concurrency)
+        return await _send_batch(
+            [partial(self.cancel_order, order_specifier, priority=priority, retry=retry)
+             for order_specifier in order_specifiers],
+            max_concurrency)
@@ -0,0 +1,66 @@
+"""Async iteration over the elements of endpoints that return results a page at a time
+
+Pages are requested by a producer task that runs ahead of the consumer. At most
+`prefetch` received pages wait for the consumer, so memory stays bounded however
+many pages there are. Elements are created as they are yielded.
+"""
+import logging
+from asyncio import Queue, ensure_future
+
+from ..exceptions import UnexpectedStatus
+
+__all__ = ['paginate', 'min_id']
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+def min_id(array):
+    """The smallest id of the objects in `array` without creating the objects"""
+    return min(map(int, array.ids()))
+
+
+async def paginate(request_page, key, prefetch=1):
+    """Yield the elements of the `key` array of each page
+
+    Args:
+        request_page: Called with the Response of the previous page, None for the
+            first page. Returns the awaitable Response of the next page, or None when
+            there are no more pages
+        key: The key of the array in each Response
+        prefetch: The number of received pages kept ahead of the consumer
+    """
+    pages = Queue(maxsize=max(prefetch, 1))
+
+    async def produce():
+        response = None
+        try:
+            while True:
+                request = request_page(response)
+                if request is None:
+                    break
+                response = await request
+                if not response:
+                    msg = f'Failed to get the next page of {key}. Server returned status {response.status}'
+                    logger.error(msg)
+                    raise UnexpectedStatus(msg, response.status)
+                await pages.put(response)
+        except Exception as error:
+            await pages.put(error)
+        else:
+            await pages.put(_END)
+
+    producer = ensure_future(produce())
+    try:
+        while True:
+            page = await pages.get()
+            if page is _END:
+                break
+            if isinstance(page, Exception):
+                raise page
+            for element in page[key]:
+                yield element
+    finally:
+        # The consumer stopped early. Stop requesting pages
+        producer.cancel()
@@ -1,11 +1,15 @@
-import ujson as json
 from asyncio import TimeoutError as AsyncTimeOutError
+from asyncio import get_event_loop
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AsyncExitStack
+from functools import partial
 from async_timeout import timeout
 import logging
+from .incremental import ArrayDecoder
 from .response import Response
 from .rest import update_account
 from ..definitions.base import create_attribute
-from ..endpoints.account import GETAccountID
+from ..endpoints.account import GETAccountID, GETAccountIDInstruments
 from ..endpoints.annotations import LastTransactionID
 from ..endpoints.annotations import SinceTransactionID
 from ..endpoints.other_responses import other_responses
@@ -30,7 +34,7 @@ def _lookup_schema(endpoint, status):
         except KeyError:
             msg = str(status)
             logger.error(msg)
-            raise UnexpectedStatus(msg)
+            raise UnexpectedStatus(msg, status)
         else:
             # Returns False if the status wasn't in the endpoints expected response
             return schema, status, False
@@ -39,37 +43,119 @@ def _lookup_schema(endpoint, status):
         return schema, status, True
 
 
-async def _create_response(json_body, endpoint, schema, status, boolean, datetime_format):
+def _check_rate_limited(self, endpoint, resp):
+    """Slow down requests to the host when the server responded with HTTP 429"""
+    if resp.status != 429:
+        return
+    try:
+        retry_after = float(resp.headers['Retry-After'])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        retry_after = None
+    self.rate_limiters[endpoint.host].throttle(retry_after)
+
+
+def _construct_response(json_body, endpoint, schema, status, boolean, datetime_format, codec=None, lazy=False):
     # Here we iterate through all the json objects returned in the response
     # and construct the corresponding async_v20 type as determined by the endpoints
     # Schema
-    if isinstance(schema, dict):
+    if isinstance(schema, dict) and lazy:
+        # Objects are constructed when the key is first accessed
+        lazy_data = [(json_object, (schema.get(json_object), json_field))
+                     for json_object, json_field in json_body.items()]
+        return Response(None, status, boolean, datetime_format, codec, lazy_data)
+    elif isinstance(schema, dict):
         data = []
         for json_object, json_field in json_body.items():
             data.append((json_object, create_attribute(schema.get(json_object), json_field)))
     else:
         obj = schema(**json_body)
         data = [(obj.__class__.__name__, obj)]
-    return Response(data, status, boolean, datetime_format)
+    return Response(data, status, boolean, datetime_format, codec)
+
+
+def _loads(codec, body):
+    # Mirror aiohttp's ClientResponse.json() which returns None for an empty body
+    if not body.strip():
+        return None
+    return codec.loads(body)
+
+
+def _invalid_body(method_name, status, error):
+    msg = f'{method_name} returned a body that is not valid JSON. Server returned status {status}: {error}'
+    logger.error(msg)
+    return UnexpectedStatus(msg, status)
+
+
+def _decode(codec, body, status, method_name):
+    """Decode the raw response body. A body that isn't JSON, such as the HTML
+    error page of a proxy, raises UnexpectedStatus"""
+    try:
+        return _loads(codec, body)
+    except ValueError as error:
+        raise _invalid_body(method_name, status, error) from error
+
+
+def _decode_response(body, endpoint, schema, status, boolean, datetime_format, codec, lazy, method_name):
+    """Decode the raw response body and construct the Response. Called
+    from an executor when the body is larger than the clients threshold"""
+    return _construct_response(_decode(codec, body, status, method_name), endpoint, schema, status, boolean,
+                               datetime_format, codec, lazy)
+
+
+async def _create_response(json_body, endpoint, schema, status, boolean, datetime_format, codec=None, lazy=False):
+    return _construct_response(json_body, endpoint, schema, status, boolean, datetime_format, codec, lazy)
+
+
+async def _parse_in_executor(self, body, endpoint, schema, status, boolean, method_name):
+    """Move the decoding of large response bodies off the event loop"""
+    loop = get_event_loop()
+    if isinstance(self.executor, ProcessPoolExecutor):
+        # async_v20 objects can not be pickled. Only the decoding of the
+        # body is performed in the worker process
+        try:
+            json_body = await loop.run_in_executor(self.executor, _loads, self.json_codec, body)
+        except ValueError as error:
+            raise _invalid_body(method_name, status, error) from error
+        return await _create_response(json_body, endpoint, schema, status, boolean, self.datetime_format,
+                                      self.json_codec, self.lazy_responses)
+    return await loop.run_in_executor(
+        self.executor,
+        partial(_decode_response, body, endpoint, schema, status, boolean, self.datetime_format,
+                self.json_codec, self.lazy_responses, method_name))
 
 
 async def _rest_response(self, response, endpoint, enable_rest, method_name):
     try:
         async with timeout(self.rest_timeout):
             async with response as resp:
+                _check_rate_limited(self, endpoint, resp)
                 schema, status, boolean = _lookup_schema(endpoint, resp.status)
                 # Update client headers.
                 self.default_parameters.update(resp.raw_headers)
-                json_body = await resp.json()
+                body = await resp.read()
 
     except AsyncTimeOutError:
         msg = f'{method_name} took longer than {self.rest_timeout} seconds'
         logger.error(msg)
         raise ResponseTimeout(msg)
     else:
-        response = await _create_response(json_body, endpoint, schema, status, boolean, self.datetime_format)
+        threshold = self.large_response_threshold
+        if threshold is not None and len(body) > threshold:
+            response = await _parse_in_executor(self, body, endpoint, schema, status, boolean, method_name)
+        else:
+            response = await _create_response(_decode(self.json_codec, body, status, method_name), endpoint, schema, status, boolean,
+                                              self.datetime_format, self.json_codec, self.lazy_responses)
+
+    response.body_size = len(body)
+
+    if body and len(body) <= self.raw_body_limit:
+        # Keeping a reference to the body costs nothing. Response.json()
+        # and Response.raw() return it rather than re-encoding the objects
+        response.raw_body = body
 
     if response:
+        # When responses are lazy, only the keys accessed here are
+        # constructed. `changes` and `state` only when enable_rest is True
         last_transaction_id = getattr(response, 'lastTransactionID', None)
         if last_transaction_id:
             self.default_parameters.update({LastTransactionID: last_transaction_id})
@@ -87,6 +173,10 @@ async def _rest_response(self, response, endpoint, enable_rest, method_name):
             self.default_parameters.update({SinceTransactionID: last_transaction_id})
             self._account = response.account
 
+        elif endpoint == GETAccountIDInstruments:
+            # Keep the clients instruments up to date each time they are requested
+            self.instruments.update(response.instruments)
+
     return response
 
 
@@ -111,11 +201,12 @@ def _construct_json_body_and_schema(line, schema, endpoint):
 
 async def _stream_parser(self, response, endpoint, method_name):
     async with response as resp:
+        _check_rate_limited(self, endpoint, resp)
         schema, status, boolean = _lookup_schema(endpoint, resp.status)
         while not resp.content.at_eof():
             try:
                 async with timeout(self.stream_timeout):
-                    line = json.loads(await resp.content.readline())
+                    line = self.json_codec.loads(await resp.content.readline())
             except AsyncTimeOutError:
                 msg = f'{method_name} took longer than {self.stream_timeout} seconds'
                 logger.error(msg)
@@ -123,11 +214,60 @@ async def _stream_parser(self, response, endpoint, method_name):
 
             json_body, json_schema = _construct_json_body_and_schema(line, schema, endpoint)
 
-            yield await _create_response(json_body, endpoint, json_schema, status, boolean, self.datetime_format)
+            yield await _create_response(json_body, endpoint, json_schema, status, boolean, self.datetime_format,
+                                         self.json_codec)
+
+
+async def _incremental_parser(self, response, endpoint, key, method_name):
+    """Yield the objects of the `key` array as they are received"""
+    async with AsyncExitStack() as stack:
+        try:
+            async with timeout(self.rest_timeout):
+                resp = await stack.enter_async_context(response)
+        except AsyncTimeOutError:
+            msg = f'{method_name} took longer than {self.rest_timeout} seconds'
+            logger.error(msg)
+            raise ResponseTimeout(msg)
+        _check_rate_limited(self, endpoint, resp)
+        schema, status, boolean = _lookup_schema(endpoint, resp.status)
+        if not boolean:
+            # The body contains an error message rather than the expected array
+            try:
+                async with timeout(self.rest_timeout):
+                    body = await resp.read()
+            except AsyncTimeOutError:
+                msg = f'{method_name} took longer than {self.rest_timeout} seconds'
+                logger.error(msg)
+                raise ResponseTimeout(msg)
+            yield await _create_response(_decode(self.json_codec, body, status, method_name), endpoint, schema, status, boolean,
+                                         self.datetime_format, self.json_codec)
+            return
+
+        typ = schema[key]._contains
+        decoder = ArrayDecoder(key)
+        eof = False
+        while not eof:
+            try:
+                async with timeout(self.rest_timeout):
+                    chunk = await resp.content.readany()
+            except AsyncTimeOutError:
+                msg = f'{method_name} took longer than {self.rest_timeout} seconds'
+                logger.error(msg)
+                raise ResponseTimeout(msg)
+            eof = not chunk
+            for json_object in decoder.feed(chunk, eof):
+                yield create_attribute(typ, json_object)
+
+    last_transaction_id = decoder.fields.get('lastTransactionID')
+    if last_transaction_id:
+        self.default_parameters.update(
+            {LastTransactionID: create_attribute(schema['lastTransactionID'], last_transaction_id)})
 
 
-async def parse_response(self, response, endpoint, enable_rest, method_name):
-    if endpoint.host in 'REST HEALTH':
+async def parse_response(self, response, endpoint, enable_rest, method_name, incremental=None):
+    if incremental:
+        result = _incremental_parser(self, response, endpoint, incremental, method_name)
+    elif endpoint.host in 'REST HEALTH':
         result = await _rest_response(self, response, endpoint, enable_rest, method_name)
     else:
         result = _stream_parser(self, response, endpoint, method_name)
@@ -0,0 +1,75 @@
+"""Connection pools of each OANDA host"""
+import logging
+
+import aiohttp
+
+__all__ = ['ConnectionPools']
+
+logger = logging.getLogger(__name__)
+
+# Maximum connections per host. 0 is unlimited
+default_limits = {'REST': 10, 'STREAM': 0, 'HEALTH': 2}
+
+# Seconds an idle connection is kept open
+default_keepalive_timeouts = {'REST': 60, 'STREAM': 15, 'HEALTH': 15}
+
+
+class ConnectionPools(object):
+    """A :class:`aiohttp.TCPConnector` for each host. REST, STREAM and HEALTH
+    requests are sent over separate pools, so open streams never take up
+    connections needed by REST requests.
+
+    An instance can be passed to several :class:`~async_v20.OandaClient`
+    instances that run in the same event loop to share their connections.
+    Shared pools are not closed by the clients. Call :meth:`close` when
+    they are no longer needed
+
+    Args:
+        limits: dict of {host: maximum connections} that updates the default limits.
+            0 is unlimited
+        keepalive_timeouts: dict of {host: seconds} an idle connection is kept open
+        ttl_dns_cache: Seconds a DNS lookup is cached. None caches lookups forever
+    """
+
+    def __init__(self, limits=None, keepalive_timeouts=None, ttl_dns_cache=300):
+        self.limits = dict(default_limits)
+        self.limits.update(limits or {})
+        self.keepalive_timeouts = dict(default_keepalive_timeouts)
+        self.keepalive_timeouts.update(keepalive_timeouts or {})
+        self.ttl_dns_cache = ttl_dns_cache
+        self._connectors = {}
+
+    def connector(self, host):
+        """Return the connector of `host`. Created the first time it is requested.
+        Must be called from within the event loop the connections will be used in
+        """
+        try:
+            connector = self._connectors[host]
+        except KeyError:
+            connector = None
+        if connector is None or connector.closed:
+            logger.info('Creating %s connection pool', host)
+            connector = aiohttp.TCPConnector(limit=self.limits[host],
+                                             keepalive_timeout=self.keepalive_timeouts[host],
+                                             use_dns_cache=True,
+                                             ttl_dns_cache=self.ttl_dns_cache)
+            self._connectors[host] = connector
+        return connector
+
+    def set_limit(self, host, limit):
+        """Change the maximum connections of `host`. 0 is unlimited
+
+        The limit applies to connectors created afterwards. A connector that is
+        already open keeps its limit until it is closed, as aiohttp has no API to
+        change the limit of an open connector
+        """
+        self.limits[host] = limit
+
+    async def close(self):
+        """Close all connections"""
+        for connector in self._connectors.values():
+            await connector.close()
+        self._connectors.clear()
+
+    def __repr__(self):
+        return f'<ConnectionPools limits={self.limits}>'
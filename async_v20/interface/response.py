@@ -1,6 +1,6 @@
-import ujson as json
 import logging
-from ..definitions.base import Specifier, Model, Array
+from ..codecs import get_codec
+from ..definitions.base import Specifier, Model, Array, create_attribute
 import pandas as pd
 
 logger = logging.getLogger(__name__)
@@ -9,13 +9,124 @@ class Response(dict):
     """A response from OANDA.
 
     Allows dotted attribute access
+
+    Args:
+        data: Iterable of (key, object) pairs
+        status: The HTTP status of the response
+        bool: True if the status was an expected status for the endpoint
+        datetime_format: The datetime format the response was sent in
+        codec: The :class:`~async_v20.codecs.Codec` used by :meth:`json`
+        lazy_data: Iterable of (key, (type, json)) pairs. The objects are only
+            created when the key is first accessed
+
+    Attributes:
+        raw_body: The bytes received from OANDA. None unless the client's
+            `raw_body_limit` was large enough to keep the body.
+            Modifying the response discards the raw body
+        body_size: Size in bytes of the body received from OANDA
     """
-    def __init__(self, data, status, bool, datetime_format):
+
+    _lazy = {}  # Never mutated. Instances assign their own dict on initialization
+
+    raw_body = None
+
+    body_size = 0
+
+    def __init__(self, data, status, bool, datetime_format, codec=None, lazy_data=None):
         if data:
             super().__init__(data)
         self.status = status
         self.bool = bool
         self.datetime_format = datetime_format
+        self.codec = get_codec(codec)
+        self._lazy = {}
+        if lazy_data:
+            for key, (typ, json_field) in lazy_data:
+                super().__setitem__(key, None)
+                self._lazy[key] = (typ, json_field)
+
+    def __getitem__(self, key):
+        try:
+            typ, json_field = self._lazy.pop(key)
+        except KeyError:
+            return super().__getitem__(key)
+        result = create_attribute(typ, json_field)
+        super().__setitem__(key, result)
+        return result
+
+    def _materialise(self):
+        """Create all the objects that haven't been accessed yet"""
+        for key in tuple(self._lazy):
+            self[key]
+
+    def __iter__(self):
+        # Overriding __iter__ prevents dict(response) from copying
+        # the placeholders of keys that haven't been accessed
+        return super().__iter__()
+
+    def __eq__(self, other):
+        self._materialise()
+        try:
+            other._materialise()
+        except AttributeError:
+            pass
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self):
+        self._materialise()
+        return super().items()
+
+    def values(self):
+        self._materialise()
+        return super().values()
+
+    def copy(self):
+        self._materialise()
+        return super().copy()
+
+    def pop(self, key, *default):
+        if key in self:
+            self[key]
+            self.raw_body = None
+        return super().pop(key, *default)
+
+    def __setitem__(self, key, value):
+        self._lazy.pop(key, None)
+        # The raw body no longer represents a response that has been modified
+        self.raw_body = None
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._lazy.pop(key, None)
+        self.raw_body = None
+        super().__delitem__(key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def popitem(self):
+        self._materialise()
+        self.raw_body = None
+        return super().popitem()
+
+    def clear(self):
+        self._lazy.clear()
+        self.raw_body = None
+        super().clear()
 
     def __bool__(self):
         """Returns True if response contains data as per the OANDA spec.
@@ -66,6 +177,25 @@ class Response(dict):
 
         return {key: value_to_dict(value) for key, value in self.items()}
 
+    def _raw_body_matches(self, datetime_format):
+        return self.raw_body is not None and datetime_format in (None, self.datetime_format)
+
     def json(self, datetime_format=None):
-        """Return the json equivalent of the response"""
-        return json.dumps(self.dict(json=True, datetime_format=datetime_format))
+        """Return the json equivalent of the response
+
+        The body received from OANDA is returned unchanged when it was kept
+        and `datetime_format` is the format the response was sent in
+        """
+        if self._raw_body_matches(datetime_format):
+            return self.raw_body.decode()
+        return self.codec.dumps(self.dict(json=True, datetime_format=datetime_format))
+
+    def raw(self, datetime_format=None):
+        """Return the json equivalent of the response as bytes
+
+        The body received from OANDA is returned without copying when it was kept
+        and `datetime_format` is the format the response was sent in
+        """
+        if self._raw_body_matches(datetime_format):
+            return self.raw_body
+        return self.codec.dumpb(self.dict(json=True, datetime_format=datetime_format))
@@ -0,0 +1,126 @@
+"""Retry idempotent requests that failed for a transient reason"""
+import logging
+from asyncio import sleep
+from collections import Counter
+from contextvars import ContextVar
+from random import uniform
+from time import monotonic
+
+from aiohttp import ClientConnectionError
+
+from ..exceptions import InvalidValue, ResponseTimeout, UnexpectedStatus
+
+__all__ = ['RetryPolicy']
+
+logger = logging.getLogger(__name__)
+
+# The retry argument passed to a shortcut method. Used by the endpoint method it calls
+requested_retry = ContextVar('requested_retry', default=None)
+
+
+class RetryPolicy(object):
+    """Retry requests that timed out, failed to connect or responded with
+    HTTP 429 or 5xx
+
+    Each retry waits a random time between 0 and `backoff` * 2 ** retry seconds
+    (full jitter), capped at `max_backoff`. A retry is not started if it would
+    finish waiting after `deadline` seconds from the first attempt.
+
+    Only GET requests are retried. POST, PUT and PATCH requests are only retried
+    when the caller passes ``retry=True``. e.g. an order with a client ID that
+    can be checked before it is sent again
+
+    Args:
+        max_retries: Maximum number of retries of a request
+        backoff: Seconds to wait before the first retry
+        max_backoff: Maximum seconds to wait before a retry
+        deadline: Maximum seconds from the first attempt to the start of the last
+        statuses: HTTP statuses that are retried
+        endpoint_retries: dict of {EndPoint: max_retries} that overrides `max_retries`
+
+    Attributes:
+        retries: :class:`~collections.Counter` of retries per endpoint name
+        exhausted: :class:`~collections.Counter` of requests per endpoint name that
+            still failed after the last retry
+    """
+
+    def __init__(self, max_retries=3, backoff=0.1, max_backoff=5, deadline=30,
+                 statuses=(429, 500, 502, 503, 504), endpoint_retries=None):
+        if max_retries < 0 or backoff < 0 or deadline < 0:
+            msg = f'max_retries, backoff and deadline must be positive. ' \
+                  f'Not {max_retries}, {backoff}, {deadline}'
+            logger.error(msg)
+            raise InvalidValue(msg)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.statuses = frozenset(statuses)
+        self.endpoint_retries = dict(endpoint_retries or {})
+        self.retries = Counter()
+        self.exhausted = Counter()
+
+    def retries_endpoint(self, endpoint, retry=None):
+        """True if failed requests to `endpoint` may be sent again
+
+        Args:
+            endpoint: The endpoint the request is sent to
+            retry: True marks a POST/PUT/PATCH request safe to send again.
+                False never retries the request
+        """
+        if retry is None:
+            retry = endpoint.method == 'GET'
+        return retry and self.endpoint_retries.get(endpoint, self.max_retries) > 0
+
+    def delay(self, retry):
+        """Seconds to wait before `retry` (counting from 0)"""
+        return uniform(0, min(self.max_backoff, self.backoff * 2 ** retry))
+
+    def _transient(self, error):
+        if isinstance(error, (ResponseTimeout, ClientConnectionError)):
+            return True
+        return isinstance(error, UnexpectedStatus) and error.status in self.statuses
+
+    async def send(self, endpoint, send):
+        """Await `send()` until it succeeds or the retries are exhausted
+
+        Args:
+            endpoint: The endpoint the request is sent to
+            send: Callable that returns an awaitable of the Response
+
+        Returns: The last Response. Raises the last error
+        """
+        start = monotonic()
+        max_retries = self.endpoint_retries.get(endpoint, self.max_retries)
+        name = endpoint.__name__
+        retry = 0
+        while True:
+            try:
+                response = await send()
+            except Exception as error:
+                if not self._transient(error):
+                    raise
+                failure = error
+                reason = error.__class__.__name__
+            else:
+                if response.status not in self.statuses:
+                    return response
+                failure = response
+                reason = f'HTTP {response.status}'
+
+            delay = self.delay(retry)
+            if retry >= max_retries or monotonic() - start + delay > self.deadline:
+                self.exhausted[name] += 1
+                if isinstance(failure, Exception):
+                    raise failure
+                return failure
+
+            retry += 1
+            self.retries[name] += 1
+            logger.warning('%s failed with %s. Retry %s of %s in %.3f seconds',
+                           name, reason, retry, max_retries, delay)
+            await sleep(delay)
+
+    def __repr__(self):
+        return f'<RetryPolicy max_retries={self.max_retries} backoff={self.backoff} ' \
+               f'deadline={self.deadline} retries={sum(self.retries.values())}>'
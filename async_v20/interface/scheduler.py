@@ -0,0 +1,173 @@
+"""Schedule requests by priority"""
+import logging
+from asyncio import get_event_loop, CancelledError
+from collections import Counter
+from contextvars import ContextVar
+from heapq import heappush, heappop
+from itertools import count
+from time import monotonic
+
+from ..endpoints.instrument import GETInstrumentsCandles, GETInstrumentOrderBook, GETInstrumentsPositionBook
+from ..endpoints.pricing import GETPricing
+from ..exceptions import InvalidValue
+
+__all__ = ['RequestScheduler', 'TRADING', 'ACCOUNT', 'MARKET_DATA', 'HISTORY']
+
+logger = logging.getLogger(__name__)
+
+# Priority classes. Lower values are sent first
+TRADING = 0
+ACCOUNT = 1
+MARKET_DATA = 2
+HISTORY = 3
+
+priorities = {'trading': TRADING, 'account': ACCOUNT, 'market_data': MARKET_DATA, 'history': HISTORY}
+
+# The priority passed to a shortcut method. Used by the endpoint method it calls
+requested_priority = ContextVar('requested_priority', default=None)
+
+_market_data = (GETPricing, GETInstrumentOrderBook, GETInstrumentsPositionBook)
+
+
+def default_priority(endpoint):
+    """The priority class of requests to `endpoint`
+
+    Requests that change the account (orders, trades, positions) are TRADING.
+    Candles are HISTORY. Prices, order/position books and health are MARKET_DATA.
+    All other requests are ACCOUNT
+    """
+    if endpoint.method != 'GET':
+        return TRADING
+    if endpoint is GETInstrumentsCandles:
+        return HISTORY
+    if endpoint in _market_data or endpoint.host == 'HEALTH':
+        return MARKET_DATA
+    return ACCOUNT
+
+
+def get_priority(priority):
+    """Return the priority class for a priority name or value"""
+    try:
+        return priorities[priority]
+    except KeyError:
+        if priority in priorities.values():
+            return priority
+    msg = f'{priority} is not a valid priority. Possible values are {", ".join(priorities)}'
+    logger.error(msg)
+    raise InvalidValue(msg)
+
+
+class RequestScheduler(object):
+    """Limit the number of concurrent requests. Waiting requests are
+    started in priority order, then in the order they arrived.
+
+    Args:
+        max_connections: Maximum concurrent requests. 0 is unlimited
+        reserved: Number of the connections only TRADING requests may use
+
+    Attributes:
+        active: Number of requests currently holding a connection
+        started: :class:`~collections.Counter` of requests started per priority
+        waited: :class:`~collections.Counter` of requests that waited per priority
+        total_wait: :class:`~collections.Counter` of seconds waited per priority
+        max_wait: dict of the longest wait per priority
+    """
+
+    def __init__(self, max_connections, reserved=1):
+        self._waiters = []  # heap of (priority, sequence, future)
+        self._sequence = count()
+        self.active = 0
+        self.started = Counter()
+        self.waited = Counter()
+        self.total_wait = Counter()
+        self.max_wait = {}
+        self.max_connections = max_connections
+        self.reserved = reserved
+
+    @property
+    def max_connections(self):
+        return self._max_connections
+
+    @max_connections.setter
+    def max_connections(self, value):
+        self._max_connections = value
+        self._wake()
+
+    @property
+    def reserved(self):
+        return self._reserved
+
+    @reserved.setter
+    def reserved(self, value):
+        if value < 0:
+            msg = f'reserved must be positive. Not {value}'
+            logger.error(msg)
+            raise InvalidValue(msg)
+        self._reserved = value
+
+    @property
+    def queue_depth(self):
+        """Number of requests waiting to start"""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def _limit(self, priority):
+        if priority == TRADING:
+            return self._max_connections
+        # Never reserve every connection
+        return max(1, self._max_connections - self._reserved)
+
+    def _can_start(self, priority):
+        return not self._max_connections or self.active < self._limit(priority)
+
+    def _purge(self):
+        while self._waiters and self._waiters[0][2].done():
+            heappop(self._waiters)
+
+    async def acquire(self, priority):
+        """Wait for a connection to become available to a request of `priority`"""
+        self._purge()
+        if (not self._waiters or self._waiters[0][0] > priority) and self._can_start(priority):
+            self.active += 1
+            self.started[priority] += 1
+            return
+
+        start = monotonic()
+        future = get_event_loop().create_future()
+        heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except CancelledError:
+            if future.done() and not future.cancelled():
+                # The connection was granted as the request was cancelled
+                self.release()
+            else:
+                future.cancel()
+                self._purge()
+            raise
+        wait_time = monotonic() - start
+        self.started[priority] += 1
+        self.waited[priority] += 1
+        self.total_wait[priority] += wait_time
+        self.max_wait[priority] = max(self.max_wait.get(priority, 0), wait_time)
+
+    def release(self):
+        """Return a connection and start the next waiting request"""
+        self.active -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heappop(self._waiters)
+                continue
+            if not self._can_start(priority):
+                # Every other waiting request has the same or a lower priority
+                break
+            heappop(self._waiters)
+            self.active += 1
+            future.set_result(None)
+
+    def __repr__(self):
+        return f'<RequestScheduler active={self.active}/{self._max_connections} ' \
+               f'reserved={self._reserved} queue_depth={self.queue_depth}>'
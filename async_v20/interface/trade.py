@@ -1,4 +1,5 @@
 from .decorators import endpoint
+from .pagination import paginate, min_id
 from ..definitions.types import ClientExtensions
 from ..definitions.types import InstrumentName
 from ..definitions.types import StopLossDetails
@@ -50,6 +51,44 @@ class TradeInterface(object):
         """
         pass
 
+    def iter_trades(self, state=sentinel, instrument=sentinel, count=500, trade_id=sentinel, prefetch=1):
+        """
+        Iterate over the Trades of an Account, most recent first. Pages of
+        `count` Trades are requested with :meth:`list_trades`. The next page is
+        requested before the Trades of the current page are consumed
+
+        Args:
+            state: :class:`~async_v20.TradeStateFilter`
+                The state to filter the requested Trades by.
+            instrument: :class:`~async_v20.InstrumentName`
+                The instrument to filter the requested Trades by.
+            count: :class:`int`
+                The number of Trades requested in each page. At most 500
+            trade_id: :class:`~async_v20.TradeID`
+                The maximum Trade ID to return. If not provided the most recent
+                Trades in the Account are returned.
+            prefetch: :class:`int`
+                The number of pages received ahead of the consumer
+
+        Returns:
+
+            async iterator of :class:`~async_v20.Trade`
+
+            Raises :class:`~async_v20.exceptions.UnexpectedStatus` when a page
+            can't be received
+        """
+
+        def request_page(response):
+            if response is None:
+                return self.list_trades(state=state, instrument=instrument, count=count, trade_id=trade_id)
+            trades = response.trades
+            if len(trades) < count or min_id(trades) <= 1:
+                return None
+            return self.list_trades(state=state, instrument=instrument, count=count,
+                                    trade_id=min_id(trades) - 1)
+
+        return paginate(request_page, 'trades', prefetch)
+
     @endpoint(GETOpenTrades)
     def list_open_trades(self):
         """
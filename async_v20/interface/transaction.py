@@ -1,16 +1,31 @@
+import logging
+from asyncio import Semaphore, ensure_future, gather
+
+from yarl import URL
+
 from .decorators import endpoint
+from .helpers import run_in_executor
+from .pagination import paginate
+from ..definitions.types import AccountID
 from ..definitions.types import TransactionID
 from ..endpoints.annotations import FromTime
 from ..endpoints.annotations import FromTransactionID
+from ..endpoints.annotations import LastTransactionID
 from ..endpoints.annotations import PageSize
 from ..endpoints.annotations import ToTime
 from ..endpoints.annotations import ToTransactionID
 from ..endpoints.annotations import Type
 from ..endpoints.transaction import *
 from ..definitions.helpers import sentinel
+from ..exceptions import TransactionDownloadFailure
+from ..transaction_store import MAX_TRANSACTIONS_PER_REQUEST, TransactionStore
+from ..transaction_history import transaction_json
+from ..transaction_store import split_ids, transaction_tables
 
 __all__ = ['TransactionInterface']
 
+logger = logging.getLogger(__name__)
+
 
 class TransactionInterface(object):
     @endpoint(GETTransactions)
@@ -119,6 +134,62 @@ class TransactionInterface(object):
         """
         pass
 
+    @endpoint(GETIDrange, incremental='transactions')
+    def iter_transaction_range(self,
+                               from_transaction: FromTransactionID,
+                               to_transaction: ToTransactionID,
+                               type_: Type = sentinel):
+        """
+        Get a range of Transactions for an Account based on the Transaction
+        IDs. Transactions are decoded and yielded as the response is received.
+
+        Args:
+
+            from_transaction: :class:`~async_v20.endpoints.annotations.FromTransactionID`
+                The starting Transaction ID (inclusive) to fetch.
+            to_transaction: :class:`~async_v20.endpoints.annotations.ToTransactionID`
+                The ending Transaction ID (inclusive) to fetch.
+            type_: :class:`~async_v20.endpoints.annotations.Type`
+                The filter that restricts the types of Transactions to
+                retrieve.
+
+        Returns:
+
+            status [200]
+                async iterator of :class:`~async_v20.Transaction`
+
+                **OR**
+
+                :class:`~async_v20.interface.response.Response` that evaluates False
+                when the server returns an error status
+        """
+        pass
+
+    @endpoint(GETSinceID, incremental='transactions')
+    def iter_since_transaction(self, transaction_id: TransactionID = sentinel):
+        """
+        Get a range of Transactions for an Account starting at (but not
+        including) a provided Transaction ID. Transactions are decoded and
+        yielded as the response is received.
+
+        Args:
+
+            transaction_id: :class:`~async_v20.TransactionID`
+                The ID of the last Transaction fetched. This query will return
+                all Transactions newer than the TransactionID.
+
+        Returns:
+
+            status [200]
+                async iterator of :class:`~async_v20.Transaction`
+
+                **OR**
+
+                :class:`~async_v20.interface.response.Response` that evaluates False
+                when the server returns an error status
+        """
+        pass
+
     @endpoint(GETTransactionsStream)
     def stream_transactions(self):
         """
@@ -139,3 +210,141 @@ class TransactionInterface(object):
                 (Heartbeat= :class:`~async_v20.TransactionHeartbeat`)
         """
         pass
+
+    async def download_transactions(self, from_time=sentinel, to_time=sentinel, types=None, store=None,
+                                    chunk_size=MAX_TRANSACTIONS_PER_REQUEST, max_concurrency=4):
+        """Download the transactions of a time range into a table of each transaction type
+
+        The transaction IDs of the time range are taken from the pages of
+        :meth:`list_transactions`. The IDs are split into chunks of `chunk_size`
+        that are requested concurrently with :meth:`transaction_range`. When a `store`
+        is passed, complete chunks are written to disk as they are received and chunks
+        already stored are not requested again, so an interrupted download resumes
+        from the chunks it completed.
+
+        Args:
+
+            from_time: :class:`~async_v20.DateTime`
+                The start of the time range. Defaults to the account creation time
+            to_time: :class:`~async_v20.DateTime`
+                The end of the time range. Defaults to the request time
+            types: Iterable of :class:`~async_v20.TransactionFilter`
+                Restricts the types of transactions downloaded. None downloads all types
+            store: A directory or :class:`~async_v20.transaction_store.TransactionStore`
+                used to store the downloaded chunks
+            chunk_size: :class:`int`
+                The number of transaction IDs requested at once. At most 1000
+            max_concurrency: :class:`int`
+                The maximum number of concurrent requests
+
+        Returns:
+
+            :class:`dict` of transaction type: :class:`pandas.DataFrame`.
+            See :func:`~async_v20.transaction_store.transaction_tables`
+        """
+        logger.info('download_transactions(from_time=%s, to_time=%s, types=%s)', from_time, to_time, types)
+        if isinstance(types, str):
+            types = [types]
+        types = sorted(types) if types else None
+        type_ = ','.join(types) if types else sentinel
+        if store is not None and not isinstance(store, TransactionStore):
+            store = TransactionStore(store, self.json_codec)
+
+        response = await self.list_transactions(from_time=from_time, to_time=to_time,
+                                                page_size=MAX_TRANSACTIONS_PER_REQUEST, type_=type_)
+        if not response:
+            msg = f'Failed to list the transactions from {from_time} to {to_time}. ' \
+                  f'Server returned status {response.status}'
+            logger.error(msg)
+            raise TransactionDownloadFailure(msg)
+        pages = [URL(page).query for page in response.pages]
+        if not pages:
+            return {}
+        from_id = min(int(page['from']) for page in pages)
+        to_id = max(int(page['to']) for page in pages)
+        last_transaction_id = int(response.get('lastTransactionID', to_id))
+        account_id = self.default_parameters[AccountID]
+
+        chunks = split_ids(from_id, to_id, min(chunk_size, MAX_TRANSACTIONS_PER_REQUEST))
+        stored = await run_in_executor(self, store.chunks, account_id, types) if store is not None else set()
+        semaphore = Semaphore(max_concurrency)
+
+        async def request(chunk):
+            start, end = chunk
+            async with semaphore:
+                response = await self.transaction_range(start, end, type_=type_)
+            if not response:
+                msg = f'Failed to get the transactions {start} to {end}. ' \
+                      f'Server returned status {response.status}'
+                logger.error(msg)
+                raise TransactionDownloadFailure(msg)
+            transactions = [transaction for transaction in map(transaction_json, response.transactions.raw_items())
+                            if start <= int(transaction['id']) <= end]
+            # Chunks ending after the last transaction receive more transactions later
+            if store is not None and end <= last_transaction_id:
+                await run_in_executor(self, store.write, account_id, types, start, end, transactions)
+            return transactions
+
+        requests = [ensure_future(request(chunk)) for chunk in chunks if chunk not in stored]
+        try:
+            received = await gather(*requests)
+        except BaseException:
+            # Stop requesting chunks. Those completed are stored
+            for task in requests:
+                task.cancel()
+            raise
+        logger.info('download_transactions requested %s of %s chunks', len(received), len(chunks))
+
+        transactions = {}
+        if store is not None:
+            stored_transactions = await run_in_executor(
+                self, list, store.transactions(account_id, types, from_id, to_id))
+            transactions.update((int(transaction['id']), transaction) for transaction in stored_transactions)
+        transactions.update((int(transaction['id']), transaction)
+                            for chunk in received for transaction in chunk
+                            if from_id <= int(transaction['id']) <= to_id)
+        return transaction_tables(transactions.values())
+
+    async def iter_transactions(self, from_transaction=1, to_transaction=None, type_=sentinel,
+                                page_size=MAX_TRANSACTIONS_PER_REQUEST, prefetch=1):
+        """Iterate over the Transactions of an Account in ID order
+
+        Pages of `page_size` Transaction IDs are requested with :meth:`transaction_range`.
+        The next page is requested before the Transactions of the current page are consumed
+
+        Args:
+
+            from_transaction: :class:`~async_v20.TransactionID`
+                The starting Transaction ID (inclusive)
+            to_transaction: :class:`~async_v20.TransactionID`
+                The ending Transaction ID (inclusive). Defaults to the last transaction
+                of the Account when the iteration starts
+            type_: :class:`~async_v20.endpoints.annotations.Type`
+                The filter that restricts the types of Transactions to retrieve.
+            page_size: :class:`int`
+                The number of Transaction IDs requested in each page. At most 1000
+            prefetch: :class:`int`
+                The number of pages received ahead of the consumer
+
+        Returns:
+
+            async iterator of :class:`~async_v20.Transaction`
+
+            Raises :class:`~async_v20.exceptions.UnexpectedStatus` when a page
+            can't be received
+        """
+        if to_transaction is None:
+            await self.initialize()
+            to_transaction = self.default_parameters[LastTransactionID]
+        from_transaction, to_transaction = int(from_transaction), int(to_transaction)
+        page_size = min(page_size, MAX_TRANSACTIONS_PER_REQUEST)
+        starts = iter(range(from_transaction, to_transaction + 1, page_size))
+
+        def request_page(response):
+            start = next(starts, None)
+            if start is None:
+                return None
+            return self.transaction_range(start, min(start + page_size - 1, to_transaction), type_=type_)
+
+        async for transaction in paginate(request_page, 'transactions', prefetch):
+            yield transaction
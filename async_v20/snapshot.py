@@ -0,0 +1,109 @@
+"""Snapshot of the account state kept on disk
+
+A snapshot stores the :class:`~async_v20.Account`, the instruments tradeable
+by the account and the last transaction ID in a single gzip compressed JSON
+file. A restarted client loads the snapshot and only requests the account
+changes since the saved transaction ID.
+
+The file is replaced atomically, so processes sharing a snapshot always read
+a complete one.
+"""
+import gzip
+import logging
+from time import time
+
+from .codecs import get_codec
+from .definitions.types import Account
+from .definitions.types import AccountID
+from .endpoints.annotations import LastTransactionID
+from .exceptions import InvalidValue
+from .files import atomic_write
+
+__all__ = ['AccountSnapshot', 'write_snapshot']
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+
+
+class AccountSnapshot(object):
+    """The account state of a client at a transaction
+
+    Args:
+        account_id: The ID of the account
+        last_transaction_id: The ID of the last transaction applied to `account`
+        account: :class:`~async_v20.Account` or its JSON representation
+        instruments: Iterable of the JSON representation of the account's instruments
+        saved_time: UNIX time the snapshot was saved
+    """
+
+    __slots__ = ('account_id', 'last_transaction_id', 'account', 'instruments', 'saved_time')
+
+    def __init__(self, account_id, last_transaction_id, account, instruments, saved_time=None):
+        self.account_id = str(account_id)
+        self.last_transaction_id = int(last_transaction_id)
+        if not isinstance(account, Account):
+            account = Account(**account)
+        self.account = account
+        self.instruments = list(instruments)
+        self.saved_time = time() if saved_time is None else saved_time
+
+    @classmethod
+    def from_client(cls, client):
+        """Create a snapshot of the state of an initialized
+        :class:`~async_v20.OandaClient`"""
+        try:
+            return cls(client.default_parameters[AccountID],
+                       client.default_parameters[LastTransactionID],
+                       client._account, client.instruments.raw_items())
+        except (KeyError, TypeError):
+            msg = 'Only the state of an initialized client can be saved'
+            logger.error(msg)
+            raise InvalidValue(msg)
+
+    def json(self):
+        """Return the JSON representation of the snapshot"""
+        return {
+            'version': VERSION,
+            'accountID': self.account_id,
+            'lastTransactionID': str(self.last_transaction_id),
+            'savedTime': self.saved_time,
+            'account': self.account.dict(json=True, datetime_format='UNIX'),
+            'instruments': self.instruments,
+        }
+
+    def save(self, path, codec=None):
+        """Write the snapshot to `path`. Replaces the existing file atomically"""
+        write_snapshot(path, self.json(), codec)
+
+    @classmethod
+    def load(cls, path, codec=None):
+        """Read the snapshot saved at `path`
+
+        Returns: The :class:`AccountSnapshot` or None when the file doesn't
+            exist or can't be read
+        """
+        try:
+            with open(path, 'rb') as f:
+                data = get_codec(codec).loads(gzip.decompress(f.read()))
+            if data['version'] != VERSION:
+                logger.warning('Ignoring snapshot %s. Version %s is not supported', path, data['version'])
+                return None
+            return cls(data['accountID'], data['lastTransactionID'], data['account'],
+                       data['instruments'], data['savedTime'])
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            logger.warning('Ignoring snapshot %s. Could not be read: %r', path, error)
+            return None
+
+    def __repr__(self):
+        return f'<AccountSnapshot {self.account_id} at transaction {self.last_transaction_id}>'
+
+
+def write_snapshot(path, snapshot, codec=None):
+    """Write the JSON representation of a snapshot to `path`. Replaces the existing
+    file atomically. Doesn't access the client, so it can be called from an executor"""
+    atomic_write(path, gzip.compress(get_codec(codec).dumpb(snapshot), compresslevel=6))
+    logger.info('Saved snapshot of account %s at transaction %s to %s',
+                snapshot['accountID'], snapshot['lastTransactionID'], path)
@@ -0,0 +1,330 @@
+"""Bounded history of the transactions received by a client
+
+Transactions are kept in a ring buffer ordered by transaction ID. Appending a
+transaction and looking one up by ID take constant time, ranges of IDs or times
+are found by binary search. Transactions are stored as they were received and
+only created when they are accessed.
+
+When the buffer is full the oldest transaction is evicted. Evicted transactions
+can be appended to a spill file, one JSON document per line. The spill file is
+written by a single worker thread, off the event loop, in the order transactions
+are evicted.
+"""
+import logging
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+from .codecs import get_codec
+from .definitions.base import Model, create_attribute
+from .definitions.primitives import DateTime
+from .definitions.types import Transaction, ArrayTransaction
+from .exceptions import InvalidValue
+
+__all__ = ['TransactionHistory']
+
+logger = logging.getLogger(__name__)
+
+
+def _raw_transactions(transactions):
+    """Iterate over the transactions without creating Transaction objects for
+    arrays that haven't created them"""
+    if isinstance(transactions, ArrayTransaction):
+        created = transactions.items
+        return (created[index] if index < len(created) and created[index] is not None else json
+                for index, json in enumerate(transactions.raw_items()))
+    if isinstance(transactions, (Model, dict)):
+        return (transactions,)
+    return iter(transactions)
+
+
+def transaction_json(transaction):
+    """The JSON representation of a transaction"""
+    if isinstance(transaction, Model):
+        return transaction.dict(json=True, datetime_format='UNIX')
+    return transaction
+
+
+class _Keys(object):
+    """Sequence of a key of the transactions in a history, oldest first"""
+
+    __slots__ = ('history', 'key')
+
+    def __init__(self, history, key):
+        self.history = history
+        self.key = key
+
+    def __len__(self):
+        return len(self.history)
+
+    def __getitem__(self, index):
+        return self.key(self.history, index)
+
+
+class TransactionHistory(object):
+    """The last `max_size` transactions ordered by transaction ID, newest first
+
+    The history is used as an :class:`~async_v20.ArrayTransaction` is. Indexing and
+    iterating yield :class:`~async_v20.Transaction` objects, newest first, slices
+    return an :class:`~async_v20.ArrayTransaction` and the lookup methods of
+    :class:`~async_v20.definitions.base.Array` are available.
+
+    Args:
+        max_size: The number of transactions kept in memory. 0 keeps none,
+            every transaction is evicted as it is added
+        spill: Path of a file evicted transactions are appended to. None to discard them
+        codec: Name or :class:`~async_v20.codecs.Codec` used to write the spill file
+    """
+
+    def __init__(self, max_size=100, spill=None, codec=None):
+        if max_size < 0:
+            msg = f'max_size must not be negative is {max_size}'
+            logger.error(msg)
+            raise InvalidValue(msg)
+        self.max_size = max_size
+        self.spill = spill
+        self.codec = get_codec(codec)
+        self._spill_file = None
+        self._spill_writer = None
+        self.spilled = 0  # Number of transactions written to the spill file
+        self.clear()
+
+    def clear(self):
+        """Remove all transactions held in memory"""
+        self._transactions = [None] * self.max_size
+        self._ids = [0] * self.max_size
+        self._start = 0  # Slot of the oldest transaction
+        self._length = 0
+        self._slots = {}  # Transaction ID: slot
+        self._array = None  # ArrayTransaction of the transactions held
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def _slot(self, index):
+        """The slot of the `index`th transaction, oldest first"""
+        return (self._start + index) % self.max_size
+
+    def _raw(self, index):
+        """The transaction held at `index`, newest first, without creating it"""
+        return self._transactions[self._slot(self._length - 1 - index)]
+
+    def _get(self, slot):
+        transaction = self._transactions[slot]
+        if not isinstance(transaction, Model):
+            transaction = create_attribute(Transaction, transaction)
+            self._transactions[slot] = transaction
+        return transaction
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ArrayTransaction(*(self._raw(i) for i in range(*index.indices(self._length))))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('TransactionHistory index out of range')
+        return self._get(self._slot(self._length - 1 - index))
+
+    def __iter__(self):
+        for index in reversed(range(self._length)):
+            yield self._get(self._slot(index))
+
+    def __contains__(self, item):
+        """Return True if `item` is the ID of a transaction held, or in
+        :meth:`array` as :class:`~async_v20.definitions.base.Array` defines"""
+        try:
+            return int(item) in self._slots
+        except (TypeError, ValueError):
+            return bool(item in self.array())
+
+    def __eq__(self, other):
+        return self.array() == other
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return self.array() + other
+
+    def __radd__(self, other):
+        return ArrayTransaction(*other, *self)
+
+    def __repr__(self):
+        return f'<TransactionHistory {self.first_id}-{self.last_id} x {self._length}>'
+
+    @property
+    def first_id(self):
+        """ID of the oldest transaction held. None if empty"""
+        return self._ids[self._start] if self._length else None
+
+    @property
+    def last_id(self):
+        """ID of the newest transaction held. None if empty"""
+        return self._ids[self._slot(self._length - 1)] if self._length else None
+
+    def get_id(self, id_, default=None):
+        """Return the transaction with the ID `id_` else return the default"""
+        try:
+            return self._get(self._slots[int(id_)])
+        except (KeyError, ValueError, TypeError):
+            return default
+
+    def ids(self):
+        """Return the IDs, as strings, of the transactions held, newest first"""
+        return [str(self._ids[self._slot(index)]) for index in reversed(range(self._length))]
+
+    def raw_items(self):
+        """Return a tuple of the transactions held, newest first. Each is its
+        JSON dict or an already created object"""
+        return tuple(self._raw(index) for index in range(self._length))
+
+    def get_trade_id(self, id_, default=None, *, type=None):
+        """See :meth:`async_v20.definitions.base.Array.get_trade_id`"""
+        return self.array().get_trade_id(id_, default, type=type)
+
+    def get_trade_ids(self, id_, default=None):
+        """See :meth:`async_v20.definitions.base.Array.get_trade_ids`"""
+        return self.array().get_trade_ids(id_, default)
+
+    def get_instrument(self, instrument, default=None):
+        """See :meth:`async_v20.definitions.base.Array.get_instrument`"""
+        return self.array().get_instrument(instrument, default)
+
+    def get_instruments(self, instrument, default=None):
+        """See :meth:`async_v20.definitions.base.Array.get_instruments`"""
+        return self.array().get_instruments(instrument, default)
+
+    def dataframe(self, json=False, datetime_format=None):
+        """See :meth:`async_v20.definitions.base.Array.dataframe`"""
+        return self.array().dataframe(json, datetime_format)
+
+    def append(self, transaction):
+        """Add a transaction. Transactions already held are ignored
+
+        Args:
+            transaction: :class:`~async_v20.Transaction` or its JSON representation
+        """
+        if not self.max_size:
+            self._spill(transaction)
+            return
+        id_ = int(transaction.get('id'))
+        if id_ in self._slots:
+            return
+        if self._length and id_ < self.last_id:
+            # Transactions arriving out of order are rare. Insert it in ID order
+            transactions = [(self._ids[self._slot(index)], self._transactions[self._slot(index)])
+                            for index in range(self._length)]
+            index = bisect_left([key for key, _ in transactions], id_)
+            transactions.insert(index, (id_, transaction))
+            self.clear()
+        else:
+            transactions = [(id_, transaction)]
+        for id_, transaction in transactions:
+            if self._length == self.max_size:
+                self._evict()
+            self._push(id_, transaction)
+
+    def extend(self, transactions):
+        """Add transactions in ID order. Transactions already held are ignored
+
+        Args:
+            transactions: :class:`~async_v20.ArrayTransaction` or an iterable of
+                transactions or their JSON representation
+        """
+        for transaction in sorted(_raw_transactions(transactions), key=lambda x: int(x.get('id'))):
+            self.append(transaction)
+
+    def _push(self, id_, transaction):
+        slot = self._slot(self._length)
+        self._transactions[slot] = transaction
+        self._ids[slot] = id_
+        self._slots[id_] = slot
+        self._length += 1
+        self._array = None
+
+    def _evict(self):
+        slot = self._start
+        transaction = self._transactions[slot]
+        del self._slots[self._ids[slot]]
+        self._transactions[slot] = None
+        self._start = (slot + 1) % self.max_size
+        self._length -= 1
+        self._array = None
+        self._spill(transaction)
+
+    def _spill(self, transaction):
+        if self.spill is None:
+            return
+        if self._spill_writer is None:
+            self._spill_writer = ThreadPoolExecutor(1, thread_name_prefix='async_v20-spill')
+        self._spill_writer.submit(self._write_spill, transaction)
+        self.spilled += 1
+
+    def _write_spill(self, transaction):
+        # Runs in the spill writer thread
+        try:
+            if self._spill_file is None:
+                self._spill_file = open(self.spill, 'ab')
+            self._spill_file.write(self.codec.dumpb(transaction_json(transaction)) + b'\n')
+        except OSError as error:
+            logger.error(f'Could not write transaction {transaction.get("id")} to {self.spill}: {error!r}')
+
+    def _flush_spill(self):
+        # Runs in the spill writer thread
+        if self._spill_file is not None:
+            self._spill_file.flush()
+
+    def _close_spill(self):
+        # Runs in the spill writer thread
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def _range(self, keys, start, stop):
+        """The transactions from `start` to `stop` inclusive of the sorted `keys`, newest first"""
+        first = 0 if start is None else bisect_left(keys, start)
+        last = self._length if stop is None else bisect_right(keys, stop)
+        return self[self._length - last:self._length - first]
+
+    def range(self, from_id=None, to_id=None):
+        """Return an :class:`~async_v20.ArrayTransaction` of the transactions with IDs from
+        `from_id` to `to_id` inclusive, newest first. Either bound may be None"""
+        ids = _Keys(self, lambda history, index: history._ids[history._slot(index)])
+        return self._range(ids, None if from_id is None else int(from_id), None if to_id is None else int(to_id))
+
+    def time_range(self, from_time=None, to_time=None):
+        """Return an :class:`~async_v20.ArrayTransaction` of the transactions with a time from
+        `from_time` to `to_time` inclusive, newest first. Either bound may be None.
+        Bounds may be anything :class:`~async_v20.DateTime` accepts"""
+        times = _Keys(self, lambda history, index: history._get(history._slot(index)).time)
+        return self._range(times, None if from_time is None else DateTime(from_time),
+                           None if to_time is None else DateTime(to_time))
+
+    def array(self):
+        """Return the transactions held as an :class:`~async_v20.ArrayTransaction`, newest first.
+        The same array is returned until the history changes"""
+        if self._array is None:
+            self._array = ArrayTransaction(*self.raw_items())
+        return self._array
+
+    def read_spill(self):
+        """Iterate over the transactions written to the spill file, oldest first"""
+        if self.spill is None:
+            return
+        if self._spill_writer is not None:
+            # Wait for the transactions already evicted to be written
+            self._spill_writer.submit(self._flush_spill).result()
+        try:
+            with open(self.spill, 'rb') as f:
+                for line in f:
+                    yield create_attribute(Transaction, self.codec.loads(line))
+        except FileNotFoundError:
+            return
+
+    def close(self):
+        """Wait for the evicted transactions to be written and close the spill file"""
+        if self._spill_writer is not None:
+            self._spill_writer.submit(self._close_spill)
+            self._spill_writer.shutdown(wait=True)
+            self._spill_writer = None
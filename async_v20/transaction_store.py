@@ -0,0 +1,139 @@
+"""On disk store of downloaded transactions and their columnar tables
+
+Transactions are downloaded in chunks of consecutive transaction IDs aligned to
+the chunk size. Complete chunks are stored per (account, transaction filter)
+in a directory containing one gzip compressed JSON file per chunk. A download
+that is interrupted resumes from the chunks already stored.
+
+Chunk files are replaced atomically, so readers never see a partial chunk.
+"""
+import gzip
+import logging
+import os
+import re
+
+import pandas as pd
+
+from .codecs import get_codec
+from .files import atomic_write
+from .transaction_history import transaction_json
+
+__all__ = ['TransactionStore', 'split_ids', 'transaction_tables']
+
+logger = logging.getLogger(__name__)
+
+CHUNK = re.compile(r'(\d+)-(\d+)\.json\.gz')
+
+# The maximum number of transactions OANDA returns for one ID range
+MAX_TRANSACTIONS_PER_REQUEST = 1000
+
+
+def split_ids(from_id, to_id, chunk_size=MAX_TRANSACTIONS_PER_REQUEST):
+    """Return the (start, end) ID chunks, inclusive, covering from_id to to_id.
+    Chunks are aligned to chunk_size so the same chunks are used by every download"""
+    start = (from_id - 1) // chunk_size * chunk_size + 1
+    return [(first, first + chunk_size - 1) for first in range(start, to_id + 1, chunk_size)]
+
+
+def _time_column(column):
+    values = column.dropna()
+    if values.empty:
+        return column
+    if 'T' in str(values.iloc[0]):
+        return pd.to_datetime(column, utc=True)
+    # UNIX seconds with up to 9 decimal places
+    parts = column.str.extract(r'(\d+)\.?(\d*)')
+    nanoseconds = parts[0] + parts[1].str.pad(9, side='right', fillchar='0')
+    return pd.to_datetime(pd.to_numeric(nanoseconds), unit='ns', utc=True)
+
+
+def _typed(table):
+    """Convert the string columns of times and numbers"""
+    for name in table.columns:
+        column = table[name]
+        if not pd.api.types.is_object_dtype(column) and not pd.api.types.is_string_dtype(column):
+            continue
+        try:
+            if name == 'time' or name.endswith('Time'):
+                table[name] = _time_column(column)
+            else:
+                table[name] = pd.to_numeric(column)
+        except (ValueError, TypeError, AttributeError):
+            # Not a column of times or numbers
+            pass
+    return table
+
+
+def transaction_tables(transactions):
+    """Return a dict of a :class:`pandas.DataFrame` of each transaction type, ordered by ID
+
+    Columns are the flattened JSON representation of the transactions. Times are
+    converted to UTC datetimes and numbers to numeric columns.
+
+    Args:
+        transactions: Iterable of :class:`~async_v20.Transaction` or their JSON representation
+    """
+    records = {}
+    for transaction in transactions:
+        transaction = transaction_json(transaction)
+        records.setdefault(transaction['type'], []).append(transaction)
+    tables = {}
+    for typ, rows in records.items():
+        table = _typed(pd.json_normalize(rows, sep='_'))
+        tables[typ] = table.sort_values('id', kind='stable').reset_index(drop=True)
+    return tables
+
+
+class TransactionStore(object):
+    """Store downloaded transactions on disk
+
+    Args:
+        path: Directory the transactions are stored in. Created if it doesn't exist
+        codec: Name or :class:`~async_v20.codecs.Codec` used to encode the chunks
+    """
+
+    def __init__(self, path, codec=None):
+        self.path = os.fspath(path)
+        self.codec = get_codec(codec)
+        os.makedirs(self.path, exist_ok=True)
+
+    def __repr__(self):
+        return f'<TransactionStore {self.path}>'
+
+    def _directory(self, account_id, types):
+        types = ','.join(sorted(types)) if types else 'ALL'
+        return os.path.join(self.path, str(account_id), types)
+
+    def chunks(self, account_id, types=None):
+        """Return the set of (start, end) ID chunks stored"""
+        try:
+            files = os.listdir(self._directory(account_id, types))
+        except FileNotFoundError:
+            return set()
+        return {(int(match.group(1)), int(match.group(2)))
+                for match in map(CHUNK.fullmatch, files) if match}
+
+    def read(self, account_id, types, start, end):
+        """Return the JSON representation of the transactions of a stored chunk"""
+        with open(os.path.join(self._directory(account_id, types), f'{start}-{end}.json.gz'), 'rb') as f:
+            return self.codec.loads(gzip.decompress(f.read()))
+
+    def write(self, account_id, types, start, end, transactions):
+        """Store the transactions of a complete chunk"""
+        directory = self._directory(account_id, types)
+        os.makedirs(directory, exist_ok=True)
+        data = self.codec.dumpb([transaction_json(transaction) for transaction in transactions])
+        atomic_write(os.path.join(directory, f'{start}-{end}.json.gz'), gzip.compress(data, compresslevel=6))
+
+    def transactions(self, account_id, types=None, from_id=None, to_id=None):
+        """Iterate over the JSON representation of the stored transactions, ordered by ID"""
+        for start, end in sorted(self.chunks(account_id, types)):
+            if (from_id is not None and end < from_id) or (to_id is not None and start > to_id):
+                continue
+            yield from (transaction for transaction in self.read(account_id, types, start, end)
+                        if (from_id is None or int(transaction['id']) >= from_id)
+                        and (to_id is None or int(transaction['id']) <= to_id))
+
+    def tables(self, account_id, types=None, from_id=None, to_id=None):
+        """Return the stored transactions as tables. See :func:`transaction_tables`"""
+        return transaction_tables(self.transactions(account_id, types, from_id, to_id))
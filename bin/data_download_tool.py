@@ -17,6 +17,7 @@ parser.add_argument('--to-time', help='Get the required data up to this date', )
 parser.add_argument('--instrument', help='The instrument of the data to get')
 parser.add_argument('--granularity', help='The width of the candle to get')
 parser.add_argument('--out-file', help='The destination of the data')
+parser.add_argument('--store', help='Directory of a candle store. Stored candles are not downloaded again')
 
 granularity_to_minutes = {
     'S5': 416,
@@ -92,14 +93,25 @@ async def get_data(client, instrument_name, granularity, from_time, to_time):
     return df
 
 
+async def get_stored_data(client, instrument_name, granularity, from_time, to_time):
+    candles = await client.get_candles_range(instrument_name, from_time, to_time, price='MBA',
+                                             granularity=granularity, max_concurrency=6)
+    df = candles.dataframe(datetime_format='UNIX')
+    df.index = df.time
+    return df
+
+
 async def execute():
     namespace = parser.parse_args()
     from_time = datetime(*[int(i) for i in namespace.from_time.split('-')])
     to_time = datetime(*[int(i) for i in namespace.to_time.split('-')])
     granularity = namespace.granularity
     out_file = namespace.out_file
-    async with OandaClient(rest_timeout=120) as client:
-        df = await get_data(client, namespace.instrument, granularity, from_time, to_time)
+    async with OandaClient(rest_timeout=120, candle_store=namespace.store) as client:
+        if namespace.store:
+            df = await get_stored_data(client, namespace.instrument, granularity, from_time, to_time)
+        else:
+            df = await get_data(client, namespace.instrument, granularity, from_time, to_time)
     df.to_msgpack(out_file)
 
 
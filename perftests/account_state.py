@@ -0,0 +1,20 @@
+from timeit import timeit
+
+from async_v20.account_state import AccountState
+from perftests import accounts
+
+# Compare applying account changes to accounts with many open trades by
+# rebuilding the whole Account with applying them to an AccountState
+for trades in (5000, 20000):
+    account = accounts.account(trades=trades, orders=500)
+    changes, state = accounts.changes(trades=trades, orders=500)
+    account_state = AccountState(account)
+    number = 5
+    took = {
+        'rebuild Account': timeit(lambda: accounts.rebuild_account(account, changes, state), number=number),
+        'AccountState.apply_changes': timeit(lambda: account_state.apply_changes(changes, state), number=number),
+        'apply_changes + account()': timeit(lambda: (account_state.apply_changes(changes, state),
+                                                     account_state.account()), number=number),
+    }
+    for name, seconds in took.items():
+        print(f'{trades} trades. {name}: {seconds / number * 1000:.2f}ms per poll')
@@ -0,0 +1,133 @@
+"""Generated accounts and account changes of any size
+
+Used by the account state benchmark and the tests, so it doesn't depend on the
+test package.
+"""
+from itertools import chain
+
+from async_v20.definitions.types import Account, AccountChanges, AccountChangesState
+
+# The fields of an account other than its orders, trades and positions
+account_fields = {
+    'id': '123-123-12345678-123', 'createdTime': '2017-08-11T15:04:31.639182352Z', 'currency': 'AUD',
+    'createdByUserID': 6557245, 'alias': 'Primary', 'marginRate': '0.02', 'hedgingEnabled': False,
+    'lastTransactionID': '14', 'balance': '99999.9138', 'openTradeCount': 0, 'openPositionCount': 0,
+    'pendingOrderCount': 0, 'pl': '-0.0769', 'resettablePL': '-0.0769', 'financing': '-0.0093',
+    'commission': '0.0', 'unrealizedPL': '0.0', 'NAV': '99999.9138', 'marginUsed': '0.0',
+    'marginAvailable': '99999.9138', 'positionValue': '0.0', 'marginCloseoutUnrealizedPL': '0.0',
+    'marginCloseoutNAV': '99999.9138', 'marginCloseoutMarginUsed': '0.0', 'marginCloseoutPositionValue': '0.0',
+    'marginCloseoutPercent': '0.0', 'withdrawalLimit': '99999.9138', 'marginCallMarginUsed': '0.0',
+    'marginCallPercent': '0.0'}
+
+instruments = ('AUD_USD', 'EUR_USD', 'USD_JPY', 'GBP_USD')
+
+
+def trade(id_, units=1):
+    return {'id': str(id_), 'instrument': instruments[id_ % len(instruments)], 'price': '0.75247',
+            'openTime': '1513002646.623990650', 'state': 'OPEN', 'initialUnits': str(units),
+            'currentUnits': str(units), 'realizedPL': '0.0', 'financing': '0.0', 'unrealizedPL': '0.0'}
+
+
+def order(id_):
+    return {'id': str(id_), 'createTime': '1513002321.132048485', 'state': 'PENDING', 'type': 'LIMIT',
+            'instrument': instruments[id_ % len(instruments)], 'units': '1.0', 'price': '0.5',
+            'timeInForce': 'GTC', 'positionFill': 'DEFAULT', 'triggerCondition': 'DEFAULT'}
+
+
+def position(instrument, units=1):
+    side = {'units': str(units), 'pl': '0.0', 'resettablePL': '0.0', 'financing': '0.0', 'unrealizedPL': '0.0'}
+    return {'instrument': instrument, 'pl': '0.0', 'resettablePL': '0.0', 'commission': '0.0',
+            'unrealizedPL': '0.0', 'financing': '0.0', 'long': side, 'short': dict(side, units='0.0')}
+
+
+def account(trades=5000, orders=100):
+    """An Account with `trades` open trades and `orders` pending orders.
+    Trade ids start at 0, order ids at 1000000"""
+    data = dict(account_fields,
+                trades=[trade(i) for i in range(trades)],
+                orders=[order(1000000 + i) for i in range(orders)],
+                positions=[position(instrument) for instrument in instruments[:-1]])
+    return Account(**data)
+
+
+def changes(trades=5000, orders=100, closed=10, reduced=10, opened=10, state_trades=50):
+    """AccountChanges and AccountChangesState of the account created by account()"""
+    changes = {
+        'ordersCreated': [order(2000000 + i) for i in range(5)],
+        'ordersCancelled': [dict(order(1000000 + i), state='CANCELLED') for i in range(5)],
+        'ordersFilled': [dict(order(1000005 + i), state='FILLED') for i in range(5)],
+        'ordersTriggered': [],
+        'tradesOpened': [trade(trades + i) for i in range(opened)],
+        'tradesReduced': [trade(closed + i, units=0.5) for i in range(reduced)],
+        'tradesClosed': [dict(trade(i), state='CLOSED') for i in range(closed)],
+        'positions': [position('GBP_USD', 2)],
+        'transactions': [],
+    }
+    state = {
+        'unrealizedPL': '-0.0002', 'NAV': '4999.8836', 'marginUsed': '0.05', 'marginAvailable': '4999.8336',
+        'positionValue': '1.0', 'marginCloseoutUnrealizedPL': '-0.0001', 'marginCloseoutNAV': '4999.8837',
+        'marginCloseoutMarginUsed': '0.05', 'marginCloseoutPercent': '1e-05', 'withdrawalLimit': '4999.8336',
+        'marginCallMarginUsed': '0.05', 'marginCallPercent': '1e-05',
+        'orders': [{'id': str(1000010 + i), 'triggerDistance': '0.1', 'isTriggerDistanceExact': True}
+                   for i in range(min(5, orders))],
+        'trades': [{'id': str(trades - 1 - i), 'unrealizedPL': '-0.5', 'marginUsed': '0.05'}
+                   for i in range(state_trades)],
+        'positions': [{'instrument': 'AUD_USD', 'netUnrealizedPL': '-0.5', 'longUnrealizedPL': '-0.5',
+                       'shortUnrealizedPL': '0.0', 'marginUsed': '0.05'}],
+    }
+    return AccountChanges(**changes), AccountChangesState(**state)
+
+
+def rebuild_account(account, changes, changes_state):
+    """Return a new Account with the changes applied. Every order, trade and position
+    is recreated, as the client did before AccountState. Used to check and time
+    AccountState.apply_changes"""
+
+    # Add / Replace / Remove items from the AccountChanges object
+    orders = (order if not changes.orders_filled.get_id(order.id)
+              else changes.orders_filled.get_id(order.id)
+              for order in chain(account.orders, changes.orders_created)
+              if not changes.orders_cancelled.get_id(order.id)
+              and not changes.orders_filled.get_id(order.id))
+
+    trades = (trade if not changes.trades_reduced.get_id(trade.id)
+              else changes.trades_reduced.get_id(trade.id)
+              for trade in chain(account.trades, changes.trades_opened)
+              if not changes.trades_closed.get_id(trade.id))
+
+    # We need to replace any positions in the stored account with the changed positions
+    # and then we need to update the dynamic state
+    positions = {position.instrument: position
+                 for position in account.positions}
+
+    positions.update({
+        position.instrument: position for position in changes.positions
+    })
+
+    positions = ((position, changes_state.positions.get_instrument(instrument))
+                 for instrument, position in positions.items())
+
+    # Update the Dynamic state
+    orders = tuple(order if not changes_state.orders.get_id(order.id)
+                   else order.replace(**changes_state.orders.get_id(order.id).dict())
+                   for order in orders)
+
+    trades = tuple(trade if not changes_state.trades.get_id(trade.id)
+                   else trade.replace(**changes_state.trades.get_id(trade.id).dict())
+                   for trade in trades)
+
+    positions = tuple(
+        position.replace(
+            unrealized_pl=0,
+            long=position.long.replace(unrealized_pl=0),
+            short=position.short.replace(unrealized_pl=0))
+        if not state
+        else position.replace(
+            unrealized_pl=state.net_unrealized_pl,
+            long=position.long.replace(unrealized_pl=state.long_unrealized_pl),
+            short=position.short.replace(unrealized_pl=state.short_unrealized_pl))
+        for position, state in positions)
+
+    return account.replace(**dict(changes_state.dict(json=False),
+                                  orders=orders, trades=trades, positions=positions))
+
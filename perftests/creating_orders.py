@@ -1,11 +1,33 @@
 import asyncio
+import json
+from timeit import timeit
+
+from async_v20.definitions.types import ArrayInstrument, MarketOrderRequest
+from async_v20.definitions.types import StopLossDetails, TakeProfitDetails, TrailingStopLossDetails
+from async_v20.interface.helpers import OrderFormatter, _format_order_request
 from perftests.helpers import Time, client
+from tests.data.json_data import example_instruments
 
 
-print('Running creating_dataframe benchmark with async_v20 version', client.version)
+print('Running creating_orders benchmark with async_v20 version', client.version)
 loop = asyncio.get_event_loop()
 
-# This will test the speed of the _formatting_order_requests helper function
+# Compare formatting an OrderRequest into its JSON body one attribute at a time
+# with the instruments OrderFormatter
+instrument = ArrayInstrument(*json.loads(example_instruments)).get_instrument('AUD_USD')
+formatter = OrderFormatter(instrument)
+order_request = MarketOrderRequest(instrument='AUD_USD', units=1234.5678,
+                                   take_profit_on_fill=TakeProfitDetails(price=0.81234567),
+                                   stop_loss_on_fill=StopLossDetails(price=0.71234567),
+                                   trailing_stop_loss_on_fill=TrailingStopLossDetails(distance=0.0123456))
+number = 10000
+for name, format_order in (
+        ('_format_order_request', lambda: _format_order_request(order_request, instrument, True).dict(json=True)),
+        ('OrderFormatter.body', lambda: formatter.body(order_request, True))):
+    took = timeit(format_order, number=number)
+    print(f'{name}: {took / number * 1e6:.1f}us per order request')
+
+# This will test the speed of creating orders end to end. Requires perftests/server.py
 client.format_order_requests = True
 
 async def place_orders(count):
@@ -22,4 +44,4 @@ async def place_orders(count):
 
 with Time() as t:
     for _ in range(10):
-        loop.run_until_complete(place_orders(500))
\ No newline at end of file
+        loop.run_until_complete(place_orders(500))
@@ -0,0 +1,77 @@
+import asyncio
+from multiprocessing import Process
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from time import time
+
+import ujson as json
+from aiohttp import web
+
+from perftests.helpers import client
+from tests.fixtures.routes import routes
+from tests.fixtures.server import handler
+
+# Build a 5000 candle response, the largest get_candles will return
+candle = {'time': '1509126185.000000000', 'volume': 1, 'complete': True,
+          'mid': {'o': '0.76596', 'h': '0.76596', 'l': '0.76596', 'c': '0.76596'}}
+candles_response = json.dumps({'instrument': 'AUD_USD', 'granularity': 'S5',
+                               'candles': [candle for _ in range(5000)]})
+routes.update({('GET', '/v3/instruments/AUD_USD/candles'): candles_response})
+
+print('Running event_loop_stall benchmark with async_v20 version', client.version)
+
+
+async def monitor(stop, interval=0.001):
+    """Record how late this coroutine is woken while the event loop is busy"""
+    stalls = []
+    while not stop.is_set():
+        start = time()
+        await asyncio.sleep(interval)
+        stalls.append(time() - start - interval)
+    return sorted(stalls)
+
+
+async def event_loop_stall(repeats):
+    stop = asyncio.Event()
+    stall = asyncio.ensure_future(monitor(stop))
+    start = time()
+    for _ in range(repeats):
+        await client.get_candles('AUD_USD')
+    took = time() - start
+    stop.set()
+    return took, await stall
+
+
+async def start_server():
+    loop = asyncio.get_event_loop()
+    await loop.create_server(web.Server(handler), '127.0.0.1', 8080)
+
+
+def serve():
+    # The server runs in its own process so it doesn't stall the clients event loop
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(start_server())
+    loop.run_forever()
+
+
+async def main():
+    await client.initialize()
+    for name, threshold, executor in (('event loop', None, None),
+                                      ('thread pool', 0, ThreadPoolExecutor(max_workers=1)),
+                                      ('process pool', 0, ProcessPoolExecutor(max_workers=1))):
+        client.large_response_threshold = threshold
+        client.executor = executor
+        took, stalls = await event_loop_stall(20)
+        print(f'{name}: took {took:.3f}s, event loop stall '
+              f'p99 {stalls[int(len(stalls) * 0.99)] * 1000:.1f}ms max {stalls[-1] * 1000:.1f}ms')
+        if executor is not None:
+            executor.shutdown()
+    await client.close()
+
+
+if __name__ == "__main__":
+    server = Process(target=serve, daemon=True)
+    server.start()
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(asyncio.sleep(1))  # Wait for the server to start
+    loop.run_until_complete(main())
+    server.terminate()
@@ -0,0 +1,22 @@
+from timeit import timeit
+
+from async_v20 import __version__
+from async_v20.codecs import get_codec
+from tests.fixtures.static import get_account_details_response, get_candles_response, price_stream
+
+print('Running json_codecs benchmark with async_v20 version', __version__)
+
+payloads = {'account': get_account_details_response.encode(),
+            'candles': get_candles_response.encode(),
+            'stream': price_stream.encode()}
+
+repeats = 2000
+
+for name in ('json', 'ujson', 'orjson'):
+    codec = get_codec(name)
+    for payload_name, payload in payloads.items():
+        decoded = codec.loads(payload)
+        loads = timeit(lambda: codec.loads(payload), number=repeats)
+        dumpb = timeit(lambda: codec.dumpb(decoded), number=repeats)
+        print(f'{name:>6} {payload_name:>7}: loads {loads / repeats * 1e6:8.1f}us '
+              f'dumpb {dumpb / repeats * 1e6:8.1f}us')
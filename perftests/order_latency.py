@@ -0,0 +1,69 @@
+import asyncio
+from multiprocessing import Process
+from time import time
+
+from aiohttp import web
+
+from async_v20 import OandaClient
+from tests.fixtures import server as server_module
+
+# Every request takes this long to respond
+server_module.sleep_time = 0.05
+
+client = OandaClient(rest_host='127.0.0.1', rest_port=8080, rest_scheme='http',
+                     stream_host='127.0.0.1', stream_port=8080, stream_scheme='http',
+                     health_host='127.0.0.1', health_port=8080, health_scheme='http',
+                     rest_timeout=60, max_simultaneous_connections=5, max_requests_per_second=99999,
+                     token='')
+
+print('Running order_latency benchmark with async_v20 version', client.version)
+
+
+async def handler(request):
+    server_module.status = 201 if request.method == 'POST' else 200
+    return await server_module.handler(request)
+
+
+async def create_order(priority, delay):
+    await asyncio.sleep(delay)
+    start = time()
+    await client.create_order('AUD_USD', 10, priority=priority)
+    return time() - start
+
+
+async def order_latency(priority, backfill=200, orders=10, interval=0.1):
+    """Create orders while `backfill` candle requests are queued"""
+    backfill = asyncio.ensure_future(asyncio.gather(*[client.get_candles('AUD_USD') for _ in range(backfill)]))
+    latencies = await asyncio.gather(*[create_order(priority, i * interval) for i in range(1, orders + 1)])
+    await backfill
+    return sorted(latencies)
+
+
+async def start_server():
+    loop = asyncio.get_event_loop()
+    await loop.create_server(web.Server(handler), '127.0.0.1', 8080)
+
+
+def serve():
+    # The server runs in its own process so it doesn't stall the clients event loop
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(start_server())
+    loop.run_forever()
+
+
+async def main():
+    await client.initialize()
+    for name, priority in (('trading priority', None), ('same priority as backfill', 'history')):
+        latencies = await order_latency(priority)
+        print(f'{name}: order latency median {latencies[len(latencies) // 2] * 1000:.1f}ms '
+              f'max {latencies[-1] * 1000:.1f}ms')
+    await client.close()
+
+
+if __name__ == "__main__":
+    server = Process(target=serve, daemon=True)
+    server.start()
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(asyncio.sleep(1))  # Wait for the server to start
+    loop.run_until_complete(main())
+    server.terminate()
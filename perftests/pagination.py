@@ -0,0 +1,95 @@
+import asyncio
+import gzip
+import json
+from multiprocessing import Process
+from time import time
+
+from aiohttp import web
+
+from async_v20 import OandaClient
+from tests.fixtures.routes import routes
+from tests.fixtures.server import rest_headers
+from tests.test_interface.test_transaction_download import transaction
+
+# Every request takes this long to respond
+sleep_time = 0.05
+
+# The consumer takes this long to process each page
+processing_time = 0.05
+
+pages = 20
+page_size = 1000
+
+# The gzip compressed body of each page
+bodies = {}
+
+
+def create_client(**kwargs):
+    return OandaClient(rest_host='127.0.0.1', rest_port=8080, rest_scheme='http',
+                       stream_host='127.0.0.1', stream_port=8080, stream_scheme='http',
+                       health_host='127.0.0.1', health_port=8080, health_scheme='http',
+                       account_id='123-123-12345678-123', health_check=False,
+                       rest_timeout=60, max_requests_per_second=99999, token='test', **kwargs)
+
+
+async def handler(request):
+    await asyncio.sleep(sleep_time)
+    if request.path.endswith('/idrange'):
+        body = bodies[int(request.query['from'])]
+    else:
+        body = gzip.compress((routes[(request.method, request.path)] or 'null').encode())
+    return web.Response(body=body, headers=rest_headers)
+
+
+async def start_server():
+    for start in range(1, pages * page_size, page_size):
+        body = json.dumps({'transactions': [transaction(i) for i in range(start, start + page_size)]})
+        bodies[start] = gzip.compress(body.encode())
+    loop = asyncio.get_event_loop()
+    await loop.create_server(web.Server(handler), '127.0.0.1', 8080)
+
+
+def serve():
+    # The server runs in its own process so it doesn't stall the clients event loop
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(start_server())
+    loop.run_forever()
+
+
+async def process(transaction):
+    if transaction.id % page_size == 0:
+        await asyncio.sleep(processing_time)
+
+
+async def manual_loop(client):
+    """Request each page after the previous page has been processed"""
+    for start in range(1, pages * page_size, page_size):
+        response = await client.transaction_range(start, start + page_size - 1)
+        for transaction in response.transactions:
+            await process(transaction)
+
+
+async def iterate(client, prefetch):
+    async for transaction in client.iter_transactions(1, pages * page_size, prefetch=prefetch):
+        await process(transaction)
+
+
+async def main():
+    async with create_client() as client:
+        start = time()
+        await manual_loop(client)
+        print(f'{pages} pages. transaction_range loop: {time() - start:.2f}s')
+        for prefetch in (1, 2):
+            start = time()
+            await iterate(client, prefetch)
+            print(f'{pages} pages. iter_transactions prefetch={prefetch}: {time() - start:.2f}s '
+                  f'({sleep_time * 1000:.0f}ms per response, {processing_time * 1000:.0f}ms processing per page)')
+
+
+if __name__ == '__main__':
+    server = Process(target=serve, daemon=True)
+    server.start()
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(asyncio.sleep(2))  # Wait for the server to start
+    loop.run_until_complete(main())
+    server.terminate()
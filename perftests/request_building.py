@@ -0,0 +1,50 @@
+from timeit import timeit
+
+from async_v20 import endpoints
+from async_v20.definitions.types import AccountID, InstrumentName, TradeSpecifier
+from async_v20.definitions.types import PriceComponent, CandlestickGranularity
+from async_v20.endpoints.annotations import Count
+from async_v20.interface.helpers import create_body, create_request_kwargs, create_url, header_params, query_params
+from perftests.helpers import client
+
+print('Running request_building benchmark with async_v20 version', client.version)
+
+client.default_parameters[AccountID] = AccountID('123-123-12345678-123')
+
+
+def create_request_kwargs_without_plan(self, endpoint, arguments):
+    """The request building stage before RequestPlans were introduced"""
+    json = create_body(self, endpoint.request_schema, arguments)
+    headers = header_params(self, endpoint, arguments)
+    data = None
+    if json:
+        data = self.json_codec.dumpb(json)
+        headers.update({'Content-Type': 'application/json'})
+    url = create_url(self, endpoint, arguments)
+    parameters = query_params(self, endpoint, arguments)
+    request_kwargs = {}
+    for parameter, value in (('method', endpoint.method), ('url', url), ('headers', headers),
+                             ('params', parameters), ('data', data)):
+        if value:
+            request_kwargs.update({parameter: value})
+    return request_kwargs
+
+
+requests = {
+    'GETInstrumentsCandles': (endpoints.GETInstrumentsCandles,
+                              {InstrumentName: InstrumentName('AUD_USD'), Count: Count(500),
+                               PriceComponent: PriceComponent('M'),
+                               CandlestickGranularity: CandlestickGranularity('S5')}),
+    'GETTradeSpecifier': (endpoints.GETTradeSpecifier, {TradeSpecifier: TradeSpecifier(1234)}),
+    'GETAccounts': (endpoints.GETAccounts, {}),
+}
+
+repeats = 20000
+
+for name, (endpoint, arguments) in requests.items():
+    assert create_request_kwargs(client, endpoint, arguments) == \
+           create_request_kwargs_without_plan(client, endpoint, arguments)
+    before = timeit(lambda: create_request_kwargs_without_plan(client, endpoint, arguments), number=repeats)
+    after = timeit(lambda: create_request_kwargs(client, endpoint, arguments), number=repeats)
+    print(f'{name:>22}: without plan {before / repeats * 1e6:6.1f}us '
+          f'with plan {after / repeats * 1e6:6.1f}us')
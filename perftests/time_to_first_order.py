@@ -0,0 +1,67 @@
+import asyncio
+from multiprocessing import Process
+from time import time
+
+from aiohttp import web
+
+from async_v20 import OandaClient
+from tests.fixtures import server as server_module
+
+# Every request takes this long to respond
+server_module.sleep_time = 0.05
+
+
+def create_client(**kwargs):
+    return OandaClient(rest_host='127.0.0.1', rest_port=8080, rest_scheme='http',
+                       stream_host='127.0.0.1', stream_port=8080, stream_scheme='http',
+                       health_host='127.0.0.1', health_port=8080, health_scheme='http',
+                       rest_timeout=60, max_requests_per_second=99999, token='test', **kwargs)
+
+
+print('Running time_to_first_order benchmark with async_v20 version', create_client().version)
+
+
+async def handler(request):
+    server_module.status = 201 if request.method == 'POST' else 200
+    return await server_module.handler(request)
+
+
+async def time_to_first_order(**kwargs):
+    """Time from constructing the client to the response of its first order.
+    Initialization is started by the order"""
+    start = time()
+    client = create_client(**kwargs)
+    await client.create_order('AUD_USD', 10)
+    took = time() - start
+    await client.close()
+    return took
+
+
+async def start_server():
+    loop = asyncio.get_event_loop()
+    await loop.create_server(web.Server(handler), '127.0.0.1', 8080)
+
+
+def serve():
+    # The server runs in its own process so it doesn't stall the clients event loop
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(start_server())
+    loop.run_forever()
+
+
+async def main(runs=10):
+    for name, kwargs in (('account listed', {}),
+                         ('account_id passed', {'account_id': '123-123-12345678-123'})):
+        times = sorted([await time_to_first_order(**kwargs) for _ in range(runs)])
+        print(f'{name}: time to first order median {times[len(times) // 2] * 1000:.1f}ms '
+              f'max {times[-1] * 1000:.1f}ms '
+              f'({server_module.sleep_time * 1000:.0f}ms per response)')
+
+
+if __name__ == '__main__':
+    server = Process(target=serve, daemon=True)
+    server.start()
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(asyncio.sleep(1))  # Wait for the server to start
+    loop.run_until_complete(main())
+    server.terminate()
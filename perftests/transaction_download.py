@@ -0,0 +1,94 @@
+import asyncio
+import gzip
+import json
+from multiprocessing import Process
+from time import time
+
+from aiohttp import web
+
+from async_v20 import OandaClient
+from tests.fixtures.routes import routes
+from tests.fixtures.server import rest_headers
+from tests.test_interface.test_transaction_download import transaction
+
+# Every request takes this long to respond
+sleep_time = 0.05
+
+transactions = 100000
+account = '/v3/accounts/123-123-12345678-123'
+pages = [f'https://localhost{account}/transactions/idrange?from={start}&to={start + 999}'
+         for start in range(1, transactions, 1000)]
+responses = {
+    f'{account}/transactions': json.dumps({'pages': pages, 'count': transactions,
+                                           'lastTransactionID': str(transactions)}),
+}
+
+
+def create_client(**kwargs):
+    return OandaClient(rest_host='127.0.0.1', rest_port=8080, rest_scheme='http',
+                       stream_host='127.0.0.1', stream_port=8080, stream_scheme='http',
+                       health_host='127.0.0.1', health_port=8080, health_scheme='http',
+                       account_id='123-123-12345678-123', health_check=False,
+                       rest_timeout=60, max_requests_per_second=99999, token='test', **kwargs)
+
+
+# The gzip compressed body of each page
+bodies = {}
+
+
+async def handler(request):
+    await asyncio.sleep(sleep_time)
+    if request.path.endswith('/idrange'):
+        body = bodies[int(request.query['from'])]
+    else:
+        # Initialization requests are answered by the test server routes
+        body = gzip.compress((responses.get(request.path) or routes[(request.method, request.path)]).encode())
+    return web.Response(body=body, headers=rest_headers)
+
+
+async def start_server():
+    for start in range(1, transactions, 1000):
+        body = json.dumps({'transactions': [transaction(i) for i in range(start, start + 1000)],
+                           'lastTransactionID': str(transactions)})
+        bodies[start] = gzip.compress(body.encode())
+    loop = asyncio.get_event_loop()
+    await loop.create_server(web.Server(handler), '127.0.0.1', 8080)
+
+
+def serve():
+    # The server runs in its own process so it doesn't stall the clients event loop
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(start_server())
+    loop.run_forever()
+
+
+async def sequential(client):
+    """Request each page one after another"""
+    received = []
+    for start in range(1, transactions, 1000):
+        response = await client.transaction_range(start, start + 999)
+        received.extend(response.transactions._items)
+    return received
+
+
+async def main():
+    async with create_client() as client:
+        start = time()
+        received = await sequential(client)
+        print(f'{len(received)} transactions. transaction_range one page at a time: {time() - start:.2f}s')
+
+        for max_concurrency in (4, 16):
+            start = time()
+            tables = await client.download_transactions(max_concurrency=max_concurrency)
+            print(f'{sum(map(len, tables.values()))} transactions. download_transactions '
+                  f'max_concurrency={max_concurrency}: {time() - start:.2f}s '
+                  f'({sleep_time * 1000:.0f}ms per response)')
+
+
+if __name__ == '__main__':
+    server = Process(target=serve, daemon=True)
+    server.start()
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(asyncio.sleep(5))  # Wait for the server to start
+    loop.run_until_complete(main())
+    server.terminate()
@@ -0,0 +1,33 @@
+from timeit import timeit
+
+from async_v20.definitions.types import ArrayTransaction
+from async_v20.transaction_history import TransactionHistory
+from tests.test_interface.test_transaction_history import transaction
+
+
+def sorted_array(transactions, history, max_size):
+    """How the transaction history was kept before TransactionHistory"""
+    return ArrayTransaction(*sorted((transactions + history)[-max_size:], key=lambda x: x.id, reverse=True))
+
+
+# Compare adding the transactions of an account_changes poll to a full history
+# of `max_size` transactions
+for max_size in (100, 10000, 100000):
+    history = TransactionHistory(max_size)
+    history.extend(transaction(i) for i in range(max_size))
+    array = ArrayTransaction(*(transaction(i) for i in range(max_size)))
+    polls = iter(range(max_size, max_size * 100, 10))
+
+    def poll():
+        start = next(polls)
+        return ArrayTransaction(*(transaction(i) for i in range(start, start + 10)))
+
+    number = 5 if max_size > 10000 else 20
+    took = {
+        'sorted ArrayTransaction': timeit(lambda: sorted_array(poll(), array, max_size), number=number),
+        'TransactionHistory.extend': timeit(lambda: history.extend(poll()), number=number),
+        'TransactionHistory.get_id': timeit(lambda: history.get_id(history.last_id - max_size // 2), number=number),
+        'TransactionHistory.range': timeit(lambda: history.range(history.last_id - 10), number=number),
+    }
+    for name, seconds in took.items():
+        print(f'{max_size} transactions. {name}: {seconds / number * 1000:.3f}ms')
@@ -17,11 +17,13 @@ setup(name='async_v20',
       url='https://github.com/jamespeterschinner/async_v20',
       license='MIT',
       packages=find_packages(),
+      python_requires='>=3.7',
       install_requires=['aiohttp>=3.0.0',
                         'ujson>=1.35',
                         'yarl>=0.12.0',
-                        'pandas'],
-      classifiers=['Programming Language :: Python :: 3.6', 'Development Status :: 4 - Beta',
+                        'pandas>=1.1',
+                        'numpy'],
+      classifiers=['Programming Language :: Python :: 3.7', 'Development Status :: 4 - Beta',
                    'Framework :: AsyncIO',
                    'Intended Audience :: Developers',
                    'License :: OSI Approved :: MIT License',
@@ -0,0 +1,2 @@
+"""Generated accounts and account changes of any size"""
+from perftests.accounts import instruments, trade, order, position, account, changes, rebuild_account
@@ -33,6 +33,11 @@ status = 200
 received = ""
 sleep_time = 0
 
+stream_paths = (
+    "/v3/accounts/123-123-12345678-123/pricing/stream",
+    "/v3/accounts/123-123-12345678-123/transactions/stream",
+)
+
 
 def get_id_from_path(path):
     try:
@@ -82,7 +87,7 @@ async def handler(request):
     if response_data is None:
         response_data = "null"
 
-    if path == "/v3/accounts/123-123-12345678-123/pricing/stream":
+    if path in stream_paths:
         resp = web.StreamResponse(
             headers=stream_headers, status=response_status, reason="OK"
         )
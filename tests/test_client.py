@@ -2,7 +2,7 @@ import asyncio
 import inspect
 import os
 import time
-from itertools import chain
+from itertools import chain, repeat
 
 import pytest
 from aiohttp.client_exceptions import ContentTypeError
@@ -111,6 +111,37 @@ async def test_client_raises_error_on_get_instruments_failure(
     assert client.initializing == False
 
 
+@pytest.mark.asyncio
+async def test_initialization_failure_is_raised_to_all_waiters(client, server):
+    server_module.status = chain([400], repeat(200))
+    start = time.time()
+    results = await asyncio.gather(
+        *[client.initialize() for _ in range(5)], return_exceptions=True
+    )
+    assert time.time() - start < 0.5
+    assert all(isinstance(result, InitializationFailure) for result in results)
+    assert client.initialized == False
+    assert client.initializing == False
+    # The next call initializes again
+    assert await client.initialize()
+    assert client.initialized
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_initialization_requests_account_and_instruments_concurrently(
+    client, server
+):
+    client.account_id = "123-123-12345678-123"
+    server_module.sleep_time = 0.2
+    start = time.time()
+    async with client as client:
+        assert client.initialized
+        assert len(client.instruments)
+        # Account details and instruments take one response time, not two
+        assert time.time() - start < 0.4
+
+
 @pytest.mark.asyncio
 async def test_initialize_works_with_preset_account_id(client, server):
     client.account_id = "123-123-12345678-123"
@@ -161,6 +192,10 @@ async def test_response_returns_json(client, server):
 def test_client_request_limiter_minimum_value(client):
     client.max_requests_per_second = 0
     assert client.max_requests_per_second == 1
+    client.max_requests_per_second = -5
+    assert client.max_requests_per_second == 1
+    assert client.rate_limiters['REST'].max_rate == 1
+    assert OandaClient(token='test', max_requests_per_second=-5).max_requests_per_second == 1
 
 
 @pytest.mark.asyncio
@@ -205,7 +240,7 @@ async def test_client_handles_multiple_concurrent_initializations(
     data = tuple(
         get_valid_primitive_data(param.annotation)
         for param in method[1].__signature__.parameters.values()
-        if param.name not in "self cls"
+        if param.name not in "self cls" and param.kind is not param.KEYWORD_ONLY
     )
 
     method = getattr(client, method[0])
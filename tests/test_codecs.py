@@ -0,0 +1,92 @@
+import pytest
+
+from async_v20.client import OandaClient
+from async_v20.codecs import Codec, JSONCodec, UJSONCodec, ORJSONCodec, get_codec
+from async_v20.definitions.types import Account
+from async_v20.definitions.types import OrderRequest
+from async_v20.endpoints import POSTOrders
+from async_v20.exceptions import InvalidValue
+from async_v20.interface.helpers import create_request_kwargs
+from .data.json_data import GETAccountID_response
+from .fixtures import server as server_module
+from .fixtures.client import client
+from .fixtures.static import get_account_details_response, get_candles_response, price_stream
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+codec_names = ['json', 'ujson', 'orjson']
+
+
+@pytest.mark.parametrize('name', codec_names)
+@pytest.mark.parametrize('payload', [get_account_details_response, get_candles_response, price_stream])
+def test_codecs_decode_str_and_bytes(name, payload):
+    codec = get_codec(name)
+    assert codec.loads(payload) == codec.loads(payload.encode())
+    assert codec.loads(codec.dumps(codec.loads(payload))) == codec.loads(payload)
+    assert codec.loads(codec.dumpb(codec.loads(payload))) == codec.loads(payload)
+
+
+def test_get_codec_returns_correct_codec():
+    assert type(get_codec()) == UJSONCodec
+    assert type(get_codec('json')) == JSONCodec
+    assert type(get_codec('orjson')) == ORJSONCodec
+    codec = JSONCodec()
+    assert get_codec(codec) is codec
+
+
+def test_get_codec_raises_error_for_unknown_codec():
+    with pytest.raises(InvalidValue):
+        get_codec('not a codec')
+
+
+def test_codec_base_class_encodes_bytes_from_dumps():
+    class Codec_(Codec):
+        def dumps(self, obj):
+            return '{}'
+
+    assert Codec_().dumpb({}) == b'{}'
+
+
+def test_client_accepts_codec():
+    assert type(OandaClient(token='test', json_codec='orjson').json_codec) == ORJSONCodec
+    assert type(OandaClient(token='test').json_codec) == UJSONCodec
+
+
+@pytest.mark.parametrize('name', codec_names)
+def test_model_json_uses_codec(name):
+    account = Account(**GETAccountID_response['account'])
+    assert get_codec(name).loads(account.json(codec=name)) == get_codec(name).loads(account.json())
+
+
+@pytest.mark.asyncio
+async def test_order_request_json_is_the_same_for_all_codecs(client, server):
+    await client.initialize()
+    client.format_order_requests = True
+    arguments = {OrderRequest: OrderRequest(instrument='AUD_USD', units=1.123456789, price=0.123456789,
+                                            take_profit_on_fill=0.75, stop_loss_on_fill=0.7)}
+    bodies = []
+    for name in codec_names:
+        client.json_codec = get_codec(name)
+        bodies.append(create_request_kwargs(client, POSTOrders, arguments)['data'])
+    decoded = [get_codec('json').loads(body) for body in bodies]
+    assert all(body == decoded[0] for body in decoded)
+    assert decoded[0]['order']['units'] == '1.0'
+    assert decoded[0]['order']['price'] == '0.12346'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('name', codec_names)
+async def test_client_parses_responses_with_codec(name, server):
+    client = OandaClient(token='test', rest_host='127.0.0.1', rest_port=8080, rest_scheme='http',
+                         stream_host='127.0.0.1', stream_port=8080, stream_scheme='http',
+                         health_host='127.0.0.1', health_port=8080, health_scheme='http',
+                         json_codec=name)
+    async with client as client:
+        response = await client.get_account_details()
+    assert response.codec is client.json_codec
+    assert get_codec(name).loads(response.json()) == get_codec(name).loads(get_account_details_response)
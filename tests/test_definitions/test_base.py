@@ -178,6 +178,20 @@ def test_array_get_id_returns_id():
     assert transactions.get_id(123) == None
 
 
+def test_array_raw_items_returns_items_without_creating_objects():
+    data = json.loads(example_transactions)
+    transactions = ArrayTransaction(*data)
+    assert transactions.raw_items() == tuple(data)
+    assert transactions.items == []
+
+
+def test_array_ids_returns_ids_without_creating_objects():
+    data = json.loads(example_transactions)
+    transactions = ArrayTransaction(*data)
+    assert list(transactions.ids()) == [transaction['id'] for transaction in data]
+    assert transactions.items == []
+
+
 def test_array_get_instrument_returns_instrument():
     positions = ArrayPosition(*json.loads(example_positions))
 
@@ -0,0 +1,102 @@
+import pytest
+
+from async_v20 import AccountID, OandaClient
+from async_v20.client import AccountClient
+from async_v20.endpoints.annotations import Authorization
+from .test_coalesce import count_requests
+from ..fixtures.client import client
+from ..fixtures import server as server_module
+from ..fixtures.routes import routes
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+account_ids = [f'123-123-12345678-{i:03}' for i in range(100)]
+
+
+@pytest.fixture
+def accounts():
+    """Serve the account details and instruments of every account in account_ids"""
+    added = {}
+    for account_id in account_ids:
+        for path in ('', '/instruments'):
+            added[('GET', f'/v3/accounts/{account_id}{path}')] = \
+                routes[('GET', f'/v3/accounts/123-123-12345678-123{path}')]
+    routes.update(added)
+    yield account_ids
+    for key in added:
+        del routes[key]
+
+
+def test_clients_have_their_own_default_parameters():
+    clients = [OandaClient(token=token) for token in ('first', 'second')]
+    assert clients[0].default_parameters is not clients[1].default_parameters
+    assert clients[0].default_parameters[Authorization] == 'Bearer first'
+    assert clients[1].default_parameters[Authorization] == 'Bearer second'
+
+
+@pytest.mark.asyncio
+async def test_account_client_shares_the_clients_connections_and_metadata(client, server):
+    async with client as client:
+        account_client = client.account_client(account_ids[0])
+        assert isinstance(account_client, AccountClient)
+        assert client.account_client(account_ids[0]) is account_client
+        assert account_client.account_client(account_ids[1]) is client.accounts[account_ids[1]]
+        assert account_client.sessions is client.sessions
+        assert account_client.session is client.session
+        assert account_client.rate_limiters is client.rate_limiters
+        assert account_client.scheduler is client.scheduler
+        assert account_client.instruments is client.instruments
+        assert account_client.default_parameters is not client.default_parameters
+        assert account_client.default_parameters[Authorization] == client.default_parameters[Authorization]
+        assert AccountID not in account_client.default_parameters
+        assert not account_client.initialized
+    # Closing the account client doesn't close the shared session
+    await account_client.close()
+    assert client.session.closed
+
+
+@pytest.mark.asyncio
+async def test_account_client_created_before_initialization_follows_the_client(client, server):
+    account_client = client.account_client(account_ids[0])
+    async with client as client:
+        assert account_client.connection_pools is client.connection_pools is not None
+        assert account_client.session is client.session
+        client.rest_timeout = 3
+        client.max_requests_per_second = 5
+        assert account_client.rest_timeout == 3
+        assert account_client.max_requests_per_second == 5
+        # Shared settings changed on the account client change for every account
+        account_client.max_simultaneous_connections = 4
+        assert client.max_simultaneous_connections == 4
+        assert client.scheduler.max_connections == 4
+        assert client.connection_pools.limits['REST'] == 4
+    await account_client.close()
+
+
+@pytest.mark.asyncio
+async def test_account_clients_initialize_each_account(client, server, accounts):
+    await client.initialize_session()
+    sent = count_requests(client)
+    account_clients = await client.account_clients(accounts)
+    paths = [kwargs['url'].path for kwargs in sent]
+    assert all(account_client.initialized for account_client in account_clients)
+    assert [account_client.default_parameters[AccountID] for account_client in account_clients] == accounts
+    assert not client.initialized
+    # Every account is requested. The shared instruments only once
+    assert len(paths) == len(accounts) + 1
+    assert len([path for path in paths if path.endswith('/instruments')]) == 1
+    assert len(client.instruments)
+    assert len({id(account_client._account) for account_client in account_clients}) == len(accounts)
+
+
+@pytest.mark.asyncio
+async def test_account_clients_lists_accounts(client, server):
+    async with client as client:
+        account_clients = await client.account_clients()
+        assert [account_client.account_id for account_client in account_clients] == ['123-123-12345678-123']
+        assert account_clients[0].initialized
@@ -0,0 +1,182 @@
+import asyncio
+import json
+
+import pytest
+
+from async_v20 import LastTransactionID, SinceTransactionID
+from async_v20.account_state import AccountState
+from async_v20.endpoints.transaction import GETTransactionsStream
+from ..fixtures import accounts
+from ..fixtures.client import client
+from ..fixtures.routes import routes
+from ..fixtures import server as server_module
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+
+def account_json(account):
+    data = account.dict(json=True, datetime_format='UNIX')
+    # Orders and trades are kept in id order
+    for key in ('orders', 'trades', 'positions'):
+        data[key] = sorted(data[key], key=lambda x: (x.get('id', ''), x.get('instrument', '')))
+    return data
+
+
+@pytest.mark.parametrize('trades, orders', [(0, 0), (50, 20), (500, 20)])
+def test_apply_changes_matches_rebuilding_the_account(trades, orders):
+    account = accounts.account(trades, orders)
+    changes, state = accounts.changes(trades, orders, state_trades=min(trades, 50))
+    account_state = AccountState(account)
+    account_state.apply_changes(changes, state)
+    assert account_json(account_state.account()) == account_json(accounts.rebuild_account(account, changes, state))
+
+    # Applying the same changes again changes nothing
+    applied = account_json(account_state.account())
+    account_state.apply_changes(changes, state)
+    assert account_json(account_state.account()) == applied
+
+
+def test_account_is_created_only_after_changes():
+    account = accounts.account(10, 10)
+    account_state = AccountState(account)
+    assert account_state.account() is account
+    changes, state = accounts.changes(10, 10, closed=2, reduced=2, opened=1, state_trades=2)
+    version = account_state.version
+    account_state.apply_changes(changes, state)
+    assert account_state.version == version + 1
+    view = account_state.account()
+    assert account_state.account() is view
+    assert len(view.trades) == 9
+    assert account_state.trades['2'].current_units == 0.5
+    assert account_state.trades['9'].unrealized_pl == -0.5
+    assert '1000000' not in account_state.orders
+    assert '2000000' in account_state.orders
+    assert account_state.get('nav') == view.nav == 4999.8836
+
+    assert account_state.remove_trade(9).id == 9
+    assert account_state.remove_trade(9) is None
+    assert account_state.account() is not view
+    assert len(account_state.account().trades) == 8
+
+
+time = '1513002646.623990650'
+
+# A limit order created and cancelled. A market order filled opening a trade,
+# which has its take profit order created and filled
+transactions = [
+    {'id': '10548', 'type': 'LIMIT_ORDER', 'instrument': 'GBP_USD', 'units': '10', 'price': '0.7',
+     'timeInForce': 'GTC', 'positionFill': 'DEFAULT', 'triggerCondition': 'DEFAULT', 'reason': 'CLIENT_ORDER'},
+    {'id': '10549', 'type': 'MARKET_ORDER', 'instrument': 'GBP_USD', 'units': '5', 'timeInForce': 'FOK',
+     'positionFill': 'DEFAULT', 'reason': 'CLIENT_ORDER'},
+    {'id': '10550', 'type': 'ORDER_FILL', 'orderID': '10549', 'instrument': 'GBP_USD', 'units': '5',
+     'price': '0.75', 'pl': '0.0', 'accountBalance': '1000.0', 'reason': 'MARKET_ORDER',
+     'tradeOpened': {'tradeID': '10550', 'units': '5', 'price': '0.75'}},
+    {'id': '10551', 'type': 'TAKE_PROFIT_ORDER', 'tradeID': '10550', 'price': '0.8', 'timeInForce': 'GTC',
+     'triggerCondition': 'DEFAULT', 'reason': 'ON_FILL'},
+    {'id': '10552', 'type': 'ORDER_CANCEL', 'orderID': '10548', 'reason': 'CLIENT_REQUEST'},
+    {'id': '10553', 'type': 'TRADE_CLIENT_EXTENSIONS_MODIFY', 'tradeID': '10550',
+     'tradeClientExtensionsModify': {'comment': 'modified'}},
+    {'id': '10554', 'type': 'ORDER_FILL', 'orderID': '10551', 'instrument': 'GBP_USD', 'units': '-2',
+     'price': '0.8', 'pl': '0.1', 'accountBalance': '1000.1', 'reason': 'TAKE_PROFIT_ORDER',
+     'tradeReduced': {'tradeID': '10550', 'units': '-2', 'realizedPL': '0.1'}},
+    {'id': '10555', 'type': 'ORDER_FILL', 'orderID': '10556', 'instrument': 'GBP_USD', 'units': '-3',
+     'price': '0.8', 'pl': '0.15', 'accountBalance': '1000.25', 'reason': 'MARKET_ORDER_TRADE_CLOSE',
+     'tradesClosed': [{'tradeID': '10550', 'units': '-3', 'realizedPL': '0.15'}]},
+]
+transactions = [dict(transaction, time=time) for transaction in transactions]
+
+
+def transaction(data):
+    """The transaction as created from the transaction stream"""
+    return GETTransactionsStream.responses[200][data['type']](**data)
+
+
+def test_apply_transaction_updates_orders_trades_and_positions():
+    account_state = AccountState(accounts.account(trades=0, orders=0))
+    applied = [account_state.apply_transaction(transaction(data)) for data in transactions[:4]]
+    assert applied == [True, False, True, True]
+    assert set(account_state.orders) == {'10548', '10551'}
+    assert account_state.orders['10548'].type == 'LIMIT'
+    assert account_state.orders['10548'].state == 'PENDING'
+    trade = account_state.trades['10550']
+    assert trade.current_units == 5
+    assert trade.take_profit_order_id == 10551
+    position = account_state.positions['GBP_USD']
+    assert position.long.units == 5
+    assert list(position.long.trade_ids) == [10550]
+    assert account_state.get('balance') == 1000
+    assert account_state.get('open_trade_count') == 1
+    assert account_state.get('last_transaction_id') == 10551
+
+    for data in transactions[4:7]:
+        assert account_state.apply_transaction(transaction(data))
+    assert set(account_state.orders) == set()
+    trade = account_state.trades['10550']
+    assert trade.take_profit_order_id is None
+    assert trade.client_extensions.comment == 'modified'
+    assert trade.current_units == 3
+    assert trade.realized_pl == 0.1
+    assert account_state.positions['GBP_USD'].long.units == 3
+
+    assert account_state.apply_transaction(transaction(transactions[7]))
+    assert account_state.trades == {}
+    position = account_state.positions['GBP_USD']
+    assert position.long.units == 0
+    assert list(position.long.trade_ids) == []
+    assert position.pl == pytest.approx(0.25)
+    assert len(account_state.account().trades) == 0
+    assert account_state.get('balance') == 1000.25
+
+
+@pytest.mark.asyncio
+async def test_follow_account_applies_streamed_transactions(client, server):
+    stream = '\n'.join(json.dumps(data) for data in transactions[:4])
+    routes[('GET', '/v3/accounts/123-123-12345678-123/transactions/stream')] = stream
+    server_module.sleep_time = 0.05
+    try:
+        async with client as client:
+            following = asyncio.ensure_future(client.follow_account(reconcile_interval=60))
+            for _ in range(100):
+                await asyncio.sleep(0.02)
+                if client.default_parameters[LastTransactionID] == 10551:
+                    break
+            assert client.default_parameters[LastTransactionID] == 10551
+            assert client.default_parameters[SinceTransactionID] == 10551
+            assert set(client.account_state.orders) == {'10548', '10551'}
+            assert client._account.trades.get_id(10550).take_profit_order_id == 10551
+            assert client.transactions.get_id(10551)
+            assert not following.done()
+        # Closing the client stops following
+        await asyncio.sleep(0)
+        assert following.cancelled()
+    finally:
+        routes[('GET', '/v3/accounts/123-123-12345678-123/transactions/stream')] = None
+
+
+@pytest.mark.asyncio
+async def test_follow_account_reconnects_when_transactions_are_still_missing(client, server, monkeypatch):
+    from async_v20 import client as client_module
+    warnings = []
+    monkeypatch.setattr(client_module.logger, 'warning', lambda msg, *args: warnings.append(msg % args))
+    missing = dict(transactions[0], id='20000')
+    routes[('GET', '/v3/accounts/123-123-12345678-123/transactions/stream')] = json.dumps(missing)
+    try:
+        async with client as client:
+            following = asyncio.ensure_future(client.follow_account(reconcile_interval=60, reconnect_delay=0.01))
+            for _ in range(100):
+                await asyncio.sleep(0.02)
+                if len(warnings) > 1:
+                    break
+            # The transaction isn't applied and following continues on a new stream
+            assert [warning for warning in warnings if 'Transaction 20000 is still missing' in warning][1:]
+            assert 20000 not in client.transactions
+            assert not following.done()
+        await asyncio.sleep(0)
+        assert following.cancelled()
+    finally:
+        routes[('GET', '/v3/accounts/123-123-12345678-123/transactions/stream')] = None
@@ -9,6 +9,7 @@ from ..fixtures import server as server_module
 from ..fixtures.client import client
 from async_v20.exceptions import UnexpectedStatus
 from async_v20 import InstrumentName
+from async_v20 import AccountID
 import logging
 
 logger = logging.getLogger("async_v20")
@@ -33,9 +34,11 @@ async def test_client_initializes_automatically_with_every_api_method(
     data = tuple(
         get_valid_primitive_data(param.annotation)
         for param in method[1].__signature__.parameters.values()
-        if param.name != "self"
+        if param.name != "self" and param.kind is not param.KEYWORD_ONLY
     )
     status = 200
+    # Methods that don't initialize the client need the AccountID
+    client.default_parameters[AccountID] = AccountID("123-123-12345678-123")
     method = getattr(client, method[0])
     try:
         resp = await method(*data)
@@ -65,7 +68,7 @@ async def test_client_methods_send_correct_data(method, server, client):
     data = tuple(
         get_valid_primitive_data(param.annotation)
         for param in method[1].__signature__.parameters.values()
-        if param.name != "self"
+        if param.name != "self" and param.kind is not param.KEYWORD_ONLY
     )
 
     async with client as client:  # initialize first
@@ -89,7 +92,7 @@ async def test_client_methods_shortcut_api_methods(method, server, client):
     data = tuple(
         get_valid_primitive_data(param.annotation)
         for param in method[1].__signature__.parameters.values()
-        if param.name not in "self cls"
+        if param.name not in "self cls" and param.kind is not param.KEYWORD_ONLY
     )
     async with client as client:  # initialize first
         method = getattr(client, method[0])
@@ -0,0 +1,95 @@
+import json
+import time
+from itertools import chain, repeat
+
+import pytest
+
+from async_v20.definitions.types import MarketOrderRequest
+from async_v20.exceptions import InvalidOrderRequest, UnexpectedStatus
+from async_v20.interface.helpers import OrderFormatter
+from .test_coalesce import count_requests
+from ..fixtures.client import client
+from ..fixtures import server as server_module
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+
+@pytest.mark.asyncio
+async def test_post_orders_returns_results_in_order(client, server):
+    async with client as client:
+        sent = count_requests(client)
+        server_module.status = chain([201, 400], repeat(201))
+        order_requests = [MarketOrderRequest(instrument='AUD_USD', units=10),
+                          MarketOrderRequest(instrument='XXX_YYY', units=10),
+                          {'type': 'MARKET', 'instrument': 'AUD_USD', 'units': 20},
+                          MarketOrderRequest(instrument='AUD_USD', units=30)]
+        results = await client.post_orders(order_requests, max_concurrency=1)
+        assert len(sent) == 3
+        assert [getattr(result, 'status', None) for result in results] == [201, None, 400, 201]
+        assert isinstance(results[1], InvalidOrderRequest)
+
+
+@pytest.mark.asyncio
+async def test_post_orders_validates_before_sending(client, server):
+    client.format_order_requests = False
+    async with client as client:
+        sent = count_requests(client)
+        server_module.status = 201
+        results = await client.post_orders([MarketOrderRequest(instrument='AUD_USD', units=10),
+                                            MarketOrderRequest(instrument='AUD_USD', units=10 ** 12)])
+        assert isinstance(results[1], InvalidOrderRequest)
+        assert len(sent) == 1
+        assert float(json.loads(sent[0]['data'])['order']['units']) == 10
+
+
+@pytest.mark.asyncio
+async def test_post_orders_formats_each_order_request_once(client, server, monkeypatch):
+    formatted = []
+    body = OrderFormatter.body
+
+    def count_body(formatter, order_request, *args):
+        formatted.append(order_request)
+        return body(formatter, order_request, *args)
+
+    monkeypatch.setattr(OrderFormatter, 'body', count_body)
+    async with client as client:
+        server_module.status = 201
+        results = await client.post_orders([MarketOrderRequest(instrument='AUD_USD', units=10),
+                                            MarketOrderRequest(instrument='AUD_USD', units=20)])
+        assert all(results)
+        assert len(formatted) == 2
+        assert client._formatted_orders == {}
+
+
+@pytest.mark.asyncio
+async def test_post_orders_limits_concurrency(client, server):
+    async with client as client:
+        server_module.status = 201
+        server_module.sleep_time = 0.05
+        start = time.time()
+        results = await client.post_orders([MarketOrderRequest(instrument='AUD_USD', units=10)] * 6,
+                                           max_concurrency=2)
+        assert time.time() - start >= 0.15
+        assert all(results)
+
+
+@pytest.mark.asyncio
+async def test_cancel_and_replace_orders_return_a_result_per_order(client, server):
+    async with client as client:
+        sent = count_requests(client)
+        server_module.status = 500
+        results = await client.cancel_orders([1, 2, 3])
+        assert len(results) == 3
+        assert all(isinstance(result, UnexpectedStatus) for result in results)
+        assert [kwargs['method'] for kwargs in sent] == ['PUT'] * 3
+
+        results = await client.replace_orders([(1, MarketOrderRequest(instrument='AUD_USD', units=10)),
+                                               (2, MarketOrderRequest(instrument='XXX_YYY', units=10))])
+        assert isinstance(results[0], UnexpectedStatus)
+        assert isinstance(results[1], InvalidOrderRequest)
+        assert len(sent) == 4
@@ -0,0 +1,145 @@
+import time
+
+import pytest
+
+from async_v20.client import OandaClient
+from async_v20.definitions.types import ArrayCandlestick
+from async_v20.endpoints import GETAccountIDInstruments, GETAccountIDSummary
+from async_v20.endpoints.health import GETServices
+from async_v20.endpoints.instrument import GETInstrumentsCandles
+from async_v20.exceptions import InvalidValue
+from async_v20.interface.cache import ResponseCache, PERMANENT, _is_complete_candle_range
+from async_v20.interface.response import Response
+from ..fixtures.client import client
+from ..fixtures import server as server_module
+from .test_coalesce import count_requests
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+
+def response(size, status=200):
+    result = Response([('lastTransactionID', '1')], status, status == 200, 'UNIX')
+    result.body_size = size
+    return result
+
+
+def test_response_cache_evicts_least_recently_used_responses():
+    cache = ResponseCache(max_bytes=100)
+    for key in 'abc':
+        cache.put(GETServices, key, {}, response(40))
+    assert 'a' not in cache and len(cache) == 2 and cache.size == 80
+    assert cache.evictions == 1
+
+    cache.get(GETServices, 'b')
+    cache.put(GETServices, 'd', {}, response(40))
+    assert 'b' in cache and 'c' not in cache
+
+    # Responses larger than the cache are not stored
+    cache.put(GETServices, 'e', {}, response(101))
+    assert 'e' not in cache
+
+
+def test_response_cache_records_hits_and_misses():
+    cache = ResponseCache()
+    assert cache.get(GETServices, 'a') is None
+    cached = response(10)
+    cache.put(GETServices, 'a', {}, cached)
+    assert cache.get(GETServices, 'a') is cached
+    assert cache.hits == {'GETServices': 1}
+    assert cache.misses == {'GETServices': 1}
+    cache.clear()
+    assert len(cache) == 0 and cache.size == 0 and cache.hits == {'GETServices': 1}
+
+
+def test_response_cache_expires_responses():
+    cache = ResponseCache(ttls={GETServices: 0.01, GETAccountIDInstruments: 0})
+    cache.put(GETServices, 'a', {}, response(10))
+    cache.put(GETAccountIDInstruments, 'b', {}, response(10))
+    assert 'a' in cache and 'b' not in cache
+    assert cache.caches(GETAccountIDInstruments)
+    assert not cache.caches(GETAccountIDSummary)
+    time.sleep(0.02)
+    assert cache.get(GETServices, 'a') is None
+    assert cache.size == 0
+
+
+def test_response_cache_does_not_store_error_responses():
+    cache = ResponseCache()
+    cache.put(GETServices, 'a', {}, response(10, status=404))
+    assert len(cache) == 0
+
+
+def test_response_cache_raises_error_for_invalid_size():
+    with pytest.raises(InvalidValue):
+        ResponseCache(max_bytes=-1)
+
+
+def test_client_creates_response_cache():
+    assert OandaClient(token='test').response_cache is None
+    assert type(OandaClient(token='test', response_cache=True).response_cache) == ResponseCache
+    cache = ResponseCache()
+    assert OandaClient(token='test', response_cache=cache).response_cache is cache
+
+
+@pytest.mark.asyncio
+async def test_client_returns_cached_responses(client, server):
+    client.response_cache = ResponseCache()
+    async with client as client:
+        # Initialization requests the account instruments
+        assert client.response_cache.misses['GETAccountIDInstruments'] == 1
+        client.response_cache.clear()
+        sent = count_requests(client)
+        first = await client.account_instruments()
+        assert await client.account_instruments() is first
+        assert len(sent) == 1
+
+        # Not cached
+        await client.account_summary()
+        await client.account_summary()
+        assert len(sent) == 3
+        assert 'GETAccountIDSummary' not in client.response_cache.misses
+
+
+@pytest.mark.asyncio
+async def test_complete_candle_ranges_are_cached_permanently(client, server):
+    client.response_cache = ResponseCache()
+    async with client as client:
+        client.response_cache.clear()
+        sent = count_requests(client)
+        # The range of the latest candles changes with time
+        await client.get_candles('AUD_USD', count=500)
+        await client.get_candles('AUD_USD', count=500)
+        assert len(sent) == 2
+
+        # Candles after `from_time` are still to come
+        await client.get_candles('AUD_USD', from_time=1502463871639182000, count=500)
+        await client.get_candles('AUD_USD', from_time=1502463871639182000, count=500)
+        assert len(sent) == 4
+
+        first = await client.get_candles('AUD_USD', from_time=1502463871639182000, to_time=1502467471639182000)
+        assert await client.get_candles('AUD_USD', from_time=1502463871639182000,
+                                        to_time=1502467471639182000) is first
+        assert len(sent) == 5
+        (_, _, expires), = client.response_cache._entries.values()
+        assert expires == PERMANENT
+
+
+@pytest.mark.parametrize('to_time, candles, expected', [
+    ('1502467471.639182000', [{'complete': True}], True),
+    ('1502467471.639182000', [{'complete': True}, {'complete': False}], False),
+    ('1502467471.639182000', [], False),
+    (str(time.time() + 3600), [{'complete': True}], False),
+    (None, [{'complete': True}], False),
+])
+def test_is_complete_candle_range(to_time, candles, expected):
+    params = {'from': '1502463871.639182000'}
+    if to_time is not None:
+        params['to'] = to_time
+    result = Response([('candles', ArrayCandlestick(*candles))], 200, True, 'UNIX')
+    assert _is_complete_candle_range(GETInstrumentsCandles, {'params': params}, result) == expected
+    assert not _is_complete_candle_range(GETServices, {'params': params}, result)
@@ -0,0 +1,156 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import ujson as json
+
+from async_v20.candle_store import CandleStore, candles_to_array, array_to_candles, split_range
+from async_v20.client import OandaClient
+from async_v20.definitions.types import ArrayCandlestick
+from async_v20.exceptions import InvalidValue, CandleDownloadFailure
+from ..fixtures import server as server_module
+from ..fixtures.client import client
+from ..fixtures.static import get_candles_response
+from .test_coalesce import count_requests
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+candles = json.loads(get_candles_response)['candles']
+
+SECOND = 10 ** 9
+first_time = int(candles[0]['time'].replace('.', ''))
+last_time = int(candles[-1]['time'].replace('.', ''))
+
+
+@pytest.fixture
+def store(tmpdir):
+    yield CandleStore(str(tmpdir))
+
+
+def test_candles_convert_to_and_from_array():
+    array = candles_to_array(candles, 'M')
+    assert len(array) == len(candles)
+    assert array['time'][0] == first_time
+    result = array_to_candles(array, 'M')
+    assert [candle['mid'] for candle in result] == [candle['mid'] for candle in candles]
+    assert ArrayCandlestick(*result)[0].time == ArrayCandlestick(*candles)[0].time
+
+
+def test_candle_store_reads_written_candles(store):
+    assert store.missing('AUD_USD', 'S5', 'M', first_time, last_time + SECOND) == [(first_time, last_time + SECOND)]
+    store.write('AUD_USD', 'S5', 'M', first_time, last_time + SECOND, ArrayCandlestick(*candles))
+    assert store.missing('AUD_USD', 'S5', 'M', first_time, last_time + SECOND) == []
+
+    array = store.read('AUD_USD', 'S5', 'M', first_time, last_time + SECOND)
+    assert isinstance(array.base, np.memmap) or isinstance(array, np.memmap)
+    assert len(array) == len(candles)
+    assert len(store.read('AUD_USD', 'S5', 'M', first_time + SECOND, last_time)) == len(candles) - 2
+
+    # Other keys are stored separately
+    assert len(store.read('AUD_USD', 'S5', 'B', first_time, last_time + SECOND)) == 0
+    assert len(store.read('AUD_USD', 'M1', 'M', first_time, last_time + SECOND)) == 0
+
+    data_frame = store.dataframe('AUD_USD', 'S5', 'M', first_time, last_time + SECOND)
+    assert list(data_frame.mid_o) == [float(candle['mid']['o']) for candle in candles]
+
+
+def test_candle_store_merges_segments(store):
+    middle = int(candles[250]['time'].replace('.', ''))
+    store.write('AUD_USD', 'S5', 'M', middle, last_time + SECOND, candles)
+    assert store.missing('AUD_USD', 'S5', 'M', first_time, last_time + SECOND) == [(first_time, middle)]
+    store.write('AUD_USD', 'S5', 'M', first_time, middle, candles)
+    # Overlapping writes
+    store.write('AUD_USD', 'S5', 'M', first_time, last_time + SECOND, candles)
+    assert store.missing('AUD_USD', 'S5', 'M', first_time, last_time + SECOND) == []
+    array = store.read('AUD_USD', 'S5', 'M', first_time, last_time + SECOND)
+    assert list(array['time']) == list(candles_to_array(candles, 'M')['time'])
+
+
+def test_candle_store_does_not_store_incomplete_candles(store):
+    incomplete = [dict(candle, complete=candle['time'] != candles[100]['time']) for candle in candles]
+    store.write('AUD_USD', 'S5', 'M', first_time, last_time + SECOND, incomplete)
+    incomplete_time = int(candles[100]['time'].replace('.', ''))
+    assert store.missing('AUD_USD', 'S5', 'M', first_time, last_time + SECOND) == [
+        (incomplete_time, last_time + SECOND)]
+    assert len(store.read('AUD_USD', 'S5', 'M', first_time, last_time + SECOND)) == 100
+
+
+def test_candle_store_raises_error_for_invalid_key(store):
+    with pytest.raises(InvalidValue):
+        store.read('AUD_USD', 'S5', 'X', first_time, last_time)
+    with pytest.raises(InvalidValue):
+        store.read('AUD_USD', 'S7', 'M', first_time, last_time)
+
+
+def test_split_range_limits_candles_per_request():
+    ranges = list(split_range(0, 60000 * SECOND, 'S5'))
+    assert ranges == [(0, 25000 * SECOND), (25000 * SECOND, 50000 * SECOND), (50000 * SECOND, 60000 * SECOND)]
+
+
+def test_client_creates_candle_store(tmpdir):
+    assert OandaClient(token='test').candle_store is None
+    assert type(OandaClient(token='test', candle_store=str(tmpdir)).candle_store) == CandleStore
+
+
+@pytest.mark.asyncio
+async def test_get_candles_range_without_store(client, server):
+    async with client as client:
+        sent = count_requests(client)
+        result = await client.get_candles_range('AUD_USD', first_time - 40000 * SECOND, last_time + SECOND)
+        assert len(sent) == 3  # 51805 seconds of S5 candles
+        assert type(result) == ArrayCandlestick
+        assert len(result) == len(candles)
+        assert result[0].time.value == first_time
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('executor', [None, ThreadPoolExecutor, ProcessPoolExecutor])
+async def test_get_candles_range_only_requests_missing_candles(client, server, store, executor):
+    client.candle_store = store
+    if executor is not None:
+        client.executor = executor(max_workers=1)
+    async with client as client:
+        sent = count_requests(client)
+        first = await client.get_candles_range('AUD_USD', first_time, last_time + SECOND)
+        assert len(sent) == 1
+        second = await client.get_candles_range('AUD_USD', first_time, last_time + SECOND)
+        assert len(sent) == 1
+        assert first.dataframe().equals(second.dataframe())
+
+        await client.get_candles_range('AUD_USD', first_time - 10 * SECOND, last_time + SECOND)
+        assert len(sent) == 2
+        assert dict(sent[-1]['params'])['to'] == f'{first_time // SECOND}.000000000'
+    if executor is not None:
+        client.executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_get_candles_range_uses_the_store_in_the_executor(client, server, store):
+    threads = []
+
+    def in_thread(method):
+        def wrapper(*args):
+            threads.append(threading.current_thread())
+            return method(*args)
+        return wrapper
+
+    store.missing, store.read, store.write = map(in_thread, (store.missing, store.read, store.write))
+    client.candle_store = store
+    async with client as client:
+        await client.get_candles_range('AUD_USD', first_time, last_time + SECOND)
+    assert len(threads) == 3
+    assert threading.current_thread() not in threads
+
+
+@pytest.mark.asyncio
+async def test_get_candles_range_raises_error(client, server):
+    async with client as client:
+        server_module.status = 400
+        with pytest.raises(CandleDownloadFailure):
+            await client.get_candles_range('AUD_USD', first_time, last_time)
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from async_v20 import endpoints
+from async_v20.interface.coalesce import can_coalesce, request_key
+from async_v20.interface.helpers import create_request_kwargs
+from async_v20.definitions.types import InstrumentName
+from ..fixtures.client import client
+from ..fixtures import server as server_module
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+
+def count_requests(client):
+    sent = []
+    request = client.session.request
+
+    def counting_request(**kwargs):
+        sent.append(kwargs)
+        return request(**kwargs)
+
+    client.session.request = counting_request
+    return sent
+
+
+@pytest.mark.parametrize('endpoint', [getattr(endpoints, cls) for cls in endpoints.__all__])
+def test_only_single_response_get_requests_can_be_coalesced(endpoint):
+    assert can_coalesce(endpoint) == (endpoint.method == 'GET' and endpoint.host != 'STREAM')
+    assert not can_coalesce(endpoint, incremental='candles')
+
+
+def test_request_key_identifies_request(client):
+    client.default_parameters.pop(InstrumentName, None)
+    candles = create_request_kwargs(client, endpoints.GETInstrumentsCandles,
+                                    {InstrumentName: InstrumentName('AUD_USD')})
+    assert request_key(endpoints.GETInstrumentsCandles, candles) == \
+           request_key(endpoints.GETInstrumentsCandles, dict(candles))
+    other = create_request_kwargs(client, endpoints.GETInstrumentsCandles,
+                                  {InstrumentName: InstrumentName('EUR_USD')})
+    assert request_key(endpoints.GETInstrumentsCandles, candles) != \
+           request_key(endpoints.GETInstrumentsCandles, other)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_are_coalesced(client, server):
+    client.coalesce_requests = True
+    async with client as client:
+        sent = count_requests(client)
+        server_module.sleep_time = 0.05
+        responses = await asyncio.gather(*[client.get_pricing('AUD_USD') for _ in range(5)],
+                                         *[client.get_pricing('EUR_USD') for _ in range(3)],
+                                         client.account_summary())
+        assert len(sent) == 3
+        assert all(response is responses[0] for response in responses[:5])
+        assert all(response is responses[5] for response in responses[5:8])
+        assert responses[0] is not responses[5]
+        assert client.coalesced_requests == {'get_pricing': 6}
+        assert client._in_flight_requests == {}
+
+        # Requests that are not concurrent are sent again
+        await client.get_pricing('AUD_USD')
+        assert len(sent) == 4
+
+
+@pytest.mark.asyncio
+async def test_requests_are_not_coalesced_by_default(client, server):
+    async with client as client:
+        sent = count_requests(client)
+        server_module.sleep_time = 0.05
+        await asyncio.gather(*[client.get_pricing('AUD_USD') for _ in range(3)])
+        assert len(sent) == 3
+        assert not client.coalesced_requests
+
+
+@pytest.mark.asyncio
+async def test_post_requests_are_not_coalesced(client, server):
+    client.coalesce_requests = True
+    async with client as client:
+        sent = count_requests(client)
+        server_module.sleep_time = 0.05
+        server_module.status = 201
+        await asyncio.gather(*[client.create_order('AUD_USD', 10) for _ in range(3)])
+        assert len(sent) == 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_coalesced_request(client, server):
+    client.coalesce_requests = True
+    async with client as client:
+        server_module.sleep_time = 0.05
+        first = asyncio.ensure_future(client.get_pricing('AUD_USD'))
+        second = asyncio.ensure_future(client.get_pricing('AUD_USD'))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second
+        assert first.cancelled()
@@ -21,10 +21,16 @@ from async_v20.endpoints.annotations import LastTransactionID
 from async_v20.exceptions import FailedToCreatePath, InvalidOrderRequest
 from async_v20.interface.helpers import _create_request_params
 from async_v20.interface.helpers import _format_order_request
+from async_v20.interface.helpers import OrderFormatter
+from async_v20.interface.helpers import get_order_formatter
 from async_v20.interface.helpers import construct_arguments
+from async_v20.interface.helpers import create_argument_binder
 from async_v20.interface.helpers import create_body
 from async_v20.interface.helpers import create_request_kwargs
 from async_v20.interface.helpers import create_url
+from async_v20.interface.helpers import get_request_plan
+from async_v20.interface.helpers import header_params
+from async_v20.interface.helpers import query_params
 from async_v20.interface.helpers import too_many_passed_transactions
 from .helpers import order_dict
 from ..data.json_data import GETAccountID_response, example_instruments
@@ -56,7 +62,8 @@ def stop_loss_order():
     del order
 
 
-client_signatures = [inspect.signature(method) for method in client_methods]
+# The signatures of the decorated methods. Without the `priority` and `retry` options
+client_signatures = [inspect.signature(method.__wrapped__) for method in client_methods]
 
 
 def kwargs(sig):
@@ -83,6 +90,44 @@ async def test_construct_arguments(client, server, signature, arguments):
             assert type(instance) == annotation
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize('signature, arguments', annotation_lookup_arguments)
+async def test_argument_binder_matches_construct_arguments(client, server, signature, arguments):
+    await client.initialize()
+    bind = create_argument_binder(signature)
+    for passed in [arguments, {}]:
+        try:
+            expected = construct_arguments(client, signature, **passed)
+        except TypeError:
+            with pytest.raises(TypeError):
+                bind(client, (), passed)
+            continue
+        assert bind(client, (), passed) == expected
+        assert list(bind(client, (), passed)) == list(expected)
+
+    # Positional arguments
+    names = list(signature.parameters)[1:]
+    args = tuple(arguments[name] for name in names)
+    assert bind(client, args, {}) == construct_arguments(client, signature, *args)
+
+
+def test_argument_binder_raises_the_same_errors_as_signature(client):
+    bind = create_argument_binder(inspect.signature(OandaClient.get_candles.__wrapped__))
+    for args, kwargs in [((), {}), (('AUD_USD',), {'not_a_parameter': 1}),
+                         (('AUD_USD',), {'instrument': 'AUD_USD'}), (tuple(range(12)), {})]:
+        with pytest.raises(TypeError):
+            bind(client, args, kwargs)
+
+
+def test_argument_binder_validates_defaults_once(client):
+    bind = create_argument_binder(inspect.signature(OandaClient.get_candles.__wrapped__))
+    first = bind(client, ('AUD_USD',), {})
+    second = bind(client, (), {'instrument': 'AUD_USD'})
+    for annotation, value in first.items():
+        if annotation.__name__ in ('PriceComponent', 'CandlestickGranularity', 'DailyAlignment'):
+            assert second[annotation] is value
+
+
 locations = ['header', 'path', 'query']
 test_arguments_arguments = [(getattr(endpoints, cls), location)
                             for location in locations for cls in endpoints.__all__]
@@ -133,6 +178,39 @@ def test_create_url_raises_error_when_missing_arguments(client, endpoint):
             url = create_url(client, endpoint, {})
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize('method, signature, kwargs', zip(client_methods, *zip(*annotation_lookup_arguments)))
+async def test_request_plan_matches_create_request_params(client, server, method, signature, kwargs):
+    await client.initialize()
+    endpoint = method.endpoint
+    plan = get_request_plan(client, endpoint)
+    assert get_request_plan(client, endpoint) is plan
+    for arguments in [construct_arguments(client, signature, **kwargs), {}]:
+        assert plan.create_headers(client, arguments) == header_params(client, endpoint, arguments)
+        assert plan.create_query(client, arguments) == query_params(client, endpoint, arguments)
+        try:
+            url = create_url(client, endpoint, arguments)
+        except FailedToCreatePath:
+            with pytest.raises(FailedToCreatePath):
+                plan.create_url(client, arguments)
+        else:
+            assert plan.create_url(client, arguments) == url
+
+
+def test_request_plan_headers_change_with_default_parameters(client):
+    plan = get_request_plan(client, POSTOrders)
+    headers = plan.create_headers(client, {})
+    assert headers['Authorization'] == client.default_parameters[Authorization]
+    headers['Content-Type'] = 'application/json'  # Must not change the cached headers
+    assert 'Content-Type' not in plan.create_headers(client, {})
+
+    token = client.default_parameters[Authorization]
+    client.default_parameters[Authorization] = 'Bearer changed'
+    assert plan.create_headers(client, {})['Authorization'] == 'Bearer changed'
+    client.default_parameters[Authorization] = token
+    assert plan.create_headers(client, {Authorization: 'Bearer passed'})['Authorization'] == 'Bearer passed'
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize('method, signature, kwargs', zip(client_methods, *zip(*annotation_lookup_arguments)))
 async def test_create_request_kwargs(client, server, method, signature, kwargs):
@@ -377,6 +455,43 @@ def test_ins_context_does_not_add_parameters_to_order_requests(instrument):
     assert not hasattr(result, 'take_profit_on_fill')
 
 
+formatter_order_requests = [
+    dict(units=50.1234567891234),
+    dict(units=-0.1234567891234),
+    dict(units=10 ** 12, price=1.123456789, price_bound=1234.123456789),
+    dict(units=10, distance=20.123456789, take_profit_on_fill=50.123456789, stop_loss_on_fill=0.123456789),
+    dict(units=-10, trailing_stop_loss_on_fill=0),
+    dict(units=10, trailing_stop_loss_on_fill=10 ** 6),
+    dict(units=10, trailing_stop_loss_on_fill=0.0123456789),
+]
+
+
+@pytest.mark.parametrize('instrument', ArrayInstrument(*json.loads(example_instruments)))
+def test_order_formatter_creates_same_body_as_format_order_request(instrument):
+    formatter = OrderFormatter(instrument)
+    for kwargs in formatter_order_requests:
+        order_request = OrderRequest(instrument=instrument.name, **kwargs)
+        for clip in (True, False):
+            try:
+                expected = _format_order_request(order_request, instrument, clip=clip).dict(json=True)
+            except InvalidOrderRequest:
+                with pytest.raises(InvalidOrderRequest):
+                    formatter.body(order_request, clip=clip)
+            else:
+                assert formatter.body(order_request, clip=clip) == expected
+
+
+@pytest.mark.asyncio
+async def test_order_formatters_are_updated_with_instruments(client, server):
+    await client.initialize()
+    formatter = get_order_formatter(client, 'AUD_USD')
+    assert formatter.name == 'AUD_USD'
+    assert get_order_formatter(client, 'AUD_USD') is formatter
+    assert get_order_formatter(client, 'NOT AN INSTRUMENT') is None
+    client.instruments = ArrayInstrument(*json.loads(example_instruments))
+    assert get_order_formatter(client, 'AUD_USD') is not formatter
+
+
 def test_too_many_passed_transactions(client):
 
     client.default_parameters[SinceTransactionID] = 0
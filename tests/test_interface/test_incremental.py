@@ -0,0 +1,131 @@
+import pytest
+import ujson as json
+
+from async_v20.definitions.types import Candlestick
+from async_v20.endpoints.annotations import LastTransactionID
+from async_v20.exceptions import ResponseTimeout
+from async_v20.interface.incremental import ArrayDecoder
+from tests.fixtures import server as server_module
+from tests.fixtures.client import client
+from tests.fixtures.static import get_candles_response, transaction_range_response
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+
+def decode_in_chunks(body, key, size):
+    decoder = ArrayDecoder(key)
+    body = body.encode()
+    elements = []
+    for index in range(0, len(body), size):
+        elements.extend(decoder.feed(body[index:index + size]))
+    elements.extend(decoder.feed(b'', eof=True))
+    return decoder, elements
+
+
+@pytest.mark.parametrize('size', [1, 7, 64, 4096, 10 ** 6])
+@pytest.mark.parametrize('body, key', [(get_candles_response, 'candles'),
+                                       (transaction_range_response, 'transactions')])
+def test_array_decoder_decodes_elements_from_any_chunk_size(body, key, size):
+    decoder, elements = decode_in_chunks(body, key, size)
+    expected = json.loads(body)
+    assert elements == expected.pop(key)
+    assert decoder.fields == expected
+    assert decoder.finished
+
+
+def test_array_decoder_returns_elements_before_body_is_complete():
+    decoder = ArrayDecoder('candles')
+    body = get_candles_response.encode()
+    elements = decoder.feed(body[:len(body) // 2])
+    assert elements
+    assert not decoder.finished
+
+
+def test_array_decoder_does_not_accept_truncated_numbers():
+    decoder = ArrayDecoder('values')
+    assert decoder.feed(b'{"count": 12') == []
+    assert decoder.feed(b'34, "values": [1, 2') == [1]
+    assert decoder.feed(b'3]}', eof=True) == [23]
+    assert decoder.fields == {'count': 1234}
+
+
+def test_array_decoder_does_not_accept_numbers_split_at_a_fraction_or_exponent():
+    body = (b'{"count": 1.25, "candles": [{"o": 1.5, "v": 2.5e-3}, 1.5e10,-0.75 ,3E+2, 7, true, null], '
+            b'"granularity": "S5", "ratio": 1e-05}')
+    expected = json.loads(body)
+    for index in range(len(body) + 1):
+        decoder = ArrayDecoder('candles')
+        elements = decoder.feed(body[:index])
+        elements.extend(decoder.feed(body[index:]))
+        elements.extend(decoder.feed(b'', eof=True))
+        assert elements == expected['candles'], index
+        assert decoder.fields == {key: value for key, value in expected.items() if key != 'candles'}, index
+
+
+def test_array_decoder_raises_error_on_invalid_number():
+    decoder = ArrayDecoder('values')
+    with pytest.raises(ValueError):
+        decoder.feed(b'{"values": [1.]}', eof=True)
+
+
+def test_array_decoder_handles_multibyte_characters_split_between_chunks():
+    body = '{"values": [{"text": "é€"}]}'.encode()
+    decoder, elements = ArrayDecoder('values'), []
+    for index in range(len(body)):
+        elements.extend(decoder.feed(body[index:index + 1]))
+    elements.extend(decoder.feed(b'', eof=True))
+    assert elements == [{'text': 'é€'}]
+
+
+def test_array_decoder_raises_error_when_body_is_incomplete():
+    decoder = ArrayDecoder('values')
+    decoder.feed(b'{"values": [1, 2')
+    with pytest.raises(ValueError):
+        decoder.feed(b'', eof=True)
+
+
+@pytest.mark.asyncio
+async def test_iter_candles_yields_candlesticks(client, server):
+    async with client as client:
+        candles = [candle async for candle in await client.iter_candles('AUD_USD')]
+        response = await client.get_candles('AUD_USD')
+    assert all(type(candle) == Candlestick for candle in candles)
+    assert candles == list(response.candles)
+
+
+@pytest.mark.asyncio
+async def test_iter_candles_yields_false_response_on_error_status(client, server):
+    async with client as client:
+        server_module.status = 400
+        responses = [obj async for obj in await client.iter_candles('AUD_USD')]
+    assert len(responses) == 1
+    assert bool(responses[0]) == False
+    assert responses[0].status == 400
+
+
+@pytest.mark.asyncio
+async def test_iter_candles_raises_timeout_when_server_does_not_respond(client, server):
+    async with client as client:
+        client.rest_timeout = 0.1
+        server_module.sleep_time = 1
+        with pytest.raises(ResponseTimeout):
+            [obj async for obj in await client.iter_candles('AUD_USD')]
+
+
+@pytest.mark.asyncio
+async def test_iter_transaction_range_updates_last_transaction_id(client, server):
+    server_module.routes[('GET', '/v3/accounts/123-123-12345678-123/transactions/idrange')] = \
+        transaction_range_response
+    try:
+        async with client as client:
+            transactions = [transaction async for transaction in await client.iter_transaction_range(0, 100)]
+    finally:
+        server_module.routes[('GET', '/v3/accounts/123-123-12345678-123/transactions/idrange')] = None
+    assert len(transactions) == len(json.loads(transaction_range_response)['transactions'])
+    assert client.default_parameters[LastTransactionID] == \
+        int(json.loads(transaction_range_response)['lastTransactionID'])
@@ -0,0 +1,129 @@
+import json
+
+import numpy as np
+import pytest
+
+from async_v20.definitions.types import ArrayInstrument, Instrument
+from async_v20.exceptions import InvalidValue
+from async_v20.instrument_registry import InstrumentRegistry
+from async_v20.interface.helpers import _format_order_request
+from async_v20.definitions.types import OrderRequest
+from ..data.json_data import example_instruments
+from ..fixtures.client import client
+from ..fixtures import server as server_module
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+instruments = json.loads(example_instruments)
+
+
+@pytest.fixture
+def registry():
+    return InstrumentRegistry(ArrayInstrument(*instruments))
+
+
+def test_registry_looks_up_instruments_by_name(registry):
+    assert len(registry) == len(instruments)
+    instrument = registry.get_instrument('AUD_USD')
+    assert isinstance(instrument, Instrument)
+    assert registry.get_instrument('AUD_USD') is instrument
+    assert registry['AUD_USD'] is instrument
+    assert 'AUD_USD' in registry
+    assert instrument in registry
+    assert registry.get_instrument('NOT_AN_INSTRUMENT') is None
+    with pytest.raises(KeyError):
+        registry['NOT_AN_INSTRUMENT']
+    assert [instrument.name for instrument in registry] == [data['name'] for data in instruments]
+    assert registry[0].name == instruments[0]['name']
+    assert registry[-1].name == instruments[-1]['name']
+    sliced = registry[1:3]
+    assert isinstance(sliced, ArrayInstrument)
+    assert [instrument.name for instrument in sliced] == [data['name'] for data in instruments[1:3]]
+
+
+def test_registry_keeps_metadata_arrays(registry):
+    row = registry.rows('AUD_USD')[0]
+    instrument = registry['AUD_USD']
+    assert registry.names[row] == 'AUD_USD'
+    assert registry.pip_location[row] == instrument.pip_location
+    assert registry.display_precision[row] == instrument.display_precision
+    assert registry.trade_units_precision[row] == instrument.trade_units_precision
+    assert registry.margin_rate[row] == instrument.margin_rate
+    assert registry.minimum_trade_size[row] == instrument.minimum_trade_size
+    assert registry.maximum_order_units[row] == instrument.maximum_order_units
+    assert registry.minimum_trailing_stop_distance[row] == instrument.minimum_trailing_stop_distance
+    assert registry.maximum_trailing_stop_distance[row] == instrument.maximum_trailing_stop_distance
+    with pytest.raises(InvalidValue):
+        registry.rows(['AUD_USD', 'NOT_AN_INSTRUMENT'])
+
+
+def test_registry_converts_pips(registry):
+    names = ['AUD_USD', 'USD_JPY']
+    prices = registry.pips_to_price(names, [10, 10])
+    assert prices == pytest.approx([0.001, 0.1])
+    assert registry.price_to_pips(names, prices) == pytest.approx([10, 10])
+
+
+def test_registry_rounds_like_order_formatting(registry):
+    names = registry.names
+    prices = np.full(len(names), 1.23456789)
+    units = np.full(len(names), -0.123456789)
+    rounded_prices = registry.round_prices(names, prices)
+    rounded_units = registry.round_units(names, units, clip=True)
+    for name, price, unit in zip(names, rounded_prices, rounded_units):
+        formatted = _format_order_request(OrderRequest(instrument=name, units=-0.123456789, price=1.23456789),
+                                          registry[name], clip=True)
+        assert price == formatted.price
+        assert unit == formatted.units
+
+
+def test_registry_raw_items_are_the_instruments_json(registry):
+    assert registry.raw_items() == tuple(instruments)
+
+
+def test_registry_builds_formatters_when_instruments_are_added(registry):
+    assert set(registry._formatters) == {data['name'] for data in instruments}
+    assert registry.formatter('AUD_USD').name == 'AUD_USD'
+    assert registry.formatter('XXX_YYY') is None
+
+
+def test_registry_updates_only_changed_instruments(registry):
+    version = registry.version
+    instrument = registry['AUD_USD']
+    formatter = registry.formatter('AUD_USD')
+    assert registry.update(instruments) == []
+    assert registry.version == version
+
+    changed = [dict(data, marginRate='0.5') if data['name'] == 'AUD_USD' else data for data in instruments]
+    assert registry.update(changed) == ['AUD_USD']
+    assert registry.version == version + 1
+    assert registry.margin_rate[registry.rows('AUD_USD')[0]] == 0.5
+    assert registry['AUD_USD'] is not instrument
+    assert registry['AUD_USD'].margin_rate == 0.5
+    assert registry.formatter('AUD_USD') is not formatter
+    assert registry.formatter('EUR_USD') is registry.formatter('EUR_USD')
+
+    assert registry.update(instruments[:2], remove=True)
+    assert len(registry) == 2
+    assert list(registry.names) == [data['name'] for data in instruments[:2]]
+
+
+@pytest.mark.asyncio
+async def test_client_instruments_are_updated_by_account_instruments(client, server):
+    async with client as client:
+        assert isinstance(client.instruments, InstrumentRegistry)
+        assert client.instruments.get_instrument('AUD_USD')
+        version = client.instruments.version
+        client.instruments = instruments[:1]
+        assert len(client.instruments) == 1
+        await client.account_instruments()
+        assert len(client.instruments) > 1
+        assert client.instruments.version == version + 2
+        client.instruments = None
+        assert isinstance(client.instruments, InstrumentRegistry)
+        assert len(client.instruments) == 0
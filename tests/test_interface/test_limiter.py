@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from async_v20.exceptions import InvalidValue
+from async_v20.interface.limiter import TokenBucket
+from ..fixtures.client import client
+from ..fixtures import server as server_module
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+
+def test_token_bucket_allows_burst():
+    bucket = TokenBucket(10, burst=5)
+    assert [bucket.reserve() for _ in range(5)] == [0] * 5
+    assert bucket.reserve() == pytest.approx(0.1, rel=0.1)
+    assert bucket.reserve() == pytest.approx(0.2, rel=0.1)
+
+
+def test_token_bucket_does_not_allow_burst_after_idle():
+    bucket = TokenBucket(100)
+    bucket.reserve()
+    time.sleep(0.05)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() > 0
+
+
+def test_token_bucket_throttles_and_recovers():
+    bucket = TokenBucket(100, recovery_interval=0.1, recovery_step=0.25)
+    bucket.throttle()
+    assert bucket.rate == 50
+    bucket.throttle()
+    assert bucket.rate == 25
+    assert bucket.throttled == 2
+    time.sleep(0.25)
+    bucket.reserve()
+    assert bucket.rate == 75
+    time.sleep(0.1)
+    bucket.reserve()
+    assert bucket.rate == 100
+
+
+def test_token_bucket_is_not_throttled_below_min_rate():
+    bucket = TokenBucket(1, min_rate=0.4)
+    for _ in range(5):
+        bucket.throttle()
+    assert bucket.rate == 0.4
+
+
+def test_token_bucket_waits_for_retry_after():
+    bucket = TokenBucket(100)
+    bucket.throttle(retry_after=2)
+    assert bucket.reserve() >= 2
+
+
+def test_token_bucket_raises_error_for_invalid_values():
+    with pytest.raises(InvalidValue):
+        TokenBucket(0)
+    with pytest.raises(InvalidValue):
+        TokenBucket(1, burst=0)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_records_metrics():
+    bucket = TokenBucket(100)
+
+    async def depth():
+        await asyncio.sleep(0)
+        return bucket.queue_depth
+
+    _, _, _, queue_depth = await asyncio.gather(*[bucket.acquire() for _ in range(3)], depth())
+    assert queue_depth == 2
+    metrics = bucket.metrics
+    assert metrics['requests'] == 3
+    assert metrics['waited'] == 2
+    assert metrics['max_queue_depth'] == 2
+    assert metrics['queue_depth'] == 0
+    assert metrics['max_wait'] == pytest.approx(0.02, rel=0.1)
+    assert metrics['total_wait'] == pytest.approx(0.03, rel=0.1)
+
+
+def test_client_has_separate_rate_limiters(client):
+    client.max_requests_per_second = 10
+    assert client.rate_limiters['REST'].max_rate == 10
+    assert client.rate_limiters['HEALTH'].max_rate == 10
+    assert client.rate_limiters['STREAM'].max_rate == 2
+
+
+@pytest.mark.asyncio
+async def test_too_many_requests_response_throttles_client(client, server):
+    async with client as client:
+        rate = client.rate_limiters['REST'].rate
+        server_module.status = 429
+        response = await client.list_orders()
+        assert not response
+        assert response.status == 429
+        assert client.rate_limiters['REST'].throttled == 1
+        assert client.rate_limiters['REST'].rate == rate / 2
+        assert client.rate_limiters['STREAM'].throttled == 0
@@ -0,0 +1,104 @@
+import asyncio
+import json
+from itertools import chain, repeat
+
+import pytest
+
+from async_v20.exceptions import UnexpectedStatus
+from .test_coalesce import count_requests
+from ..fixtures import accounts
+from ..fixtures.client import client
+from ..fixtures.routes import routes
+from ..fixtures import server as server_module
+from .test_transaction_download import transaction
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+account = '/v3/accounts/123-123-12345678-123'
+
+
+@pytest.fixture
+def pages():
+    """Serve each response of a generator in turn"""
+    paths = [('GET', f'{account}/trades'), ('GET', f'{account}/orders'),
+             ('GET', f'{account}/transactions/idrange')]
+    original = {path: routes[path] for path in paths}
+
+    def serve(path, responses):
+        routes[('GET', f'{account}{path}')] = (json.dumps(response) for response in responses)
+
+    yield serve
+    routes.update(original)
+
+
+def trade_page(*ids):
+    return {'trades': [accounts.trade(id_) for id_ in ids], 'lastTransactionID': '100'}
+
+
+@pytest.mark.asyncio
+async def test_iter_trades_follows_pages(client, server, pages):
+    pages('/trades', [trade_page(9, 8, 7), trade_page(6, 5, 4), trade_page(3, 2)])
+    async with client as client:
+        sent = count_requests(client)
+        trades = [trade async for trade in client.iter_trades(state='ALL', count=3)]
+    assert [trade.id for trade in trades] == [9, 8, 7, 6, 5, 4, 3, 2]
+    assert [kwargs['params'].get('beforeID') for kwargs in sent] == [None, '6', '3']
+    assert all(kwargs['params']['count'] == '3' for kwargs in sent)
+
+
+@pytest.mark.asyncio
+async def test_iter_orders_follows_pages(client, server, pages):
+    pages('/orders', [{'orders': [accounts.order(id_) for id_ in (4, 3)]},
+                      {'orders': [accounts.order(id_) for id_ in (2, 1)]}])
+    async with client as client:
+        sent = count_requests(client)
+        orders = [order async for order in client.iter_orders(count=2)]
+    assert [order.id for order in orders] == [4, 3, 2, 1]
+    # Order 1 is the first order. There are no more pages
+    assert len(sent) == 2
+
+
+@pytest.mark.asyncio
+async def test_iter_transactions_requests_id_ranges(client, server, pages):
+    pages('/transactions/idrange', [{'transactions': [transaction(i) for i in range(start, end + 1)]}
+                                    for start, end in ((5, 14), (15, 24), (25, 27))])
+    async with client as client:
+        sent = count_requests(client)
+        transactions = [transaction async for transaction in
+                        client.iter_transactions(5, 27, page_size=10)]
+    assert [transaction.id for transaction in transactions] == list(range(5, 28))
+    assert [(kwargs['params']['from'], kwargs['params']['to']) for kwargs in sent] == \
+           [('5', '14'), ('15', '24'), ('25', '27')]
+
+
+@pytest.mark.asyncio
+async def test_pages_received_ahead_of_the_consumer_are_bounded(client, server, pages):
+    pages('/trades', (trade_page(*range(1000 - page * 3, 997 - page * 3, -1)) for page in range(300)))
+    async with client as client:
+        sent = count_requests(client)
+        trades = client.iter_trades(count=3, prefetch=2)
+        assert (await trades.__anext__()).id == 1000
+        await asyncio.sleep(0.2)
+        # The page consumed, the pages waiting and the page waiting to be queued
+        assert len(sent) == 4
+        await trades.aclose()
+        await asyncio.sleep(0.1)
+        assert len(sent) == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_page_raises(client, server, pages):
+    pages('/trades', [trade_page(9, 8, 7), trade_page(6, 5, 4)])
+    async with client as client:
+        server_module.status = chain([200, 400], repeat(200))
+        received = []
+        with pytest.raises(UnexpectedStatus) as error:
+            async for trade in client.iter_trades(count=3):
+                received.append(trade.id)
+        assert error.value.status == 400
+    assert received == [9, 8, 7]
@@ -1,5 +1,7 @@
 import async_timeout
 import pytest
+import ujson as json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from async_v20.definitions.base import Array
 from async_v20.definitions.types import Account, AccountSummary, AccountProperties
@@ -54,6 +56,9 @@ def rest_response():
         async def json(self):
             return self.data
 
+        async def read(self):
+            return json.dumps(self.data).encode()
+
         async def __aenter__(self):
             return self
 
@@ -112,6 +117,46 @@ async def test_rest_response_builds_array_account_properties(client, rest_respon
     assert type(result['accounts'][0]) == AccountProperties
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize('executor', [None, ThreadPoolExecutor, ProcessPoolExecutor])
+async def test_rest_response_parses_large_responses_in_executor(client, rest_response, executor):
+    client.large_response_threshold = 0
+    if executor is not None:
+        executor = executor(max_workers=1)
+    client.executor = executor
+    try:
+        result = await _rest_response(client, rest_response(GETAccountID_response), GETAccountID,
+                                      enable_rest=False, method_name='test_method')
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    assert type(result['account']) == Account
+    assert type(result['account'].positions[0]) == Position
+    assert client.default_parameters[LastTransactionID] == 14
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('executor', [None, ThreadPoolExecutor, ProcessPoolExecutor])
+async def test_rest_response_raises_unexpected_status_when_body_is_not_json(client, rest_response, executor):
+    class HTMLResponse(rest_response):
+        async def read(self):
+            return b'<html><body>Bad gateway</body></html>'
+
+    client.large_response_threshold = None if executor is None else 0
+    if executor is not None:
+        executor = executor(max_workers=1)
+    client.executor = executor
+    try:
+        with pytest.raises(UnexpectedStatus) as error:
+            await _rest_response(client, HTMLResponse(None, status=429), GETAccountID,
+                                 enable_rest=False, method_name='test_method')
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    assert error.value.status == 429
+    assert 'test_method' in str(error.value)
+
+
 @pytest.mark.asyncio
 async def test_rest_response_updates_client_default_parameters(client, rest_response):
     await _rest_response(client, rest_response(GETAccountID_response), GETAccountID, enable_rest=False,
@@ -148,9 +193,10 @@ async def test_parser_returns_correct_boolean_for_response(client, server):
 @pytest.mark.asyncio
 async def test_parser_raises_connection_error_with_bad_http_status(client, server):
     server_module.status = 500
-    with pytest.raises(UnexpectedStatus):
+    with pytest.raises(UnexpectedStatus) as error:
         async with client as client:
             pass
+    assert error.value.status == 500
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,97 @@
+import pytest
+
+from async_v20.client import OandaClient
+from async_v20.interface.pool import ConnectionPools
+from ..fixtures.client import client
+from ..fixtures import server as server_module
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+
+def idle_connections(connector):
+    return sum(len(connections) for connections in connector._conns.values())
+
+
+def test_connection_pools_update_default_limits():
+    pools = ConnectionPools({'REST': 4}, keepalive_timeouts={'HEALTH': 5})
+    assert pools.limits == {'REST': 4, 'STREAM': 0, 'HEALTH': 2}
+    assert pools.keepalive_timeouts['HEALTH'] == 5
+
+
+@pytest.mark.asyncio
+async def test_connection_pools_create_a_connector_per_host():
+    pools = ConnectionPools({'REST': 4}, ttl_dns_cache=60)
+    rest = pools.connector('REST')
+    assert pools.connector('REST') is rest
+    assert pools.connector('STREAM') is not rest
+    assert rest.limit == 4
+    assert rest.use_dns_cache
+    await pools.close()
+    assert rest.closed
+    assert pools.connector('REST') is not rest
+    await pools.close()
+
+
+@pytest.mark.asyncio
+async def test_client_sends_requests_over_host_pools(client, server):
+    client.max_simultaneous_connections = 3
+    async with client as client:
+        rest = client.session.connector
+        assert client.sessions['REST'] is client.session
+        assert client.sessions['STREAM'].connector is not rest
+        assert client.sessions['HEALTH'].connector is not rest
+        assert rest.limit == 3
+        client.max_simultaneous_connections = 5
+        # Requests are limited by the scheduler. The open pool keeps its size
+        assert client.scheduler.max_connections == 5
+        assert rest.limit == 3
+        assert client.connection_pools.limits['REST'] == 5
+    assert client.session.closed
+    assert rest.closed
+    # Pools created afterwards have the new size
+    assert client.connection_pools.connector('REST').limit == 5
+    await client.connection_pools.close()
+
+
+def test_clients_have_their_own_sessions():
+    first, second = OandaClient(token='test'), OandaClient(token='test')
+    first.sessions['REST'] = None
+    assert second.sessions == {}
+
+
+@pytest.mark.asyncio
+async def test_clients_share_connection_pools(server):
+    pools = ConnectionPools()
+    clients = [OandaClient(token='test', rest_host='127.0.0.1', rest_port=8080, rest_scheme='http',
+                           connection_pools=pools) for _ in range(2)]
+    for client in clients:
+        await client.initialize_session()
+    assert clients[0].session.connector is clients[1].session.connector
+    await clients[0].close()
+    assert not clients[1].session.connector.closed
+    await clients[1].close()
+    # Only the owner of the pools changes their limits
+    clients[0].max_simultaneous_connections = 1
+    assert pools.limits['REST'] == 10
+    assert not pools.connector('REST').closed
+    await pools.close()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_connections(client, server):
+    async with client as client:
+        assert idle_connections(client.session.connector) == 1
+        assert await client.warm_up(3) == 3
+        assert idle_connections(client.session.connector) == 3
+
+
+@pytest.mark.asyncio
+async def test_initialize_warms_up_connections(client, server):
+    client.warm_up_connections = 4
+    async with client as client:
+        assert idle_connections(client.session.connector) >= 4
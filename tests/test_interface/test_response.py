@@ -3,6 +3,10 @@ from tests.fixtures.static import get_account_details_response, get_pricing_resp
 from async_v20.interface.response import Response
 from async_v20.definitions.base import Model, Array
 from async_v20.definitions.types import ArrayStr
+from async_v20.definitions.types import Account
+from async_v20.definitions.base import create_attribute
+from async_v20.endpoints.account import GETAccountID
+import ujson as json
 from ..fixtures.client import client
 from ..fixtures import server as server_module
 from .helpers import sort_json
@@ -80,4 +84,79 @@ async def test_response_dict(client, server):
             check_types(rsp.dict())
 
     response = Response({'test': ArrayStr('1','2','3')}, 200, True, 'UNIX')
-    check_types(response.dict())
\ No newline at end of file
+    check_types(response.dict())
+
+@pytest.fixture
+def lazy_response():
+    schema = GETAccountID.responses[200]
+    data = json.loads(get_account_details_response)
+    yield Response(None, 200, True, 'UNIX', lazy_data=[(key, (schema[key], value)) for key, value in data.items()])
+
+
+def test_lazy_response_only_creates_objects_when_accessed(lazy_response):
+    assert list(lazy_response.keys()) == ['account', 'lastTransactionID']
+    assert 'account' in lazy_response
+    assert lazy_response.lastTransactionID == 4874
+    assert 'lastTransactionID' not in lazy_response._lazy
+    assert 'account' in lazy_response._lazy
+    assert type(lazy_response['account']) == Account
+    assert not lazy_response._lazy
+
+
+def test_lazy_response_behaves_like_eager_response(lazy_response):
+    eager = Response([(key, create_attribute(GETAccountID.responses[200][key], value))
+                      for key, value in json.loads(get_account_details_response).items()],
+                     200, True, 'UNIX')
+    assert bool(lazy_response) == bool(eager)
+    assert lazy_response.status == eager.status
+    assert lazy_response.dict() == eager.dict()
+    assert sort_json(lazy_response.json()) == sort_json(eager.json())
+
+
+def test_lazy_response_creates_objects_when_converted_to_dict(lazy_response):
+    assert type(dict(lazy_response)['account']) == Account
+    assert type(dict(**lazy_response)['account']) == Account
+
+
+@pytest.mark.asyncio
+async def test_client_returns_lazy_responses(client, server):
+    client.lazy_responses = True
+    async with client as client:
+        response = await client.get_account_details()
+        assert type(client._account) == Account
+        assert response._lazy == {}
+        response = await client.list_accounts()
+        assert 'accounts' in response._lazy
+        assert sort_json(response.json()) == sort_json(list_accounts_response.replace(' ', ''))
+
+
+@pytest.mark.asyncio
+async def test_response_json_returns_raw_body_when_kept(client, server):
+    client.raw_body_limit = len(get_account_details_response)
+    async with client as client:
+        response = await client.get_account_details()
+        assert response.raw_body == get_account_details_response.encode()
+        assert response.raw() is response.raw_body
+        assert response.json() == get_account_details_response
+        assert response.json(datetime_format=client.datetime_format) == get_account_details_response
+
+        # A different datetime format re-encodes the objects
+        rfc = response.json(datetime_format='RFC3339')
+        assert rfc != get_account_details_response
+        assert response.raw('RFC3339') == rfc.encode()
+
+        client.raw_body_limit = len(get_account_details_response) - 1
+        response = await client.get_account_details()
+        assert response.raw_body is None
+        assert sort_json(response.raw().decode()) == sort_json(get_account_details_response.replace(' ', ''))
+
+
+def test_modifying_response_discards_raw_body():
+    for modify in (lambda r: r.__setitem__('a', 1), lambda r: r.__delitem__('lastTransactionID'),
+                   lambda r: r.pop('lastTransactionID'), lambda r: r.update(a=1), lambda r: r.popitem(),
+                   lambda r: r.clear(), lambda r: r.setdefault('a', 1)):
+        response = Response([('lastTransactionID', '1')], 200, True, 'UNIX')
+        response.raw_body = b'{"lastTransactionID":"1"}'
+        modify(response)
+        assert response.raw_body is None
+        assert response.json() == json.dumps(dict(response))
@@ -0,0 +1,107 @@
+from itertools import chain, repeat
+
+import pytest
+
+from async_v20.client import OandaClient
+from async_v20.endpoints import GETAccountID, POSTOrders, GETInstrumentsCandles
+from async_v20.exceptions import InvalidValue, ResponseTimeout, UnexpectedStatus
+from async_v20.interface.retry import RetryPolicy
+from ..fixtures.client import client
+from ..fixtures import server as server_module
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+
+def statuses(*failures, then=200):
+    return chain(failures, repeat(then))
+
+
+def test_delay_is_bounded_by_backoff():
+    policy = RetryPolicy(backoff=0.1, max_backoff=0.3)
+    for retry, limit in ((0, 0.1), (1, 0.2), (2, 0.3), (10, 0.3)):
+        assert all(0 <= policy.delay(retry) <= limit for _ in range(100))
+
+
+def test_only_idempotent_requests_are_retried_by_default():
+    policy = RetryPolicy(endpoint_retries={GETInstrumentsCandles: 0})
+    assert policy.retries_endpoint(GETAccountID)
+    assert not policy.retries_endpoint(GETAccountID, retry=False)
+    assert not policy.retries_endpoint(POSTOrders)
+    assert policy.retries_endpoint(POSTOrders, retry=True)
+    assert not policy.retries_endpoint(GETInstrumentsCandles)
+
+
+def test_retry_policy_raises_error_for_invalid_values():
+    with pytest.raises(InvalidValue):
+        RetryPolicy(max_retries=-1)
+
+
+def test_client_creates_retry_policy():
+    assert OandaClient(token='test').retry_policy is None
+    assert isinstance(OandaClient(token='test', retry_policy=True).retry_policy, RetryPolicy)
+
+
+@pytest.mark.asyncio
+async def test_get_requests_are_retried(client, server):
+    client.retry_policy = RetryPolicy(backoff=0.01)
+    async with client as client:
+        server_module.status = statuses(503, 429)
+        response = await client.list_orders()
+        assert response.status == 200
+        assert client.retry_policy.retries == {'GETOrders': 2}
+        assert not client.retry_policy.exhausted
+
+
+@pytest.mark.asyncio
+async def test_last_response_is_returned_when_retries_are_exhausted(client, server):
+    client.retry_policy = RetryPolicy(max_retries=2, backoff=0.01)
+    async with client as client:
+        server_module.status = 429
+        response = await client.list_orders()
+        assert not response
+        assert response.status == 429
+        assert client.retry_policy.retries == {'GETOrders': 2}
+        assert client.retry_policy.exhausted == {'GETOrders': 1}
+
+
+@pytest.mark.asyncio
+async def test_timeouts_are_retried(client, server):
+    client.retry_policy = RetryPolicy(max_retries=1, backoff=0.01)
+    async with client as client:
+        server_module.sleep_time = 0.2
+        client.rest_timeout = 0.05
+        with pytest.raises(ResponseTimeout):
+            await client.list_orders()
+        assert client.retry_policy.retries == {'GETOrders': 1}
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_at_deadline(client, server):
+    client.retry_policy = RetryPolicy(backoff=10, deadline=0)
+    async with client as client:
+        server_module.status = 503
+        with pytest.raises(UnexpectedStatus):
+            await client.list_orders()
+        assert not client.retry_policy.retries
+        assert client.retry_policy.exhausted == {'GETOrders': 1}
+
+
+@pytest.mark.asyncio
+async def test_post_requests_are_only_retried_when_marked_safe(client, server):
+    client.retry_policy = RetryPolicy(backoff=0.01)
+    async with client as client:
+        server_module.status = statuses(503, then=201)
+        with pytest.raises(UnexpectedStatus):
+            await client.create_order('AUD_USD', 10)
+        assert not client.retry_policy.retries
+
+        server_module.status = statuses(503, then=201)
+        response = await client.create_order('AUD_USD', 10, retry=True)
+        assert response.status == 201
+        assert client.retry_policy.retries == {'POSTOrders': 1}
+
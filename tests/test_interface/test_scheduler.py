@@ -0,0 +1,128 @@
+import asyncio
+import inspect
+
+import pytest
+
+from async_v20.client import OandaClient
+from async_v20.endpoints import GETInstrumentsCandles, GETPricing, POSTOrders, GETAccountID, PUTTradeSpecifierClose
+from async_v20.endpoints.health import GETServices
+from async_v20.exceptions import InvalidValue
+from async_v20.interface.scheduler import RequestScheduler, TRADING, ACCOUNT, MARKET_DATA, HISTORY
+from async_v20.interface.scheduler import default_priority, get_priority
+from ..fixtures.client import client
+from ..fixtures import server as server_module
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+
+@pytest.mark.parametrize('endpoint, priority', [(POSTOrders, TRADING), (PUTTradeSpecifierClose, TRADING),
+                                                (GETAccountID, ACCOUNT), (GETPricing, MARKET_DATA),
+                                                (GETServices, MARKET_DATA), (GETInstrumentsCandles, HISTORY)])
+def test_default_priority(endpoint, priority):
+    assert default_priority(endpoint) == priority
+
+
+def test_get_priority():
+    assert get_priority('trading') == TRADING
+    assert get_priority(HISTORY) == HISTORY
+    with pytest.raises(InvalidValue):
+        get_priority('urgent')
+    with pytest.raises(InvalidValue):
+        get_priority(10)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_reserves_connections_for_trading():
+    scheduler = RequestScheduler(2, reserved=1)
+    await scheduler.acquire(HISTORY)
+    waiting = asyncio.ensure_future(scheduler.acquire(HISTORY))
+    await asyncio.sleep(0)
+    assert not waiting.done()
+    await asyncio.wait_for(scheduler.acquire(TRADING), 0.1)
+    assert scheduler.active == 2
+    scheduler.release()
+    scheduler.release()
+    await asyncio.wait_for(waiting, 0.1)
+    assert scheduler.active == 1
+    assert scheduler.waited == {HISTORY: 1}
+    assert scheduler.started == {HISTORY: 2, TRADING: 1}
+
+
+@pytest.mark.asyncio
+async def test_scheduler_starts_requests_in_priority_order():
+    scheduler = RequestScheduler(1, reserved=0)
+    await scheduler.acquire(HISTORY)
+    started = []
+
+    async def request(priority):
+        await scheduler.acquire(priority)
+        started.append(priority)
+        scheduler.release()
+
+    tasks = [asyncio.ensure_future(request(priority))
+             for priority in (HISTORY, MARKET_DATA, ACCOUNT, TRADING, HISTORY)]
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth == 5
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    assert started == [TRADING, ACCOUNT, MARKET_DATA, HISTORY, HISTORY]
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_requests_leave_the_scheduler():
+    scheduler = RequestScheduler(1)
+    await scheduler.acquire(TRADING)
+    waiting = asyncio.ensure_future(scheduler.acquire(TRADING))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth == 0
+    scheduler.release()
+    assert scheduler.active == 0
+
+
+def test_client_creates_scheduler():
+    client = OandaClient(token='test', max_simultaneous_connections=5, reserved_connections=2)
+    assert client.scheduler.max_connections == 5
+    assert client.scheduler.reserved == 2
+    client.max_simultaneous_connections = 3
+    assert client.scheduler.max_connections == 3
+
+
+@pytest.mark.asyncio
+async def test_endpoint_methods_accept_priority(client, server):
+    async with client as client:
+        started = client.scheduler.started[TRADING]
+        assert client.get_pricing.priority == MARKET_DATA
+        await client.get_pricing('AUD_USD', priority='trading')
+        assert client.scheduler.started[TRADING] == started + 1
+        assert client.scheduler.active == 0
+        with pytest.raises(InvalidValue):
+            await client.get_pricing('AUD_USD', priority='urgent')
+
+
+@pytest.mark.asyncio
+async def test_shortcut_methods_accept_priority(client, server):
+    async with client as client:
+        server_module.status = 201
+        started = client.scheduler.started[HISTORY]
+        await client.create_order('AUD_USD', 10, priority='history')
+        assert client.scheduler.started[HISTORY] == started + 1
+
+
+def test_shortcut_methods_are_not_coroutine_functions():
+    assert not asyncio.iscoroutinefunction(OandaClient.create_order)
+
+
+@pytest.mark.parametrize('method', [OandaClient.create_order, OandaClient.get_pricing])
+def test_methods_signature_includes_priority_and_retry(method):
+    parameters = inspect.signature(method).parameters
+    for name in ('priority', 'retry'):
+        assert parameters[name].kind is inspect.Parameter.KEYWORD_ONLY
+        assert parameters[name].default is None
@@ -0,0 +1,139 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from async_v20 import AccountID, LastTransactionID
+from async_v20.snapshot import AccountSnapshot, write_snapshot
+from .test_coalesce import count_requests
+from ..fixtures.client import client
+from ..fixtures import server as server_module
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+# The lastTransactionID of the account changes returned by the test server
+changes_last_transaction_id = 10547
+
+
+def requested_paths(sent):
+    return [kwargs['url'].path for kwargs in sent]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_saves_and_loads_account_state(client, server, tmpdir):
+    path = str(tmpdir.join('snapshot'))
+    async with client as client:
+        saved = client.save_snapshot(path)
+        loaded = AccountSnapshot.load(path)
+        assert loaded.account_id == client.default_parameters[AccountID]
+        assert loaded.last_transaction_id == client.default_parameters[LastTransactionID]
+        assert loaded.account.dict(json=True, datetime_format='UNIX') == \
+               client._account.dict(json=True, datetime_format='UNIX')
+        assert loaded.instruments == saved.instruments == list(client.instruments._json.values())
+
+
+def test_snapshot_load_ignores_missing_and_invalid_files(tmpdir):
+    assert AccountSnapshot.load(str(tmpdir.join('missing'))) is None
+    tmpdir.join('invalid').write('not a snapshot')
+    assert AccountSnapshot.load(str(tmpdir.join('invalid'))) is None
+
+
+@pytest.mark.asyncio
+async def test_client_catches_up_from_snapshot(client, server, tmpdir):
+    path = str(tmpdir.join('snapshot'))
+    async with client as client:
+        snapshot = AccountSnapshot.from_client(client)
+        snapshot.last_transaction_id = changes_last_transaction_id - 10
+        snapshot.save(path)
+
+        client.snapshot = path
+        client.initialized = False
+        client.instruments = []
+        sent = count_requests(client)
+        await client.initialize()
+        paths = requested_paths(sent)
+        assert paths == ['/v3/accounts', '/v3/accounts/123-123-12345678-123/changes']
+        assert client.default_parameters[LastTransactionID] == changes_last_transaction_id
+        assert len(client.instruments) == len(snapshot.instruments)
+        # The changes have been applied to the snapshot's account
+        assert len(client._account.trades) == 1
+
+
+@pytest.mark.asyncio
+async def test_account_client_snapshot_keeps_the_shared_instruments(client, server, tmpdir):
+    path = str(tmpdir.join('snapshot'))
+    async with client as client:
+        instruments = list(client.instruments.raw_items())
+        snapshot = AccountSnapshot.from_client(client)
+        snapshot.instruments = instruments[:1]
+        snapshot.save(path)
+
+        account_client = client.account_client('123-123-12345678-123', snapshot=path)
+        await account_client.initialize()
+        assert account_client.instruments is client.instruments
+        assert list(client.instruments.raw_items()) == instruments
+        await account_client.close()
+
+
+@pytest.mark.asyncio
+async def test_client_loads_full_account_when_snapshot_is_too_old(client, server, tmpdir):
+    path = str(tmpdir.join('snapshot'))
+    client.snapshot = path
+    async with client as client:
+        # No snapshot. Full load saves one
+        assert AccountSnapshot.load(path).last_transaction_id == 4874
+
+        client.initialized = False
+        sent = count_requests(client)
+        await client.initialize()
+        paths = requested_paths(sent)
+        assert '/v3/accounts/123-123-12345678-123/changes' in paths
+        assert '/v3/accounts/123-123-12345678-123' in paths
+        assert '/v3/accounts/123-123-12345678-123/instruments' in paths
+    # Closing saves the current state
+    assert AccountSnapshot.load(path).last_transaction_id == 4874
+
+
+@pytest.mark.asyncio
+async def test_client_ignores_snapshot_of_another_account(client, server, tmpdir):
+    path = str(tmpdir.join('snapshot'))
+    async with client as client:
+        snapshot = AccountSnapshot.from_client(client)
+        snapshot.account_id = '123-123-12345678-999'
+        snapshot.save(path)
+
+        client.snapshot = path
+        client.initialized = False
+        sent = count_requests(client)
+        await client.initialize()
+        assert '/v3/accounts/123-123-12345678-123/changes' not in requested_paths(sent)
+        assert '/v3/accounts/123-123-12345678-123' in requested_paths(sent)
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.functions = []
+
+    def submit(self, function, *args, **kwargs):
+        self.functions.append(getattr(function, 'func', function))
+        return super().submit(function, *args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_client_reads_and_writes_snapshot_in_executor(client, server, tmpdir):
+    path = str(tmpdir.join('snapshot'))
+    client.snapshot = path
+    client.executor = executor = RecordingExecutor()
+    async with client as client:
+        assert AccountSnapshot.load in executor.functions
+        assert write_snapshot in executor.functions
+        executor.functions.clear()
+    assert executor.functions == [write_snapshot]
+    assert AccountSnapshot.load(path).last_transaction_id == 4874
+    client.executor = None
+    executor.shutdown()
@@ -0,0 +1,148 @@
+import json
+import threading
+from itertools import chain, repeat
+
+import pandas as pd
+import pytest
+
+from async_v20.exceptions import TransactionDownloadFailure
+from async_v20.transaction_store import TransactionStore, split_ids, transaction_tables
+from .test_coalesce import count_requests
+from ..fixtures.client import client
+from ..fixtures.routes import routes
+from ..fixtures import server as server_module
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+account_id = '123-123-12345678-123'
+list_path = ('GET', f'/v3/accounts/{account_id}/transactions')
+range_path = ('GET', f'/v3/accounts/{account_id}/transactions/idrange')
+last_transaction_id = 2500
+
+
+def transaction(id_):
+    data = {'id': str(id_), 'accountID': account_id, 'time': f'{1513000000 + id_}.000000000'}
+    if id_ % 10:
+        return dict(data, type='DAILY_FINANCING', financing='-0.1')
+    return dict(data, type='ORDER_FILL', orderID=str(id_ - 1), instrument='AUD_USD', units='5',
+                price='0.75', pl='0.0', reason='MARKET_ORDER', tradeOpened={'tradeID': str(id_), 'units': '5'})
+
+
+@pytest.fixture
+def transactions():
+    """Serve the pages of transactions 1 to 2500. Every ID range returns all transactions"""
+    pages = [f'https://localhost/v3/accounts/{account_id}/transactions/idrange?from={start}&to={end}'
+             for start, end in ((1, 1000), (1001, 2000), (2001, last_transaction_id))]
+    routes[list_path] = json.dumps({'from': '1513000001.000000000', 'to': '1513002500.000000000',
+                                    'pageSize': 1000, 'count': last_transaction_id, 'pages': pages,
+                                    'lastTransactionID': str(last_transaction_id)})
+    routes[range_path] = json.dumps({'transactions': [transaction(i) for i in range(1, last_transaction_id + 1)],
+                                     'lastTransactionID': str(last_transaction_id)})
+    yield
+    routes[list_path] = routes[range_path] = None
+
+
+def requested_ranges(sent):
+    return sorted((int(kwargs['params']['from']), int(kwargs['params']['to']))
+                  for kwargs in sent if kwargs['url'].path.endswith('/idrange'))
+
+
+def test_split_ids_aligns_chunks():
+    assert split_ids(1, 1000) == [(1, 1000)]
+    assert split_ids(995, 2300) == [(1, 1000), (1001, 2000), (2001, 3000)]
+    assert split_ids(20, 45, 10) == [(11, 20), (21, 30), (31, 40), (41, 50)]
+
+
+def test_transaction_tables_are_typed_columns():
+    tables = transaction_tables([transaction(i) for i in (20, 2, 1, 10)])
+    assert set(tables) == {'DAILY_FINANCING', 'ORDER_FILL'}
+    financing = tables['DAILY_FINANCING']
+    assert financing['id'].tolist() == [1, 2]
+    assert financing['financing'].dtype == float
+    assert financing['time'][0] == pd.Timestamp('2017-12-11 13:46:41', tz='UTC')
+    fills = tables['ORDER_FILL']
+    assert fills['id'].tolist() == [10, 20]
+    assert fills['tradeOpened_units'].tolist() == [5, 5]
+    assert fills['accountID'].tolist() == [account_id] * 2
+
+
+@pytest.mark.asyncio
+async def test_download_transactions_requests_chunks_concurrently(client, server, transactions):
+    async with client as client:
+        sent = count_requests(client)
+        tables = await client.download_transactions(from_time='1513000001', to_time='1513002500')
+    assert requested_ranges(sent) == [(1, 1000), (1001, 2000), (2001, 3000)]
+    assert len(tables['ORDER_FILL']) == 250
+    assert len(tables['DAILY_FINANCING']) == 2250
+    assert tables['DAILY_FINANCING']['id'].is_monotonic_increasing
+    assert tables['ORDER_FILL']['id'].iloc[-1] == last_transaction_id
+
+
+@pytest.mark.asyncio
+async def test_download_transactions_sends_the_type_filter(client, server, transactions):
+    async with client as client:
+        sent = count_requests(client)
+        await client.download_transactions(types=['ORDER_FILL', 'DAILY_FINANCING'], chunk_size=500)
+    assert len(requested_ranges(sent)) == 5
+    assert {kwargs['params']['type'] for kwargs in sent} == {'DAILY_FINANCING,ORDER_FILL'}
+
+
+@pytest.mark.asyncio
+async def test_download_transactions_resumes_from_stored_chunks(client, server, transactions, tmpdir):
+    store = TransactionStore(str(tmpdir))
+    async with client as client:
+        # The list request succeeds, one chunk fails
+        server_module.status = chain([200, 400], repeat(200))
+        with pytest.raises(TransactionDownloadFailure):
+            await client.download_transactions(store=store, max_concurrency=1)
+        stored = store.chunks(account_id)
+        assert len(stored) < 2
+
+        server_module.status = 200
+        sent = count_requests(client)
+        tables = await client.download_transactions(store=store)
+        # Stored chunks aren't requested again
+        assert not set(requested_ranges(sent)) & stored
+        assert store.chunks(account_id) == {(1, 1000), (1001, 2000)}
+        assert len(tables['DAILY_FINANCING']) + len(tables['ORDER_FILL']) == last_transaction_id
+
+        # The last chunk isn't complete, so it is requested each time
+        sent = count_requests(client)
+        tables = await client.download_transactions(store=store)
+        assert requested_ranges(sent) == [(2001, 3000)]
+        assert len(tables['DAILY_FINANCING']) + len(tables['ORDER_FILL']) == last_transaction_id
+    assert len(store.tables(account_id)['DAILY_FINANCING']) == 1800
+
+
+@pytest.mark.asyncio
+async def test_download_transactions_uses_the_store_in_the_executor(client, server, transactions, tmpdir):
+    store = TransactionStore(str(tmpdir))
+    threads = []
+
+    def in_thread(method):
+        def wrapper(*args):
+            threads.append(threading.current_thread())
+            return method(*args)
+        return wrapper
+
+    store.write = in_thread(store.write)
+    store.chunks = in_thread(store.chunks)
+    async with client as client:
+        await client.download_transactions(store=store)
+    # The stored chunks are listed, two complete chunks are written and the
+    # stored transactions are read, which lists the chunks again
+    assert len(threads) == 4
+    assert threading.current_thread() not in threads
+
+
+@pytest.mark.asyncio
+async def test_download_transactions_fails_when_pages_cannot_be_listed(client, server, transactions):
+    async with client as client:
+        server_module.status = 400
+        with pytest.raises(TransactionDownloadFailure):
+            await client.download_transactions()
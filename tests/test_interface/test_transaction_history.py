@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+
+from async_v20 import Transaction
+from async_v20.definitions.types import ArrayTransaction
+from async_v20.exceptions import InvalidValue
+from async_v20.transaction_history import TransactionHistory
+from ..fixtures.client import client
+from ..fixtures import server as server_module
+
+import logging
+logger = logging.getLogger('async_v20')
+logger.disabled = True
+
+client = client
+server = server_module.server
+
+
+def transaction(id_):
+    return {'id': str(id_), 'type': 'DAILY_FINANCING', 'accountID': '123-123-12345678-123',
+            'time': f'{1513000000 + id_}.000000000', 'financing': '-0.1'}
+
+
+def test_history_keeps_the_newest_transactions_newest_first():
+    history = TransactionHistory(5)
+    history.extend(ArrayTransaction(*(transaction(i) for i in reversed(range(8)))))
+    assert len(history) == 5
+    assert [t.id for t in history] == [7, 6, 5, 4, 3]
+    assert (history.first_id, history.last_id) == (3, 7)
+    assert history.get_id(5).id == 5
+    assert history.get_id('5') is history.get_id(5)
+    assert history.get_id(2) is None
+    assert 7 in history and '7' in history and 2 not in history
+    assert history[0].id == 7
+    assert history[-1].id == 3
+    assert isinstance(history[0], Transaction)
+
+    # Duplicates are ignored and late transactions inserted in order
+    history.append(transaction(6))
+    history.extend([transaction(8), transaction(10)])
+    history.append(transaction(9))
+    assert [t.id for t in history] == [10, 9, 8, 7, 6]
+    assert [t.id for t in history.array()] == [10, 9, 8, 7, 6]
+    assert history.array() is history.array()
+
+
+def test_history_is_used_as_an_array_transaction():
+    history = TransactionHistory(5)
+    history.extend(transaction(i) for i in range(8))
+    array = ArrayTransaction(*(transaction(i) for i in reversed(range(3, 8))))
+    assert history == array
+    assert list(history.ids()) == list(array.ids()) == ['7', '6', '5', '4', '3']
+    assert history.raw_items() == array.raw_items()
+    assert isinstance(history[1:3], ArrayTransaction)
+    assert [t.id for t in history[1:3]] == [6, 5]
+    assert history.get_instrument('EUR_USD') is None
+    assert len(history.get_trade_ids(1, default=[])) == 0
+    assert [t.id for t in history + ArrayTransaction(transaction(1))] == [7, 6, 5, 4, 3, 1]
+    assert list(history.dataframe().id) == [7, 6, 5, 4, 3]
+
+
+def test_history_stores_transactions_until_accessed():
+    history = TransactionHistory(3)
+    history.extend(ArrayTransaction(transaction(1), transaction(2)))
+    assert all(isinstance(t, dict) for t in history._transactions[:2])
+    history.get_id(2)
+    assert isinstance(history._transactions[1], Transaction)
+    assert isinstance(history._transactions[0], dict)
+
+
+def test_history_range_queries():
+    history = TransactionHistory(100)
+    history.extend(transaction(i) for i in range(10, 30))
+    assert isinstance(history.range(15, 18), ArrayTransaction)
+    assert [t.id for t in history.range(15, 18)] == [18, 17, 16, 15]
+    assert [t.id for t in history.range(None, 11)] == [11, 10]
+    assert [t.id for t in history.range(28)] == [29, 28]
+    assert len(history.range(40, 50)) == 0
+    times = history.time_range('1513000012', '1513000014.5')
+    assert [t.id for t in times] == [14, 13, 12]
+    assert [t.id for t in history.time_range(from_time='1513000028')] == [29, 28]
+
+
+def test_history_spills_evicted_transactions(tmpdir):
+    path = str(tmpdir.join('spill'))
+    history = TransactionHistory(3, spill=path)
+    history.extend(transaction(i) for i in range(10))
+    history.get_id(9)
+    assert history.spilled == 7
+    assert [t.id for t in history.read_spill()] == list(range(7))
+    history.close()
+    # The spill file is appended to
+    history.append(transaction(10))
+    history.close()
+    assert [t.id for t in TransactionHistory(3, spill=path).read_spill()] == list(range(8))
+
+
+def test_history_writes_the_spill_file_in_a_worker_thread(tmpdir):
+    history = TransactionHistory(1, spill=str(tmpdir.join('spill')))
+    write_spill = history._write_spill
+    threads = []
+
+    def record_thread(transaction):
+        threads.append(threading.current_thread())
+        write_spill(transaction)
+
+    history._write_spill = record_thread
+    history.extend(transaction(i) for i in range(3))
+    history.close()
+    assert len(threads) == 2
+    assert threading.current_thread() not in threads
+
+
+def test_history_max_size_must_not_be_negative():
+    with pytest.raises(InvalidValue):
+        TransactionHistory(-1)
+
+
+def test_history_of_max_size_zero_spills_every_transaction(tmpdir):
+    path = str(tmpdir.join('spill'))
+    history = TransactionHistory(0, spill=path)
+    history.extend(transaction(i) for i in range(3))
+    assert len(history) == 0
+    assert history.get_id(1) is None
+    assert [t.id for t in history.read_spill()] == [0, 1, 2]
+    history.close()
+    TransactionHistory(0).extend(transaction(i) for i in range(3))
+
+
+@pytest.mark.asyncio
+async def test_clients_have_their_own_transaction_history(client, server):
+    async with client as client:
+        await client.account_changes()
+        assert isinstance(client.transactions, TransactionHistory)
+        assert len(client.transactions)
+        assert client.transactions.max_size == client.max_transaction_history
+        assert not len(client.account_client('123-123-12345678-124').transactions)